@@ -2,10 +2,12 @@
 """
 Sierac-tm Cursor Hook
 - beforeSubmitPrompt: whitelist check (block if not in approved project) + record session start
-- stop: report session end with project_id to collector
+- stop: report session end with project_id to collector (spooled locally and replayed
+  in batches when the collector is unreachable or busy)
 
 Whitelist is cached locally (whitelist_cache.json, 5-min TTL) to avoid
-a network round-trip on every keystroke.
+a network round-trip on every keystroke; after the TTL it is revalidated with
+If-None-Match, so an unchanged whitelist costs a 304 with no body.
 """
 
 import json
@@ -97,98 +99,176 @@ def whitelist_cache_path(state_dir: str) -> str:
     return os.path.join(state_dir, "whitelist_cache.json")
 
 
-def load_whitelist_cache(state_dir: str, ttl: int) -> list | None:
-    """Return cached rules if fresh, else None."""
+def read_whitelist_cache(state_dir: str) -> dict | None:
     p = whitelist_cache_path(state_dir)
     if not os.path.exists(p):
         return None
     try:
         with open(p, "r", encoding="utf-8") as f:
-            cached = json.load(f)
-        if time.time() - cached.get("fetched_at", 0) < ttl:
-            return cached.get("rules", [])
+            return json.load(f)
     except Exception:
-        pass
+        return None
+
+
+def load_whitelist_cache(state_dir: str, ttl: int) -> list | None:
+    """Return cached rules if fresh, else None."""
+    cached = read_whitelist_cache(state_dir)
+    if cached and time.time() - cached.get("fetched_at", 0) < ttl:
+        return cached.get("rules", [])
     return None
 
 
-def fetch_whitelist(collector_url: str, timeout: int) -> list | None:
-    """Fetch whitelist from collector. Returns list of rule dicts or None on error."""
+def fetch_whitelist(collector_url: str, timeout: int, etag: str | None = None) -> tuple | None:
+    """Fetch whitelist from collector (conditional on etag). Returns (rules, etag),
+    (None, etag) on 304 Not Modified, or None on error."""
     url = collector_url.rstrip("/") + "/api/projects/whitelist"
-    req = urllib.request.Request(url, headers={"Accept": "application/json"})
+    headers = {"Accept": "application/json"}
+    if etag:
+        headers["If-None-Match"] = etag
+    req = urllib.request.Request(url, headers=headers)
     try:
         with urllib.request.urlopen(req, timeout=timeout) as resp:
             data = json.loads(resp.read())
-            return data.get("rules", [])
+            return data.get("rules", []), resp.headers.get("ETag")
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return None, etag
+        return None
     except Exception:
         return None
 
 
-def save_whitelist_cache(state_dir: str, rules: list):
+def save_whitelist_cache(state_dir: str, rules: list, etag: str | None = None):
     ensure_dir(state_dir)
     with open(whitelist_cache_path(state_dir), "w", encoding="utf-8") as f:
-        json.dump({"fetched_at": time.time(), "rules": rules}, f)
+        json.dump({"fetched_at": time.time(), "rules": rules, "etag": etag}, f)
 
 
 def get_whitelist(cfg: dict) -> list | None:
-    """Get whitelist rules: cache first, then network, then None (fail-open)."""
+    """Get whitelist rules: fresh cache, else revalidate with the collector (304 keeps the
+    cached rules), else None (fail-open)."""
     state_dir = cfg["state_dir"]
     ttl = int(cfg.get("whitelist_ttl_seconds", 300))
     rules = load_whitelist_cache(state_dir, ttl)
     if rules is not None:
         return rules
-    rules = fetch_whitelist(cfg["collector_url"], int(cfg.get("timeout_seconds", 5)))
-    if rules is not None:
-        save_whitelist_cache(state_dir, rules)
+    cached = read_whitelist_cache(state_dir) or {}
+    fetched = fetch_whitelist(cfg["collector_url"], int(cfg.get("timeout_seconds", 5)), cached.get("etag"))
+    if fetched is None:
+        return None
+    rules, etag = fetched
+    if rules is None:  # 304 Not Modified
+        rules = cached.get("rules", [])
+    save_whitelist_cache(state_dir, rules, etag)
     return rules
 
 # ─── Whitelist matching ───────────────────────────────────────────────────────
 
+def normalise_path(path: str) -> str:
+    """Same normalisation as the collector: / and \\ alike, case-insensitive."""
+    return (path or "").replace("\\", "/").strip().lower()
+
+
 def match_whitelist(workspace_roots: list[str], user_email: str, rules: list) -> dict | None:
     """
-    Return the first matching rule dict, or None if no match.
-    Matching logic:
-    - workspace root must start with one of rule's workspace_rules (case-insensitive on Windows)
-    - if rule has member_emails, user_email must be in the list
+    Return the matching rule dict, or None if no match.
+    Matching logic (same as the collector; rules arrive normalised):
+    - workspace root (normalised) must start with one of rule's workspace_rules
+    - if rule has member_emails, user_email must be in the list (case-insensitive)
+    - the first root with a match wins; for it the longest rule wins
     """
-    is_windows = sys.platform == "win32"
-
-    for rule in rules:
-        rule_paths: list[str] = rule.get("workspace_rules", [])
-        member_emails: list[str] = rule.get("member_emails", [])
-
-        for root in workspace_roots:
-            for rule_path in rule_paths:
-                rp = (rule_path or "").strip().rstrip("。，,; \t\n\r")  # avoid UI typo (e.g. trailing 。)
-                if not rp:
-                    continue
-                if is_windows:
-                    matched = root.lower().startswith(rp.lower())
-                else:
-                    matched = root.startswith(rp)
-
-                if matched:
-                    if member_emails and user_email.lower() not in [e.lower() for e in member_emails]:
-                        continue
-                    return rule
+    user = user_email.lower()
+    for root in workspace_roots:
+        root_n = normalise_path(root)
+        best, best_len = None, 0
+        for rule in rules:
+            member_emails: list[str] = rule.get("member_emails", [])
+            if member_emails and user not in [e.lower() for e in member_emails]:
+                continue
+            for rule_path in rule.get("workspace_rules", []):
+                rp = normalise_path(rule_path).rstrip("。，,; \t\n\r")  # avoid UI typo (e.g. trailing 。)
+                if rp and len(rp) > best_len and root_n.startswith(rp):
+                    best, best_len = rule, len(rp)
+        if best is not None:
+            return best
 
     return None
 
 # ─── Report session ───────────────────────────────────────────────────────────
 
-def post_session(collector_url: str, payload: dict, timeout: int):
-    url = collector_url.rstrip("/") + "/api/sessions"
+SPOOL_MAX_EVENTS = 1000  # oldest events are dropped beyond this
+SPOOL_BATCH_SIZE = 200
+
+
+def spool_path(state_dir: str) -> str:
+    return os.path.join(state_dir, "spool.jsonl")
+
+
+def load_spool(state_dir: str) -> list[dict]:
+    p = spool_path(state_dir)
+    if not os.path.exists(p):
+        return []
+    events = []
+    try:
+        with open(p, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    pass
+    except Exception:
+        pass
+    return events
+
+
+def save_spool(state_dir: str, events: list[dict]):
+    ensure_dir(state_dir)
+    p = spool_path(state_dir)
+    if not events:
+        try:
+            os.remove(p)
+        except FileNotFoundError:
+            pass
+        return
+    tmp = p + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for e in events[-SPOOL_MAX_EVENTS:]:
+            f.write(json.dumps(e) + "\n")
+    os.replace(tmp, p)
+
+
+def _post_json(url: str, body, timeout: int) -> bool:
     req = urllib.request.Request(
         url,
-        data=json.dumps(payload).encode("utf-8"),
+        data=json.dumps(body).encode("utf-8"),
         headers={"Content-Type": "application/json"},
         method="POST",
     )
     try:
         with urllib.request.urlopen(req, timeout=timeout):
-            pass
+            return True
+    except urllib.error.HTTPError as e:
+        # 4xx other than 429 will not succeed on retry; drop rather than spool forever
+        return e.code != 429 and e.code < 500
     except Exception:
-        pass
+        return False
+
+
+def post_session(collector_url: str, payload: dict, timeout: int, state_dir: str):
+    """Report the session; on network error / 429 / 5xx keep it in the local spool.
+
+    Spooled events are replayed through /api/sessions/batch on the next successful report.
+    """
+    base = collector_url.rstrip("/")
+    if not _post_json(base + "/api/sessions", payload, timeout):
+        save_spool(state_dir, load_spool(state_dir) + [payload])
+        return
+    pending = load_spool(state_dir)
+    while pending:
+        if not _post_json(base + "/api/sessions/batch", pending[:SPOOL_BATCH_SIZE], timeout):
+            break
+        pending = pending[SPOOL_BATCH_SIZE:]
+    save_spool(state_dir, pending)
 
 # ─── Main ─────────────────────────────────────────────────────────────────────
 
@@ -270,7 +350,7 @@ def main():
             "duration_seconds": duration_seconds,
             "project_id": project_id,
         }
-        post_session(collector_url, payload, timeout)
+        post_session(collector_url, payload, timeout, state_dir)
         print(json.dumps({"continue": True}))
         return
 
@@ -6,8 +6,10 @@ Incremental sync by commit_ts; project_id matched via repo_name ↔ projects.git
 import logging
 from datetime import datetime, timedelta, timezone
 
+import cache
 from cursor_api import get_ai_code_commits
 from database import get_pool
+from summaries import AI_COMMIT_VIEW, mark_late_rows
 
 log = logging.getLogger("ai_code_sync")
 
@@ -111,6 +113,7 @@ async def sync_ai_code_commits() -> None:
                 break
 
             async with pool.acquire() as conn:
+                earliest: datetime | None = None
                 for c in commits:
                     commit_ts = _parse_commit_ts(c.get("commitTs"))
                     if commit_ts is None:
@@ -127,7 +130,7 @@ async def sync_ai_code_commits() -> None:
                             non_ai_lines_added, non_ai_lines_deleted,
                             commit_message, commit_ts
                         ) VALUES ($1,$2,$3,$4,$5,$6,$7,$8,$9,$10,$11,$12,$13,$14,$15,$16)
-                        ON CONFLICT (commit_hash, user_email) DO UPDATE SET
+                        ON CONFLICT (commit_hash, user_email, commit_ts) DO UPDATE SET
                             user_id = EXCLUDED.user_id,
                             repo_name = EXCLUDED.repo_name,
                             branch_name = EXCLUDED.branch_name,
@@ -141,7 +144,6 @@ async def sync_ai_code_commits() -> None:
                             non_ai_lines_added = EXCLUDED.non_ai_lines_added,
                             non_ai_lines_deleted = EXCLUDED.non_ai_lines_deleted,
                             commit_message = EXCLUDED.commit_message,
-                            commit_ts = EXCLUDED.commit_ts,
                             synced_at = NOW()
                         """,
                         c.get("commitHash") or "",
@@ -162,6 +164,9 @@ async def sync_ai_code_commits() -> None:
                         commit_ts,
                     )
                     total_upserted += 1
+                    earliest = commit_ts if earliest is None else min(earliest, commit_ts)
+                if earliest is not None:
+                    await mark_late_rows(conn, AI_COMMIT_VIEW, earliest)
 
             pagination = data.get("pagination") or {}
             total_count = pagination.get("totalCount", 0)
@@ -173,3 +178,6 @@ async def sync_ai_code_commits() -> None:
     except Exception as e:
         log.exception("AI code sync failed: %s", e)
         # Do not re-raise: other scheduled tasks (sync, alerts) must keep running
+    finally:
+        if total_upserted:
+            cache.bump(cache.AI_COMMITS)
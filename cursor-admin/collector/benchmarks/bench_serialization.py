@@ -0,0 +1,101 @@
+"""
+Before/after benchmark for list-response serialisation.
+
+  before: dict(r) per row -> FastAPI JSONResponse (jsonable_encoder + json.dumps)
+  after:  rows handed to serialization.ORJSONResponse as-is
+
+Run from cursor-admin/collector:  python benchmarks/bench_serialization.py [--rows 500] [--repeat 50]
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from serialization import ORJSONResponse  # noqa: E402
+
+
+def session_rows(n: int) -> list[dict]:
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "id": i,
+            "event": "stop",
+            "conversation_id": f"conv-{i:08d}",
+            "user_email": f"user{i % 40}@example.com",
+            "machine_id": f"machine-{i % 17}",
+            "workspace_roots": [f"/home/u{i % 40}/repo-{i % 9}"],
+            "primary_workspace": f"/home/u{i % 40}/repo-{i % 9}",
+            "ended_at": base + timedelta(minutes=7 * i),
+            "duration_seconds": 60 + i % 3600,
+            "project_id": i % 12 or None,
+            "received_at": base + timedelta(minutes=7 * i, seconds=2),
+        }
+        for i in range(n)
+    ]
+
+
+def usage_rows(days: int, members: int) -> list[dict]:
+    start = date(2026, 1, 1)
+    return [
+        {
+            "email": f"user{m}@example.com",
+            "day": start + timedelta(days=d),
+            "agent_requests": (d * m) % 200,
+            "chat_requests": (d + m) % 50,
+            "composer_requests": (d * 3 + m) % 80,
+            "total_tabs_accepted": (d * 7 + m) % 400,
+            "total_lines_added": (d * 11 + m) % 2000,
+            "total_lines_deleted": (d * 5 + m) % 900,
+            "accepted_lines_added": (d * 13 + m) % 1500,
+            "is_active": (d + m) % 5 != 0,
+            "spend_cents": Decimal(f"{(d * m) % 997}.{m % 100:02d}"),
+        }
+        for d in range(days)
+        for m in range(members)
+    ]
+
+
+def before(rows: list[dict]) -> bytes:
+    return JSONResponse(content=jsonable_encoder([dict(r) for r in rows])).body
+
+
+def after(rows: list[dict]) -> bytes:
+    return ORJSONResponse(rows).body
+
+
+def bench(fn, rows, repeat: int) -> float:
+    fn(rows)
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn(rows)
+    return (time.perf_counter() - t0) / repeat * 1000
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=500, help="session rows per page")
+    ap.add_argument("--members", type=int, default=60, help="members in the 30-day usage dump")
+    ap.add_argument("--repeat", type=int, default=50)
+    args = ap.parse_args()
+
+    cases = [
+        (f"sessions page ({args.rows} rows)", session_rows(args.rows)),
+        (f"daily usage 30d x {args.members} members", usage_rows(30, args.members)),
+    ]
+    print(f"{'case':<40} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+    for name, rows in cases:
+        b = bench(before, rows, args.repeat)
+        a = bench(after, rows, args.repeat)
+        print(f"{name:<40} {b:>10.2f} {a:>10.2f} {b / a:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Before/after benchmark for workspace root -> project resolution on hook ingest.
+
+  before: every rule of every active project normalised and prefix-compared per root
+          (projects re-fetched per request; the fetch itself is not timed here)
+  after:  workspace_resolver.build_trie once, then PrefixTrie.longest_prefix per root
+
+Run from cursor-admin/collector:  python benchmarks/bench_workspace_resolver.py [--projects 1000] [--roots 10000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from workspace_resolver import build_trie, normalise_root  # noqa: E402
+
+
+def project_rows(projects: int, rules_per_project: int) -> list[dict]:
+    return [
+        {
+            "id": p,
+            "workspace_rules": [
+                f"D:\\Work\\Team{p % 25}\\Repo-{p}-{k}。" if k % 2 else f"/home/dev/team{p % 25}/repo-{p}-{k}"
+                for k in range(rules_per_project)
+            ],
+        }
+        for p in range(1, projects + 1)
+    ]
+
+
+def roots(n: int, projects: int, rules_per_project: int, seed: int = 7) -> list[list[str]]:
+    rnd = random.Random(seed)
+    out = []
+    for _ in range(n):
+        p, k = rnd.randint(1, projects), rnd.randrange(rules_per_project)
+        hit = f"d:/work/team{p % 25}/repo-{p}-{k}/src" if k % 2 else f"/home/dev/team{p % 25}/repo-{p}-{k}/pkg"
+        # a quarter of the events come from unregistered workspaces (worst case for the linear scan)
+        out.append([hit] if rnd.random() < 0.75 else [f"/tmp/scratch-{rnd.randrange(10**6)}"])
+    return out
+
+
+def before(rows: list[dict], workspace_roots: list[str]) -> int | None:
+    for root in workspace_roots:
+        for r in rows:
+            for rule in r["workspace_rules"] or []:
+                root_n = root.replace("\\", "/").strip().lower()
+                rule_n = rule.replace("\\", "/").strip().lower().rstrip("。，,; \t\n\r")
+                if rule_n and root_n.startswith(rule_n):
+                    return r["id"]
+    return None
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--projects", type=int, default=1000)
+    ap.add_argument("--rules", type=int, default=5, help="workspace rules per project")
+    ap.add_argument("--roots", type=int, default=10000, help="hook events to resolve")
+    args = ap.parse_args()
+
+    rows = project_rows(args.projects, args.rules)
+    events = roots(args.roots, args.projects, args.rules)
+    # the linear scan is slow; time a slice of it and scale
+    sample = events[: max(1, min(len(events), 500))]
+
+    t0 = time.perf_counter()
+    expected = [before(rows, e) for e in sample]
+    b = (time.perf_counter() - t0) / len(sample) * 1e6
+
+    t0 = time.perf_counter()
+    trie = build_trie(rows)
+    build_ms = (time.perf_counter() - t0) * 1000
+
+    t0 = time.perf_counter()
+    got = [next((v for v in (trie.longest_prefix(normalise_root(r)) for r in e) if v is not None), None) for e in events]
+    a = (time.perf_counter() - t0) / len(events) * 1e6
+
+    assert got[: len(sample)] == expected, "trie and linear scan disagree"
+    print(f"{args.projects} projects x {args.rules} rules = {trie.size} rules, {args.roots} events")
+    print(f"trie build: {build_ms:.1f} ms")
+    print(f"{'per event':<20} {'before us':>10} {'after us':>10} {'speedup':>8}")
+    print(f"{'':<20} {b:>10.1f} {a:>10.2f} {b / a:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Response cache for heavy aggregate endpoints.
+
+- Entries are keyed by endpoint + normalised parameters + the current generation of every
+  data domain the endpoint reads; writers call bump(domain) after they commit, so later
+  lookups miss and stale entries simply age out of the LRU.
+- TTL bounds staleness for writes this process does not see (e.g. manual SQL).
+- respond() always returns the serialised body with a content ETag and answers
+  If-None-Match with 304, whether or not caching is enabled.
+- Producers read from the primary (database.primary_reads): a replica that has not replayed
+  the write behind a bump() would otherwise cache stale rows under the new generation.
+- Endpoints listed in settings.singleflight_endpoints share one in-flight query (and its
+  serialised body) between identical concurrent requests, with or without the cache.
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Any
+
+from fastapi import Request, Response
+
+import database
+from config import settings
+from serialization import dumps
+from singleflight import singleflight
+
+# 数据域：写入方在提交后 bump 对应域
+SESSIONS = "sessions"
+AI_COMMITS = "ai_commits"
+PROJECTS = "projects"
+USAGE = "usage"
+SPEND = "spend"
+MEMBERS = "members"
+CONTRIBUTIONS = "contributions"
+
+DOMAINS = (SESSIONS, AI_COMMITS, PROJECTS, USAGE, SPEND, MEMBERS, CONTRIBUTIONS)
+
+_generations: dict[str, int] = {}
+_bump_hooks: list[Callable[[tuple[str, ...]], None]] = []
+
+
+def bump(*domains: str) -> None:
+    """Invalidate cached responses that read any of domains (here and, via hooks, in other processes)."""
+    bump_local(*domains)
+    for hook in _bump_hooks:
+        hook(domains)
+
+
+def bump_local(*domains: str) -> None:
+    """Invalidate in this process only (applying a bump published by another process)."""
+    for d in domains:
+        _generations[d] = _generations.get(d, 0) + 1
+
+
+def on_bump(hook: Callable[[tuple[str, ...]], None]) -> None:
+    if hook not in _bump_hooks:
+        _bump_hooks.append(hook)
+
+
+def off_bump(hook: Callable[[tuple[str, ...]], None]) -> None:
+    if hook in _bump_hooks:
+        _bump_hooks.remove(hook)
+
+
+def generation(domain: str) -> int:
+    return _generations.get(domain, 0)
+
+
+class ResponseCache:
+    """Size-bounded LRU of (etag, body) with per-entry expiry."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[tuple, tuple[float, str, bytes]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: tuple) -> tuple[str, bytes] | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1], entry[2]
+
+    def set(self, key: tuple, etag: str, body: bytes) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, etag, body)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+response_cache = ResponseCache(settings.response_cache_max_entries, settings.response_cache_ttl_seconds)
+
+
+def _normalise(params: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in params.items() if v is not None))
+
+
+def _singleflight_enabled(endpoint: str) -> bool:
+    return endpoint in {e.strip() for e in settings.singleflight_endpoints.split(",")}
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {t.strip().removeprefix("W/") for t in header.split(",")}
+    return etag in tags or "*" in tags
+
+
+def conditional_response(request: Request, etag: str, body: bytes) -> Response:
+    """JSON body with its ETag, or 304 when If-None-Match already has it."""
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def respond(
+    request: Request,
+    endpoint: str,
+    params: dict,
+    domains: Iterable[str],
+    producer: Callable[[], Awaitable[Any]],
+) -> Response:
+    """
+    Serve endpoint's JSON from cache or producer(). params must already be normalised
+    (defaults resolved, e.g. concrete dates) so equivalent requests share a key.
+    """
+    key = (endpoint, _normalise(params), tuple((d, generation(d)) for d in sorted(domains)))
+    if settings.response_cache_enabled:
+        cached = response_cache.get(key)
+        if cached is not None:
+            etag, body = cached
+            return conditional_response(request, etag, body)
+
+    async def produce() -> tuple[str, bytes]:
+        with database.primary_reads():
+            body = dumps(await producer())
+        return _etag(body), body
+
+    if _singleflight_enabled(endpoint):
+        etag, body = await singleflight.do(endpoint, key, produce)
+    else:
+        etag, body = await produce()
+    if settings.response_cache_enabled:
+        response_cache.set(key, etag, body)
+    return conditional_response(request, etag, body)
@@ -6,15 +6,45 @@ class Settings(BaseSettings):
 
     # 数据库
     database_url: str = "postgresql+asyncpg://cursor:cursor@db:5432/cursor_admin"
+    # 连接池（主库）：statement_timeout_ms=0 不限制（迁移与分区转换也走主库）；
+    # statement_cache_size=0 关闭预编译语句缓存（pgbouncer 事务池模式需要）
+    db_pool_min_size: int = 2
+    db_pool_max_size: int = 10
+    db_statement_timeout_ms: int = 0
+    db_statement_cache_size: int = 100
+    # 只读副本（可选，逗号分隔的 DSN）：GET 查询接口走复制延迟不超过 replica_max_lag_seconds 的副本（多个时轮询），
+    # 副本不可达或延迟超限时回落主库；每个副本至多每 replica_check_seconds 探测一次延迟
+    database_read_urls: str = ""
+    replica_max_lag_seconds: float = 10.0
+    replica_check_seconds: float = 5.0
+    replica_connect_timeout_seconds: float = 2.0
+    # 只读池（每个副本一个）
+    read_pool_min_size: int = 1
+    read_pool_max_size: int = 10
+    read_statement_timeout_ms: int = 30000
+    read_statement_cache_size: int = 100
+    # 请求耗时分解（查询次数、DB 时间、取连接等待、序列化），按接口汇总到 /api/admin/metrics；
+    # 超过 slow_request_ms 的请求记录日志并列出耗时最多的 slow_request_top_sql 条 SQL 指纹
+    request_timing_enabled: bool = True
+    slow_request_ms: float = 1000.0
+    slow_request_top_sql: int = 5
+    # 采样分析（POST /api/admin/profile）：默认关闭；同一时间只运行一次，时长不超过 profiler_max_seconds
+    profiler_enabled: bool = False
+    profiler_max_seconds: float = 60.0
 
     # Cursor Admin API（需 Team/Enterprise 管理员在 dashboard 创建的 Admin API Key）
     cursor_api_token: str = ""
     cursor_api_url: str = "https://api.cursor.com"
+    # 共享 HTTP 客户端的最大连接数（同步任务复用 keep-alive 连接）
+    cursor_api_max_connections: int = 10
 
     def get_cursor_token(self) -> str:
         """返回去除首尾空白与 CRLF 的 token，避免 .env 导致 401。"""
         return (self.cursor_api_token or "").strip().replace("\r", "").replace("\n", "")
 
+    # 报表时区：按日期筛选的接口以该时区的自然日为边界（[start 00:00, end+1 00:00)）
+    report_timezone: str = "Asia/Shanghai"
+
     # 同步间隔（分钟）
     sync_interval_minutes: int = 60
 
@@ -51,5 +81,65 @@ class Settings(BaseSettings):
     git_repos_root: str = "/data/git-repos"
     git_collect_days: int = 3
 
+    # 后台任务（jobs 表 + 进程内 worker 池）
+    job_poll_seconds: int = 5  # 无唤醒时轮询 queued 任务的间隔
+    job_stale_seconds: int = 300  # running 任务心跳超时即判定 worker 丢失，标记失败
+    job_concurrency_git_collect: int = 1
+    job_concurrency_contribution: int = 2
+
+    # 运行模式：all = HTTP + 定时任务 + 后台任务（单进程）；api = 仅 HTTP；worker = 仅定时任务与后台任务（python worker.py）
+    run_mode: str = "all"
+    # 进程间通知（Postgres LISTEN/NOTIFY）：缓存失效与后台任务唤醒跨进程传播
+    pubsub_enabled: bool = True
+    pubsub_reconnect_seconds: int = 5  # LISTEN 连接断开后的重连检查间隔
+
+    # /ready 探测数据库的超时（秒），超时即返回 503
+    ready_timeout_seconds: float = 2.0
+
+    # 多 worker/多副本部署：定时任务仅由持有 Postgres advisory lock 的 leader 执行，leader 退出或断连后由其他进程接管
+    leader_election_enabled: bool = True
+    leader_check_seconds: int = 10  # follower 抢锁 / leader 自检的间隔（接管延迟上限）
+
+    # 历史区间重算：并行计算的周期数上限（每个周期同时占用 1 个连接，需小于连接池上限）
+    recalc_max_parallel: int = 4
+
+    # 列表接口总数：规划器估算行数低于该值时才执行精确 COUNT(*)，否则返回估算值
+    exact_count_threshold: int = 10000
+
+    # 聚合接口响应缓存（键 = 接口 + 规范化参数 + 数据域代次；写入方递增代次即失效，TTL 兜底）
+    response_cache_enabled: bool = True
+    response_cache_ttl_seconds: int = 300
+    response_cache_max_entries: int = 512
+    # 汇总接口读取按日物化视图（同步后刷新；关闭则全部实时查询）
+    summary_views_enabled: bool = True
+    # 单飞合并：列出的接口（逗号分隔）并发的相同请求共享一次查询；与响应缓存独立
+    singleflight_endpoints: str = "leaderboard,project_summary"
+    # Hook 上报按 workspace 归属项目：规则前缀树缓存的最长有效期（本进程内项目变更即时重建）
+    workspace_resolver_ttl_seconds: int = 60
+    # Hook 会话写入缓冲：攒批后 COPY 到临时表再合并写入；队列满时上报接口返回 429（Hook 保留后重试）
+    session_buffer_enabled: bool = True
+    session_buffer_max_rows: int = 10000  # 队列上限（内存中未落库的会话数）
+    session_buffer_flush_rows: int = 500  # 攒够即刷出，也是单次 COPY 的最大行数
+    session_buffer_flush_seconds: float = 1.0  # 未攒够时的最长等待
+    session_batch_max_items: int = 1000  # /api/sessions/batch 单次最多条数
+
+    # 原始数据导出（服务端游标流式输出；每个导出占用 1 个连接直至结束）
+    export_fetch_size: int = 2000  # 游标每次预取行数
+    export_chunk_bytes: int = 256 * 1024  # 累积到该大小后向客户端刷出一块
+    export_max_concurrent: int = 2  # 同时进行的导出上限，超出返回 429
+
+    # Parquet 快照（按表/月分区写入本地目录，供 BI/DuckDB 读取；需安装 pyarrow）
+    parquet_export_enabled: bool = False
+    parquet_export_dir: str = "/data/parquet"
+    parquet_export_hour: int = 2  # 每日定时导出（Asia/Shanghai）
+    parquet_export_grace_days: int = 3  # 月份结束后再重写的天数，之后视为已关闭不再导出
+    parquet_compression: str = "zstd"
+
+    # 按月分区（agent_sessions / ai_code_commits，转换见 partitions.py convert）与保留期
+    partition_premake_months: int = 3  # 提前创建未来几个月的分区
+    agent_sessions_retention_months: int = 0  # 0 = 永久保留；超出的月份按日汇总后分离/删除
+    ai_code_commits_retention_months: int = 0
+    partition_retention_mode: str = "detach"  # detach（保留为独立表）| drop
+
 
 settings = Settings()
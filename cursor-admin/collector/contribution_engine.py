@@ -6,11 +6,16 @@ Data source: ai_code_commits (tab_lines_added + composer_lines_added = ai_lines)
 No Hook, no agent_sessions, no git_contributions dependency.
 """
 
+import asyncio
 import calendar
 import json
 import logging
+import time
+from collections.abc import Awaitable, Callable
 from datetime import date, timedelta
 
+import cache
+from config import settings
 from database import get_pool
 
 log = logging.getLogger("contribution_engine")
@@ -46,6 +51,80 @@ def period_key_to_date_range(period_type: str, period_key: str) -> tuple[date, d
     return None
 
 
+def _period_key_for(period_type: str, d: date) -> str | None:
+    """Return the period_key containing date d."""
+    if period_type == "daily":
+        return d.isoformat()
+    if period_type == "weekly":
+        y, w, _ = d.isocalendar()
+        return f"{y}-W{w:02d}"
+    if period_type == "monthly":
+        return d.strftime("%Y-%m")
+    return None
+
+
+def enumerate_period_keys(period_type: str, start: date, end: date) -> list[str]:
+    """All period keys of period_type overlapping [start, end], in chronological order."""
+    keys: list[str] = []
+    d = start
+    while d <= end:
+        key = _period_key_for(period_type, d)
+        if key is None:
+            return []
+        keys.append(key)
+        _, period_end = period_key_to_date_range(period_type, key)
+        d = period_end + timedelta(days=1)
+    return keys
+
+
+async def _aggregate_ai_commits_daily(
+    pool, start_d: date, end_d: date
+) -> dict[date, dict[tuple[str, int | None], dict]]:
+    """
+    Daily rollup of ai_code_commits by (user_email, project_id) for [start_d, end_d], in one scan.
+    Periods are summed from these rows so a range rebuild does not re-scan commits per period.
+    commit_count sums exactly: (commit_hash, user_email) is unique and each commit has one day.
+    """
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(
+            """
+            SELECT commit_ts::date AS day, user_email, project_id,
+                   COALESCE(SUM(tab_lines_added + composer_lines_added), 0)::int AS ai_lines_added,
+                   COALESCE(SUM(total_lines_added), 0)::int AS total_lines_added,
+                   COUNT(DISTINCT commit_hash)::int AS commit_count
+            FROM ai_code_commits
+            WHERE commit_ts >= $1 AND commit_ts < ($2::date + INTERVAL '1 day')
+            GROUP BY 1, user_email, project_id
+            """,
+            start_d,
+            end_d,
+        )
+    out: dict[date, dict[tuple[str, int | None], dict]] = {}
+    for r in rows:
+        out.setdefault(r["day"], {})[(r["user_email"], r["project_id"])] = {
+            "ai_lines_added": r["ai_lines_added"],
+            "total_lines_added": r["total_lines_added"],
+            "commit_count": r["commit_count"],
+        }
+    return out
+
+
+def _sum_daily(
+    daily: dict[date, dict[tuple[str, int | None], dict]], start_d: date, end_d: date
+) -> dict[tuple[str, int | None], dict]:
+    """Sum daily rollup rows within [start_d, end_d] into the per-period aggregate shape."""
+    out: dict[tuple[str, int | None], dict] = {}
+    d = start_d
+    while d <= end_d:
+        for key, vals in daily.get(d, {}).items():
+            acc = out.setdefault(key, {"ai_lines_added": 0, "total_lines_added": 0, "commit_count": 0})
+            acc["ai_lines_added"] += vals["ai_lines_added"]
+            acc["total_lines_added"] += vals["total_lines_added"]
+            acc["commit_count"] += vals["commit_count"]
+        d += timedelta(days=1)
+    return out
+
+
 async def _aggregate_ai_commits(
     pool, period_type: str, period_key: str
 ) -> dict[tuple[str, int | None], dict]:
@@ -82,8 +161,15 @@ async def _aggregate_ai_commits(
     return out
 
 
-async def calculate_period(period_type: str, period_key: str, rule_id: int = 1) -> None:
+async def calculate_period(
+    period_type: str,
+    period_key: str,
+    rule_id: int = 1,
+    data: dict[tuple[str, int | None], dict] | None = None,
+) -> int:
     """
+    Returns the number of users scored. Pass data (pre-aggregated, e.g. from the daily rollup)
+    to skip step 1.
     1. Aggregate ai_code_commits for period.
     2. For each project: compute contribution_pct = member_ai / project_total_ai.
     3. incentive_amount = project.incentive_pool * contribution_pct * delivery_factor (default 1.0).
@@ -93,10 +179,11 @@ async def calculate_period(period_type: str, period_key: str, rule_id: int = 1)
     7. Save leaderboard_snapshot.
     """
     pool = await get_pool()
-    data = await _aggregate_ai_commits(pool, period_type, period_key)
+    if data is None:
+        data = await _aggregate_ai_commits(pool, period_type, period_key)
     if not data:
         log.info("No ai_code_commits data for %s %s", period_type, period_key)
-        return
+        return 0
 
     # Load projects for incentive_pool and delivery_factor
     async with pool.acquire() as conn:
@@ -227,11 +314,20 @@ async def calculate_period(period_type: str, period_key: str, rule_id: int = 1)
             period_type, period_key,
             json.dumps({"entries": snapshot_entries}),
         )
+    cache.bump(cache.CONTRIBUTIONS)
     log.info("Calculated %s %s: %d users", period_type, period_key, len(user_agg))
+    return len(user_agg)
 
 
-async def run_calculate_latest(period_type: str, rule_id: int = 1) -> None:
-    """Compute both the latest completed period and the current in-progress period."""
+async def run_calculate_latest(
+    period_type: str,
+    rule_id: int = 1,
+    progress: Callable[[int, int | None, str | None], Awaitable[None]] | None = None,
+) -> None:
+    """
+    Compute both the latest completed period and the current in-progress period.
+    progress(done, total, message) is awaited after each period (used by the job runner).
+    """
     today = date.today()
     keys: list[str] = []
     if period_type == "daily":
@@ -248,5 +344,65 @@ async def run_calculate_latest(period_type: str, rule_id: int = 1) -> None:
     else:
         log.warning("Unknown period_type %s", period_type)
         return
-    for period_key in keys:
+    for done, period_key in enumerate(keys, start=1):
         await calculate_period(period_type, period_key, rule_id)
+        if progress:
+            await progress(done, len(keys), period_key)
+
+
+async def run_recalculate_range(
+    start: date,
+    end: date,
+    period_types: list[str],
+    rule_id: int = 1,
+    progress: Callable[[int, int | None, str | None], Awaitable[None]] | None = None,
+) -> dict:
+    """
+    Rebuild contribution_scores for every period of each period_type overlapping [start, end]
+    (e.g. a year of weekly + monthly after a formula change).
+    ai_code_commits is scanned once into a daily rollup covering all periods; periods are then
+    computed in parallel, at most settings.recalc_max_parallel at a time (each holds one connection).
+    Returns per-period timings.
+    """
+    targets: list[tuple[str, str, date, date]] = []
+    for period_type in period_types:
+        for key in enumerate_period_keys(period_type, start, end):
+            p_start, p_end = period_key_to_date_range(period_type, key)
+            targets.append((period_type, key, p_start, p_end))
+    if not targets:
+        return {"periods": [], "rollup_seconds": 0.0, "total_seconds": 0.0}
+
+    t0 = time.perf_counter()
+    pool = await get_pool()
+    daily = await _aggregate_ai_commits_daily(
+        pool, min(t[2] for t in targets), max(t[3] for t in targets)
+    )
+    rollup_seconds = round(time.perf_counter() - t0, 3)
+
+    sem = asyncio.Semaphore(max(1, settings.recalc_max_parallel))
+    done = 0
+    timings: list[dict] = []
+
+    async def _one(period_type: str, key: str, p_start: date, p_end: date) -> None:
+        nonlocal done
+        async with sem:
+            t = time.perf_counter()
+            users = await calculate_period(period_type, key, rule_id, data=_sum_daily(daily, p_start, p_end))
+            timings.append({
+                "period_type": period_type,
+                "period_key": key,
+                "users": users,
+                "seconds": round(time.perf_counter() - t, 3),
+            })
+        done += 1
+        if progress:
+            await progress(done, len(targets), f"{period_type} {key}")
+
+    await asyncio.gather(*(_one(*t) for t in targets))
+    timings.sort(key=lambda x: (x["period_type"], x["period_key"]))
+    total_seconds = round(time.perf_counter() - t0, 3)
+    log.info(
+        "Recalculated %d periods (%s) %s..%s in %.1fs",
+        len(targets), ",".join(period_types), start, end, total_seconds,
+    )
+    return {"periods": timings, "rollup_seconds": rollup_seconds, "total_seconds": total_seconds}
@@ -3,6 +3,7 @@ Cursor Admin API 客户端（官方 Basic Auth：key 为 username，密码为空
 All Cursor API calls must go through this module (single exit point).
 """
 
+import asyncio
 import logging
 import time
 from datetime import date
@@ -12,9 +13,13 @@ from config import settings
 
 log = logging.getLogger("cursor_api")
 
-# 429 retry: max attempts and base delay in seconds
-AI_CODE_RATE_LIMIT_MAX_RETRIES = 5
-AI_CODE_RATE_LIMIT_BASE_DELAY = 1.0
+# 429 retry: max attempts and base delay in seconds (doubled per attempt unless Retry-After is sent)
+RATE_LIMIT_MAX_RETRIES = 5
+RATE_LIMIT_BASE_DELAY = 1.0
+RATE_LIMIT_MAX_DELAY = 60.0
+
+_client: httpx.AsyncClient | None = None
+_client_loop = None
 
 
 def _auth():
@@ -24,15 +29,52 @@ def _auth():
     return httpx.BasicAuth(token, "")
 
 
+def get_client() -> httpx.AsyncClient:
+    """Shared client, so syncs reuse keep-alive connections; one per event loop."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            timeout=30,
+            limits=httpx.Limits(max_connections=settings.cursor_api_max_connections),
+        )
+        _client_loop = loop
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.aclose()
+
+
+def _retry_delay(r: httpx.Response, attempt: int) -> float:
+    try:
+        delay = float(r.headers["Retry-After"])
+    except (KeyError, ValueError):
+        delay = RATE_LIMIT_BASE_DELAY * (2 ** (attempt - 1))
+    return min(max(delay, 0.0), RATE_LIMIT_MAX_DELAY)
+
+
 async def _request(method: str, url: str, **kwargs) -> httpx.Response:
+    """Authenticated request; 429 responses are retried (without blocking the event loop)."""
     auth = _auth()
     if not auth:
         raise ValueError("CURSOR_API_TOKEN 未配置")
-    async with httpx.AsyncClient(timeout=30) as client:
+    client = get_client()
+    attempt = 0
+    while True:
         r = await client.request(method, url, auth=auth, **kwargs)
-        if r.status_code == 401:
-            log.warning("Cursor API 401: url=%s body=%s", url, r.text[:500] if r.text else "")
-        return r
+        if r.status_code != 429 or attempt >= RATE_LIMIT_MAX_RETRIES:
+            break
+        attempt += 1
+        delay = _retry_delay(r, attempt)
+        log.warning("Cursor API 429 %s, retry %d/%d in %.1fs", url, attempt, RATE_LIMIT_MAX_RETRIES, delay)
+        await asyncio.sleep(delay)
+    if r.status_code == 401:
+        log.warning("Cursor API 401: url=%s body=%s", url, r.text[:500] if r.text else "")
+    return r
 
 
 async def get_members() -> list[dict]:
@@ -99,9 +141,6 @@ async def get_ai_code_commits(
     Returns: {"commits": [...], "pagination": {"page", "pageSize", "totalCount"}}.
     Supports If-None-Match (ETag) and 429 exponential backoff.
     """
-    auth = _auth()
-    if not auth:
-        raise ValueError("CURSOR_API_TOKEN not configured")
     params: dict = {
         "startDate": start_date,
         "endDate": end_date,
@@ -110,23 +149,14 @@ async def get_ai_code_commits(
     }
     if user:
         params["user"] = user
-    url = f"{settings.cursor_api_url}/analytics/ai-code/commits"
-    headers: dict = {}
-    if etag:
-        headers["If-None-Match"] = etag
-    attempt = 0
-    while True:
-        async with httpx.AsyncClient(timeout=60) as client:
-            r = await client.get(url, auth=auth, params=params, headers=headers or None)
-        if r.status_code == 304:
-            return {"commits": [], "pagination": {"page": page, "pageSize": page_size, "totalCount": 0}, "cached": True}
-        if r.status_code == 429:
-            attempt += 1
-            if attempt > AI_CODE_RATE_LIMIT_MAX_RETRIES:
-                r.raise_for_status()
-            delay = AI_CODE_RATE_LIMIT_BASE_DELAY * (2 ** (attempt - 1))
-            log.warning("AI Code API 429, retry %d/%d in %.1fs", attempt, AI_CODE_RATE_LIMIT_MAX_RETRIES, delay)
-            time.sleep(delay)
-            continue
-        r.raise_for_status()
-        return r.json()
+    r = await _request(
+        "GET",
+        f"{settings.cursor_api_url}/analytics/ai-code/commits",
+        params=params,
+        headers={"If-None-Match": etag} if etag else None,
+        timeout=60,
+    )
+    if r.status_code == 304:
+        return {"commits": [], "pagination": {"page": page, "pageSize": page_size, "totalCount": 0}, "cached": True}
+    r.raise_for_status()
+    return r.json()
@@ -1,37 +1,274 @@
+import asyncio
+import contextlib
+import contextvars
+import hashlib
+import logging
+import time
+
 import asyncpg
 from config import settings
+from request_timing import TimedConnection, TimedPool
+
+log = logging.getLogger("database")
+
+_pool: TimedPool | None = None
+
+
+def _asyncpg_dsn(url: str) -> str:
+    return url.strip().replace("postgresql+asyncpg://", "postgresql://")
+
 
-_pool: asyncpg.Pool | None = None
+def dsn() -> str:
+    return _asyncpg_dsn(settings.database_url)
 
 
-async def get_pool() -> asyncpg.Pool:
+def _pool_kwargs(min_size: int, max_size: int, statement_timeout_ms: int, statement_cache_size: int) -> dict:
+    kwargs = {
+        "min_size": min_size,
+        "max_size": max_size,
+        "statement_cache_size": statement_cache_size,
+        "connection_class": TimedConnection,
+    }
+    if statement_timeout_ms > 0:
+        kwargs["server_settings"] = {"statement_timeout": str(statement_timeout_ms)}
+    return kwargs
+
+
+async def get_pool() -> TimedPool:
+    """Primary pool: all writes, and reads that must see them."""
     global _pool
     if _pool is None:
-        dsn = settings.database_url.replace("postgresql+asyncpg://", "postgresql://")
-        _pool = await asyncpg.create_pool(dsn, min_size=2, max_size=10)
+        _pool = TimedPool(
+            await asyncpg.create_pool(
+                dsn(),
+                **_pool_kwargs(
+                    settings.db_pool_min_size,
+                    settings.db_pool_max_size,
+                    settings.db_statement_timeout_ms,
+                    settings.db_statement_cache_size,
+                ),
+            )
+        )
     return _pool
 
 
+# ─── 只读副本 ───
+
+_PRIMARY_LSN_SQL = "SELECT pg_current_wal_lsn()::text"
+
+# Seconds the replica is behind: 0 on a primary or when it has replayed the primary's current
+# WAL position ($1, read just before), else the age of the last replayed transaction. Comparing
+# with the primary, not with what the replica itself received, keeps a replica whose WAL
+# receiver has disconnected from looking fresh (an idle primary writes no transactions, so the
+# last replay timestamp alone would grow forever).
+_REPLICA_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_replay_lsn() >= $1::text::pg_lsn THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM NOW() - pg_last_xact_replay_timestamp())::float8, 'Infinity'::float8)
+END::float8
+"""
+
+# Set while cache.respond produces a body: a replica may not have replayed the write whose
+# cache.bump() started the new generation yet, and its rows would stay cached under it
+_primary_reads: contextvars.ContextVar[bool] = contextvars.ContextVar("primary_reads", default=False)
+
+
+@contextlib.contextmanager
+def primary_reads():
+    """get_read_pool() returns the primary pool inside this block."""
+    token = _primary_reads.set(True)
+    try:
+        yield
+    finally:
+        _primary_reads.reset(token)
+
+
+class _Replica:
+    def __init__(self, url: str):
+        self.dsn = _asyncpg_dsn(url)
+        self.pool: TimedPool | None = None
+        self.lag: float | None = None  # at the last probe; None = not probed yet or unreachable
+        self.error: str | None = None
+        self.checked_at = float("-inf")
+        self.probing = False
+        self.task: asyncio.Task | None = None
+        self.routed = 0
+
+    def usable(self) -> bool:
+        return self.pool is not None and self.lag is not None and self.lag <= settings.replica_max_lag_seconds
+
+    async def probe(self) -> None:
+        self.probing = True
+        try:
+            if self.pool is None:
+                self.pool = TimedPool(
+                    await asyncpg.create_pool(
+                        self.dsn,
+                        timeout=settings.replica_connect_timeout_seconds,
+                        **_pool_kwargs(
+                            settings.read_pool_min_size,
+                            settings.read_pool_max_size,
+                            settings.read_statement_timeout_ms,
+                            settings.read_statement_cache_size,
+                        ),
+                    )
+                )
+            timeout = settings.replica_connect_timeout_seconds
+            async with (await get_pool()).acquire(timeout=timeout) as conn:
+                primary_lsn = await conn.fetchval(_PRIMARY_LSN_SQL, timeout=timeout)
+            async with self.pool.acquire(timeout=timeout) as conn:
+                self.lag = await conn.fetchval(_REPLICA_LAG_SQL, primary_lsn, timeout=timeout)
+            self.error = None
+        except Exception as e:
+            if self.error is None:
+                log.warning("Read replica unavailable, reads fall back to the primary: %s", e)
+            self.lag, self.error = None, f"{type(e).__name__}: {e}"
+        finally:
+            self.checked_at = time.monotonic()
+            self.probing = False
+
+
+_replicas: list[_Replica] | None = None
+_next_replica = 0
+_read_stats = {"primary_fallbacks": 0}
+
+
+def _replica_list() -> list[_Replica]:
+    global _replicas
+    if _replicas is None:
+        _replicas = [_Replica(u) for u in settings.database_read_urls.split(",") if u.strip()]
+    return _replicas
+
+
+async def get_read_pool() -> TimedPool:
+    """Pool for read-only queries: a replica no more than replica_max_lag_seconds behind
+    (round-robin), else the primary pool. Inside primary_reads() always the primary pool.
+
+    The first request probes a replica inline; afterwards its lag is re-probed in the
+    background at most every replica_check_seconds and requests use the last known state,
+    so an unreachable replica never delays a read.
+    """
+    global _next_replica
+    replicas = _replica_list()
+    if not replicas or _primary_reads.get():
+        return await get_pool()
+    for i in range(len(replicas)):
+        r = replicas[(_next_replica + i) % len(replicas)]
+        if not r.probing and time.monotonic() - r.checked_at >= settings.replica_check_seconds:
+            if r.checked_at == float("-inf"):
+                await r.probe()
+            else:
+                r.probing = True
+                # empty context: the probe's queries are not charged to this request's timing
+                r.task = contextvars.Context().run(asyncio.get_running_loop().create_task, r.probe())
+        if r.usable():
+            _next_replica = (_next_replica + i + 1) % len(replicas)
+            r.routed += 1
+            return r.pool
+    _read_stats["primary_fallbacks"] += 1
+    return await get_pool()
+
+
+def read_pool_stats() -> dict:
+    return {
+        "replicas": [
+            {"lag_seconds": r.lag, "usable": r.usable(), "routed": r.routed, "error": r.error}
+            for r in _replica_list()
+        ],
+        "max_lag_seconds": settings.replica_max_lag_seconds,
+        **_read_stats,
+    }
+
+
+async def connect() -> asyncpg.Connection:
+    """Dedicated connection outside the pool (held for the life of a session-level lock)."""
+    return await asyncpg.connect(dsn())
+
+
 async def close_pool():
-    global _pool
+    global _pool, _replicas
     if _pool:
         await _pool.close()
         _pool = None
+    for r in _replicas or []:
+        if r.task is not None and not r.task.done():
+            r.task.cancel()
+        if r.pool is not None:
+            await r.pool.close()
+    _replicas = None
 
 
-async def init_db():
-    """运行迁移脚本（幂等）"""
+def migrations_dir() -> str:
     import os
 
-    pool = await get_pool()
-    migrations_dir = os.path.join(os.path.dirname(__file__), "..", "..", "db", "migrations")
-    if not os.path.exists(migrations_dir):
+    path = os.path.join(os.path.dirname(__file__), "..", "db", "migrations")
+    if not os.path.exists(path):
         # Docker 内路径
-        migrations_dir = "/db/migrations"
-    for fname in sorted(os.listdir(migrations_dir)):
-        if fname.endswith(".sql"):
-            fpath = os.path.join(migrations_dir, fname)
-            with open(fpath, "r", encoding="utf-8") as f:
+        path = "/db/migrations"
+    return path
+
+
+_MIGRATION_LOCK = "cursor-admin:migrations"
+
+_SCHEMA_MIGRATIONS_DDL = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version     TEXT        PRIMARY KEY,
+    checksum    TEXT        NOT NULL,
+    applied_at  TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    duration_ms INT
+)
+"""
+
+
+async def apply_migrations(conn, reapply: bool = False) -> list[str]:
+    """按文件名顺序执行 schema_migrations 中未记录（或内容已变更）的迁移脚本，返回本次执行的文件名。
+
+    - 多进程同时启动时由 advisory lock 串行，后到者只会看到已记录的版本
+    - 每个脚本在独立事务中执行并记录版本与校验和；脚本均幂等，已有库首次升级时全部重跑一遍即完成登记
+    - reapply=True 全部重新执行（分区转换后重建父表索引与汇总视图）
+    """
+    import os
+
+    path = migrations_dir()
+    await conn.execute("SELECT pg_advisory_lock(hashtext($1))", _MIGRATION_LOCK)
+    try:
+        await conn.execute(_SCHEMA_MIGRATIONS_DDL)
+        applied = {r["version"]: r["checksum"] for r in await conn.fetch("SELECT version, checksum FROM schema_migrations")}
+        ran = []
+        for fname in sorted(os.listdir(path)):
+            if not fname.endswith(".sql"):
+                continue
+            with open(os.path.join(path, fname), "r", encoding="utf-8") as f:
                 sql = f.read()
-            async with pool.acquire() as conn:
+            checksum = hashlib.sha256(sql.encode("utf-8")).hexdigest()
+            if not reapply and applied.get(fname) == checksum:
+                continue
+            if fname in applied and applied[fname] != checksum:
+                log.info("Migration %s changed since it was applied, re-running", fname)
+            t0 = time.monotonic()
+            async with conn.transaction():
                 await conn.execute(sql)
+                await conn.execute(
+                    """
+                    INSERT INTO schema_migrations (version, checksum, duration_ms) VALUES ($1, $2, $3)
+                    ON CONFLICT (version) DO UPDATE SET
+                        checksum = EXCLUDED.checksum, applied_at = NOW(), duration_ms = EXCLUDED.duration_ms
+                    """,
+                    fname,
+                    checksum,
+                    int((time.monotonic() - t0) * 1000),
+                )
+            ran.append(fname)
+        if ran:
+            log.info("Applied migrations: %s", ", ".join(ran))
+        return ran
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock(hashtext($1))", _MIGRATION_LOCK)
+
+
+async def init_db() -> list[str]:
+    """执行尚未应用的迁移脚本，返回本次执行的文件名"""
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        return await apply_migrations(conn)
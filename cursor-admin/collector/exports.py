@@ -0,0 +1,205 @@
+"""
+Streaming raw-table exports (NDJSON / CSV, optionally gzip).
+
+- Each export runs one read-only REPEATABLE READ transaction and iterates a server-side
+  cursor (prefetch settings.export_fetch_size rows), so memory stays flat however many rows
+  match and the dump is a consistent snapshot.
+- Rows are encoded as they arrive and flushed in ~settings.export_chunk_bytes chunks; gzip
+  uses a streaming compressor, never the whole body.
+- Each export holds one read-pool connection (a replica when configured) for its duration;
+  settings.export_max_concurrent caps how many may run at once.
+"""
+
+import asyncio
+import csv
+import io
+import zlib
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from datetime import date, datetime
+
+import asyncpg
+import orjson
+
+from config import settings
+from contribution_engine import enumerate_period_keys
+from database import get_read_pool
+from serialization import dumps
+from timerange import day_bounds
+
+PERIOD_TYPES = ("daily", "weekly", "monthly")
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+@dataclass(frozen=True)
+class ExportSpec:
+    sql: str  # $1/$2 = range bounds (see args())
+    bounds: str  # "timestamptz" | "date" | "period"
+
+
+EXPORTS: dict[str, ExportSpec] = {
+    "agent_sessions": ExportSpec(
+        """
+        SELECT id, conversation_id, user_email, machine_id, workspace_roots, primary_workspace,
+               project_id, started_at, ended_at, duration_seconds, created_at
+        FROM agent_sessions
+        WHERE ended_at >= $1 AND ended_at < $2
+        ORDER BY ended_at, id
+        """,
+        "timestamptz",
+    ),
+    "daily_usage": ExportSpec(
+        """
+        SELECT email, day, agent_requests, chat_requests, composer_requests,
+               total_tabs_accepted, total_tabs_shown, total_lines_added, total_lines_deleted,
+               accepted_lines_added, subscription_reqs, usage_based_reqs,
+               most_used_model, client_version, is_active, synced_at
+        FROM daily_usage
+        WHERE day >= $1 AND day <= $2
+        ORDER BY day, email
+        """,
+        "date",
+    ),
+    "ai_code_commits": ExportSpec(
+        """
+        SELECT id, commit_hash, user_id, user_email, repo_name, branch_name, project_id,
+               total_lines_added, total_lines_deleted, tab_lines_added, tab_lines_deleted,
+               composer_lines_added, composer_lines_deleted, non_ai_lines_added,
+               non_ai_lines_deleted, commit_message, commit_ts, synced_at
+        FROM ai_code_commits
+        WHERE commit_ts >= $1 AND commit_ts < $2
+        ORDER BY commit_ts, id
+        """,
+        "timestamptz",
+    ),
+    "contribution_scores": ExportSpec(
+        """
+        SELECT id, user_email, project_id, period_type, period_key, rule_id,
+               ai_lines_added, total_lines_added, commit_count, ai_ratio, contribution_pct,
+               delivery_factor, incentive_amount, total_score, rank,
+               lines_added, lines_removed, files_changed, session_duration_hours,
+               agent_requests, score_breakdown, hook_adopted, created_at
+        FROM contribution_scores
+        WHERE (period_type = 'daily' AND period_key = ANY($1::text[]))
+           OR (period_type = 'weekly' AND period_key = ANY($2::text[]))
+           OR (period_type = 'monthly' AND period_key = ANY($3::text[]))
+        ORDER BY period_type, period_key, project_id, user_email
+        """,
+        "period",
+    ),
+}
+
+_slots: asyncio.Semaphore | None = None
+
+
+def slots() -> asyncio.Semaphore:
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(settings.export_max_concurrent)
+    return _slots
+
+
+async def try_acquire_slot() -> bool:
+    """Take an export slot without waiting; False when all are in use. Release with slots().release()."""
+    s = slots()
+    if s.locked():
+        return False
+    await s.acquire()  # a free slot is taken without suspending, so no other request can race in
+    return True
+
+
+def args(spec: ExportSpec, start_date: date, end_date: date) -> list:
+    """Query parameters for [start_date, end_date] (contribution periods: every period overlapping it)."""
+    if spec.bounds == "timestamptz":
+        return list(day_bounds(start_date, end_date))
+    if spec.bounds == "date":
+        return [start_date, end_date]
+    return [enumerate_period_keys(t, start_date, end_date) for t in PERIOD_TYPES]
+
+
+def _csv_value(v):
+    if v is None:
+        return ""
+    if isinstance(v, (datetime, date)):
+        return v.isoformat()
+    if isinstance(v, (list, dict)):
+        return dumps(v).decode()
+    return v
+
+
+class _Encoder:
+    """Encodes records in fmt and (optionally) gzips the stream incrementally."""
+
+    def __init__(self, fmt: str, columns: list[str], json_columns: set[str], gzip: bool):
+        self.fmt = fmt
+        self.columns = columns
+        self.json_columns = json_columns
+        self._buf = io.StringIO()
+        self._csv = csv.writer(self._buf, lineterminator="\n") if fmt == "csv" else None
+        self._chunks: list[bytes] = []
+        self._size = 0
+        self._gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None
+
+    def header(self) -> None:
+        if self._csv:
+            self._csv.writerow(self.columns)
+            self._take_csv()
+
+    def add(self, record: asyncpg.Record) -> None:
+        if self._csv:
+            self._csv.writerow([_csv_value(v) for v in record.values()])
+            self._take_csv()
+            return
+        row = dict(record)
+        for c in self.json_columns:
+            if row[c] is not None:
+                row[c] = orjson.Fragment(row[c])  # jsonb arrives as text; embed as-is
+        self._push(dumps(row) + b"\n")
+
+    def _take_csv(self) -> None:
+        self._push(self._buf.getvalue().encode())
+        self._buf.seek(0)
+        self._buf.truncate()
+
+    def _push(self, data: bytes) -> None:
+        if self._gzip:
+            data = self._gzip.compress(data)
+        if data:
+            self._chunks.append(data)
+            self._size += len(data)
+
+    @property
+    def full(self) -> bool:
+        return self._size >= settings.export_chunk_bytes
+
+    def drain(self, final: bool = False) -> bytes:
+        if final and self._gzip:
+            self._chunks.append(self._gzip.flush())
+        out = b"".join(self._chunks)
+        self._chunks.clear()
+        self._size = 0
+        return out
+
+
+async def stream(table: str, start_date: date, end_date: date, fmt: str, gzip: bool) -> AsyncIterator[bytes]:
+    """Yield the export body chunk by chunk. Caller must hold a slot() for the duration."""
+    spec = EXPORTS[table]
+    pool = await get_read_pool()
+    async with pool.acquire() as conn:
+        async with conn.transaction(isolation="repeatable_read", readonly=True):
+            stmt = await conn.prepare(spec.sql)
+            attrs = stmt.get_attributes()
+            enc = _Encoder(
+                fmt,
+                [a.name for a in attrs],
+                {a.name for a in attrs if a.type.name in ("json", "jsonb")},
+                gzip,
+            )
+            enc.header()
+            async for record in stmt.cursor(*args(spec, start_date, end_date), prefetch=settings.export_fetch_size):
+                enc.add(record)
+                if enc.full:
+                    yield enc.drain()
+            tail = enc.drain(final=True)
+            if tail:
+                yield tail
@@ -0,0 +1,291 @@
+"""
+Local stand-in for the Cursor Admin API, for exercising and benchmarking sync.py and
+ai_code_sync.py without touching the real API.
+
+Implements the endpoints cursor_api.py calls, with the same request / response shapes:
+
+  GET  /teams/members
+  POST /teams/daily-usage-data         startDate / endDate (epoch ms), page, pageSize
+  POST /teams/spend                    page, pageSize (current billing month)
+  POST /teams/filtered-usage-events    email, startDate / endDate (epoch ms), page, pageSize
+  GET  /analytics/ai-code/commits      startDate / endDate (YYYY-MM-DD), page, pageSize, user
+
+Data comes from seed.World, so it is deterministic for a given --seed, volumes and --end (which
+defaults to today, so the collector's "last N days" windows find data). GET responses carry an
+ETag and answer If-None-Match with 304. Faults can be injected: --latency-ms delays every
+request, --rate-limit-every N answers every Nth request with 429 and Retry-After. Requests
+need Basic auth (any key), like the real API. GET /_stats returns request counters.
+
+Point the collector at it with CURSOR_API_URL=http://127.0.0.1:8900 and any CURSOR_API_TOKEN.
+Tests and benchmarks/bench_sync.py mount create_app() in-process via httpx.ASGITransport.
+
+Usage: python fake_cursor_api.py [--port 8900] [--seed 42] [--members 200] [--days 30] [--sessions 20000] [--commits 50000] [--latency-ms 0] [--rate-limit-every 0]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import math
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timezone
+
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.responses import Response
+
+import seed
+from partitions import month_start
+from serialization import ORJSONResponse, dumps
+
+
+@dataclass
+class FakeApiConfig:
+    seed: int = 42
+    members: int = 200
+    projects: int = 20
+    sessions: int = 20_000
+    commits: int = 50_000
+    days: int = 30
+    end: date = field(default_factory=date.today)
+    latency_ms: float = 0
+    rate_limit_every: int = 0  # 0 = never
+    retry_after: float = 1.0  # Retry-After seconds sent with injected 429s
+
+
+def _ms(dt: datetime) -> int:
+    return int(dt.timestamp() * 1000)
+
+
+def _local_day(ms) -> date:
+    """Epoch ms -> calendar day, the inverse of cursor_api's time.mktime(day) conversion."""
+    return datetime.fromtimestamp(int(ms) / 1000).date()
+
+
+def _page(rows: list, page: int, page_size: int) -> tuple[list, dict]:
+    page, page_size = max(int(page), 1), max(int(page_size), 1)
+    total_pages = math.ceil(len(rows) / page_size)
+    return rows[(page - 1) * page_size : page * page_size], {
+        "page": page,
+        "pageSize": page_size,
+        "totalCount": len(rows),
+        "totalPages": total_pages,
+        "hasNextPage": page < total_pages,
+        "hasPreviousPage": page > 1,
+    }
+
+
+class FakeData:
+    """API rows generated once from seed.World; pages are rendered on request."""
+
+    def __init__(self, cfg: FakeApiConfig):
+        v = seed.Volumes(cfg.seed, cfg.members, cfg.projects, cfg.sessions, cfg.commits, cfg.days, cfg.end)
+        world = seed.World(v)
+        self.members = [
+            {"id": m.user_id, "email": m.email, "name": m.name, "role": m.role, "isRemoved": m.is_removed}
+            for m in world.members
+        ]
+        self.events: dict[str, list[tuple[int, int]]] = {}  # email -> [(timestamp ms, session #)]
+        for i, r in enumerate(world.session_rows()):
+            self.events.setdefault(r[1], []).append((_ms(r[5]), i))
+        for rows in self.events.values():
+            rows.sort()
+        self.commits = sorted(world.commit_rows(), key=lambda r: r[15])
+        self.commit_ts = [r[15] for r in self.commits]
+        self.usage: dict[date, list[tuple]] = {}
+        for r in world.usage_rows():
+            self.usage.setdefault(r[1], []).append(r)
+        self.cycle_start = month_start(cfg.end)
+        self.spend = [r for r in world.spend_rows() if r[1] == self.cycle_start]
+
+    def usage_between(self, start: date, end: date) -> list[tuple]:
+        return [r for day in sorted(self.usage) if start <= day <= end for r in self.usage[day]]
+
+    def commits_between(self, start: date, end: date, user: str | None) -> list[tuple]:
+        lo = bisect_left(self.commit_ts, datetime.combine(start, time.min, timezone.utc))
+        hi = bisect_right(self.commit_ts, datetime.combine(end, time.max, timezone.utc))
+        rows = self.commits[lo:hi]
+        if user:
+            rows = [r for r in rows if user in (r[1], r[2])]
+        return rows
+
+
+def _usage_json(r: tuple) -> dict:
+    day = datetime.combine(r[1], time.min)
+    return {
+        "date": _ms(day),
+        "day": r[1].isoformat(),
+        "email": r[0],
+        "isActive": r[14],
+        "agentRequests": r[2],
+        "chatRequests": r[3],
+        "composerRequests": r[4],
+        "totalTabsAccepted": r[5],
+        "totalTabsShown": r[6],
+        "totalLinesAdded": r[7],
+        "totalLinesDeleted": r[8],
+        "acceptedLinesAdded": r[9],
+        "subscriptionIncludedReqs": r[10],
+        "usageBasedReqs": r[11],
+        "mostUsedModel": r[12],
+        "clientVersion": r[13],
+    }
+
+
+def _commit_json(r: tuple) -> dict:
+    return {
+        "commitHash": r[0],
+        "userId": r[1],
+        "userEmail": r[2],
+        "repoName": r[3],
+        "branchName": r[4],
+        "isPrimaryBranch": r[4] == "main",
+        "totalLinesAdded": r[6],
+        "totalLinesDeleted": r[7],
+        "tabLinesAdded": r[8],
+        "tabLinesDeleted": r[9],
+        "composerLinesAdded": r[10],
+        "composerLinesDeleted": r[11],
+        "nonAiLinesAdded": r[12],
+        "nonAiLinesDeleted": r[13],
+        "message": r[14],
+        "commitTs": r[15].astimezone(timezone.utc).isoformat().replace("+00:00", "Z"),
+    }
+
+
+def create_app(cfg: FakeApiConfig | None = None) -> FastAPI:
+    cfg = cfg or FakeApiConfig()
+    data = FakeData(cfg)
+    stats = {"requests": 0, "rate_limited": 0, "not_modified": 0}
+
+    async def faults(request: Request) -> None:
+        stats["requests"] += 1
+        if not request.headers.get("authorization", "").startswith("Basic "):
+            raise HTTPException(401, "Basic auth required")
+        if cfg.latency_ms:
+            await asyncio.sleep(cfg.latency_ms / 1000)
+        if cfg.rate_limit_every and stats["requests"] % cfg.rate_limit_every == 0:
+            stats["rate_limited"] += 1
+            raise HTTPException(429, "Too many requests", headers={"Retry-After": f"{cfg.retry_after:g}"})
+
+    def cached(request: Request, payload) -> Response:
+        body = dumps(payload)
+        etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+        if request.headers.get("if-none-match") == etag:
+            stats["not_modified"] += 1
+            return Response(status_code=304, headers={"ETag": etag})
+        return Response(body, media_type="application/json", headers={"ETag": etag})
+
+    app = FastAPI(title="Fake Cursor Admin API")
+    api = Depends(faults)
+
+    @app.get("/_stats")
+    async def get_stats():
+        return stats
+
+    @app.get("/teams/members", dependencies=[api])
+    async def members(request: Request):
+        return cached(request, {"teamMembers": data.members})
+
+    @app.post("/teams/daily-usage-data", dependencies=[api])
+    async def daily_usage(body: dict):
+        start, end = _local_day(body["startDate"]), _local_day(body["endDate"])
+        rows, pagination = _page(data.usage_between(start, end), body.get("page", 1), body.get("pageSize", 500))
+        return ORJSONResponse(
+            {
+                "data": [_usage_json(r) for r in rows],
+                "period": {"startDate": body["startDate"], "endDate": body["endDate"]},
+                "pagination": pagination,
+            }
+        )
+
+    @app.post("/teams/spend", dependencies=[api])
+    async def spend(body: dict):
+        rows, pagination = _page(data.spend, body.get("page", 1), body.get("pageSize", 500))
+        return ORJSONResponse(
+            {
+                "teamMemberSpend": [
+                    {"email": r[0], "spendCents": r[2], "fastPremiumRequests": r[3], "monthlyLimitDollars": r[4]}
+                    for r in rows
+                ],
+                "subscriptionCycleStart": _ms(datetime.combine(data.cycle_start, time.min, timezone.utc)),
+                "totalMembers": pagination["totalCount"],
+                "totalPages": pagination["totalPages"],
+            }
+        )
+
+    @app.post("/teams/filtered-usage-events", dependencies=[api])
+    async def usage_events(body: dict):
+        events = data.events.get(body.get("email") or "", [])
+        start, end = int(body.get("startDate", 0)), int(body.get("endDate", 2**62))
+        in_range = events[bisect_left(events, (start,)) : bisect_right(events, (end, math.inf))]
+        rows, pagination = _page(in_range, body.get("page", 1), body.get("pageSize", 200))
+        return ORJSONResponse(
+            {
+                "totalUsageEventsCount": len(in_range),
+                "pagination": {
+                    "numPages": pagination["totalPages"],
+                    "currentPage": pagination["page"],
+                    "pageSize": pagination["pageSize"],
+                    "hasNextPage": pagination["hasNextPage"],
+                    "hasPreviousPage": pagination["hasPreviousPage"],
+                },
+                "usageEvents": [
+                    {
+                        "timestamp": str(ts),
+                        "userEmail": body["email"],
+                        "model": seed.MODELS[n % len(seed.MODELS)],
+                        "kind": "Included in Business",
+                        "maxMode": False,
+                        "requestsCosts": 1.0,
+                        "isTokenBasedCall": False,
+                    }
+                    for ts, n in rows
+                ],
+            }
+        )
+
+    @app.get("/analytics/ai-code/commits", dependencies=[api])
+    async def ai_code_commits(
+        request: Request, startDate: str, endDate: str, page: int = 1, pageSize: int = 1000, user: str | None = None
+    ):
+        start, end = date.fromisoformat(startDate[:10]), date.fromisoformat(endDate[:10])
+        rows, pagination = _page(data.commits_between(start, end, user), page, pageSize)
+        return cached(
+            request,
+            {
+                "commits": [_commit_json(r) for r in rows],
+                "pagination": {k: pagination[k] for k in ("page", "pageSize", "totalCount")},
+            },
+        )
+
+    app.state.fake_data = data
+    app.state.fake_stats = stats
+    return app
+
+
+def _main(argv: list[str] | None = None) -> None:
+    import uvicorn
+
+    d = FakeApiConfig()
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8900)
+    ap.add_argument("--seed", type=int, default=d.seed)
+    ap.add_argument("--members", type=int, default=d.members)
+    ap.add_argument("--projects", type=int, default=d.projects)
+    ap.add_argument("--sessions", type=int, default=d.sessions)
+    ap.add_argument("--commits", type=int, default=d.commits)
+    ap.add_argument("--days", type=int, default=d.days)
+    ap.add_argument("--end", type=date.fromisoformat, default=d.end, help="last day with data (default today)")
+    ap.add_argument("--latency-ms", type=float, default=0)
+    ap.add_argument("--rate-limit-every", type=int, default=0, help="answer every Nth request with 429")
+    ap.add_argument("--retry-after", type=float, default=d.retry_after)
+    a = ap.parse_args(argv)
+    cfg = FakeApiConfig(
+        a.seed, a.members, a.projects, a.sessions, a.commits, a.days, a.end, a.latency_ms, a.rate_limit_every, a.retry_after
+    )
+    uvicorn.run(create_app(cfg), host=a.host, port=a.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    _main()
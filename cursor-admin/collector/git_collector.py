@@ -7,6 +7,7 @@ import asyncio
 import hashlib
 import logging
 import os
+from collections.abc import Awaitable, Callable
 from datetime import date, timedelta
 
 from config import settings
@@ -131,10 +132,13 @@ async def _collect_one_repo(project_id: int, repo_url: str, since_date: date) ->
         log.info("Collected project_id=%s repo=%s commits=%d", project_id, repo_url, len(commits))
 
 
-async def run_git_collect() -> None:
+async def run_git_collect(
+    progress: Callable[[int, int | None, str | None], Awaitable[None]] | None = None,
+) -> None:
     """
     For each active project with git_repos, clone/fetch and scan commits in the last
     git_collect_days, upsert into git_contributions. Per-repo errors are logged only.
+    progress(done, total, message) is awaited after each repo (used by the job runner).
     """
     since_date = date.today() - timedelta(days=settings.git_collect_days)
     pool = await get_pool()
@@ -142,14 +146,16 @@ async def run_git_collect() -> None:
         rows = await conn.fetch(
             "SELECT id, git_repos FROM projects WHERE status = 'active' AND git_repos IS NOT NULL AND array_length(git_repos, 1) > 0"
         )
-    for row in rows:
-        project_id = row["id"]
-        repos = row["git_repos"] or []
-        for repo_url in repos:
-            repo_url = (repo_url or "").strip()
-            if not repo_url:
-                continue
-            try:
-                await _collect_one_repo(project_id, repo_url, since_date)
-            except Exception as e:
-                log.exception("Git collect failed project_id=%s url=%s: %s", project_id, repo_url, e)
+    targets = [
+        (row["id"], repo_url.strip())
+        for row in rows
+        for repo_url in (row["git_repos"] or [])
+        if (repo_url or "").strip()
+    ]
+    for done, (project_id, repo_url) in enumerate(targets, start=1):
+        try:
+            await _collect_one_repo(project_id, repo_url, since_date)
+        except Exception as e:
+            log.exception("Git collect failed project_id=%s url=%s: %s", project_id, repo_url, e)
+        if progress:
+            await progress(done, len(targets), repo_url)
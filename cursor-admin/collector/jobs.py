@@ -0,0 +1,328 @@
+"""
+Background job runner: persisted jobs table + in-process worker pool.
+
+- submit() inserts a queued row and returns its id immediately; while a job with the same
+  dedupe_key is queued or running, duplicate submissions return that job instead (coalescing).
+- JobRunner claims queued rows (FOR UPDATE SKIP LOCKED) up to a per-type concurrency limit,
+  runs the handler, and records progress, result, error and timing on the row.
+- Running rows are heartbeated; rows whose heartbeat is older than job_stale_seconds
+  (worker crashed or restarted) are marked failed.
+"""
+
+import asyncio
+import json
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import date
+
+from config import settings
+from contribution_engine import run_calculate_latest, run_recalculate_range
+from database import get_pool
+from git_collector import run_git_collect
+from parquet_export import run_parquet_export
+from sync import run_full_sync
+
+log = logging.getLogger("jobs")
+
+# NOTIFY channel: submit() wakes runners in other processes (run_mode=api + worker); see pubsub.py
+JOBS_CHANNEL = "cursor_admin_jobs"
+
+
+class JobContext:
+    """Passed to handlers so they can report progress on their jobs row."""
+
+    def __init__(self, pool, job_id: int):
+        self._pool = pool
+        self.job_id = job_id
+
+    async def progress(self, done: int, total: int | None = None, message: str | None = None) -> None:
+        async with self._pool.acquire() as conn:
+            await conn.execute(
+                """
+                UPDATE jobs SET
+                    progress_done    = $2,
+                    progress_total   = COALESCE($3, progress_total),
+                    progress_message = COALESCE($4, progress_message),
+                    heartbeat_at     = NOW()
+                WHERE id = $1
+                """,
+                self.job_id,
+                done,
+                total,
+                message,
+            )
+
+
+JobHandler = Callable[..., Awaitable[dict | None]]
+
+
+@dataclass
+class JobType:
+    handler: JobHandler
+    concurrency: int = 1
+
+
+def _dedupe_key(job_type: str, params: dict) -> str:
+    return f"{job_type}:{json.dumps(params, sort_keys=True, default=str)}"
+
+
+def _job_row_to_dict(r) -> dict:
+    def _json(v):
+        return json.loads(v) if isinstance(v, str) else v
+
+    def _iso(v):
+        return v.isoformat() if v else None
+
+    return {
+        "id": r["id"],
+        "job_type": r["job_type"],
+        "status": r["status"],
+        "params": _json(r["params"]) or {},
+        "progress": {
+            "done": r["progress_done"],
+            "total": r["progress_total"],
+            "message": r["progress_message"],
+        },
+        "result": _json(r["result"]),
+        "error": r["error"],
+        "created_at": _iso(r["created_at"]),
+        "started_at": _iso(r["started_at"]),
+        "finished_at": _iso(r["finished_at"]),
+        "duration_seconds": float(r["duration_seconds"]) if r["duration_seconds"] is not None else None,
+    }
+
+
+_JOB_COLUMNS = """
+    id, job_type, status, params, progress_done, progress_total, progress_message,
+    result, error, created_at, started_at, finished_at,
+    EXTRACT(EPOCH FROM (COALESCE(finished_at, NOW()) - started_at)) AS duration_seconds
+"""
+
+
+async def submit(job_type: str, params: dict | None = None, dedupe_key: str | None = None) -> tuple[int, bool]:
+    """
+    Queue a job and return (job_id, coalesced). coalesced=True means an identical job was
+    already queued or running and its id is returned instead of creating a new one.
+    """
+    if job_type not in JOB_TYPES:
+        raise ValueError(f"Unknown job_type {job_type}")
+    params = params or {}
+    key = dedupe_key or _dedupe_key(job_type, params)
+    pool = await get_pool()
+    # Retry covers the window where the active duplicate finishes between INSERT and SELECT
+    for _ in range(3):
+        async with pool.acquire() as conn:
+            job_id = await conn.fetchval(
+                """
+                INSERT INTO jobs (job_type, dedupe_key, params)
+                VALUES ($1, $2, $3)
+                ON CONFLICT (dedupe_key) WHERE status IN ('queued', 'running') DO NOTHING
+                RETURNING id
+                """,
+                job_type,
+                key,
+                json.dumps(params, default=str),
+            )
+            if job_id is not None:
+                runner.wake()
+                await conn.execute("SELECT pg_notify($1, $2)", JOBS_CHANNEL, job_type)
+                return job_id, False
+            job_id = await conn.fetchval(
+                """
+                SELECT id FROM jobs
+                WHERE dedupe_key = $1 AND status IN ('queued', 'running')
+                ORDER BY id DESC LIMIT 1
+                """,
+                key,
+            )
+            if job_id is not None:
+                return job_id, True
+    raise RuntimeError(f"Could not submit job {job_type}")
+
+
+async def get_job(job_id: int) -> dict | None:
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        row = await conn.fetchrow(f"SELECT {_JOB_COLUMNS} FROM jobs WHERE id = $1", job_id)
+    return _job_row_to_dict(row) if row else None
+
+
+async def list_jobs(job_type: str | None = None, limit: int = 50) -> list[dict]:
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        if job_type:
+            rows = await conn.fetch(
+                f"SELECT {_JOB_COLUMNS} FROM jobs WHERE job_type = $1 ORDER BY id DESC LIMIT $2",
+                job_type,
+                limit,
+            )
+        else:
+            rows = await conn.fetch(f"SELECT {_JOB_COLUMNS} FROM jobs ORDER BY id DESC LIMIT $1", limit)
+    return [_job_row_to_dict(r) for r in rows]
+
+
+class JobRunner:
+    """Claims queued jobs from the table and runs them with per-type concurrency limits."""
+
+    def __init__(self):
+        self._running: dict[str, set[int]] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._wake: asyncio.Event | None = None
+        self._loop_task: asyncio.Task | None = None
+
+    @property
+    def started(self) -> bool:
+        return self._loop_task is not None
+
+    def wake(self) -> None:
+        if self._wake is not None:
+            self._wake.set()
+
+    async def start(self) -> None:
+        if self._loop_task is not None:
+            return
+        self._wake = asyncio.Event()
+        self._loop_task = asyncio.create_task(self._loop(), name="job-runner")
+        log.info("Job runner started (%s)", ", ".join(f"{t}={jt.concurrency}" for t, jt in JOB_TYPES.items()))
+
+    async def stop(self) -> None:
+        if self._loop_task is None:
+            return
+        self._loop_task.cancel()
+        tasks = list(self._tasks)
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(self._loop_task, *tasks, return_exceptions=True)
+        self._loop_task = None
+        self._wake = None
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                pool = await get_pool()
+                await self._heartbeat_and_reap(pool)
+                await self._claim_available(pool)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.exception("Job runner iteration failed: %s", e)
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=settings.job_poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def _heartbeat_and_reap(self, pool) -> None:
+        mine = [job_id for ids in self._running.values() for job_id in ids]
+        async with pool.acquire() as conn:
+            if mine:
+                await conn.execute("UPDATE jobs SET heartbeat_at = NOW() WHERE id = ANY($1::bigint[])", mine)
+            reaped = await conn.execute(
+                """
+                UPDATE jobs SET status = 'failed', error = 'worker lost (heartbeat timeout)', finished_at = NOW()
+                WHERE status = 'running'
+                  AND heartbeat_at < NOW() - ($1::text || ' seconds')::interval
+                  AND NOT (id = ANY($2::bigint[]))
+                """,
+                str(settings.job_stale_seconds),
+                mine,
+            )
+        if reaped and reaped != "UPDATE 0":
+            log.warning("Reaped stale jobs: %s", reaped)
+
+    async def _claim_available(self, pool) -> None:
+        for job_type, jt in JOB_TYPES.items():
+            running = self._running.setdefault(job_type, set())
+            while len(running) < jt.concurrency:
+                async with pool.acquire() as conn:
+                    row = await conn.fetchrow(
+                        """
+                        UPDATE jobs SET status = 'running', started_at = NOW(), heartbeat_at = NOW()
+                        WHERE id = (
+                            SELECT id FROM jobs
+                            WHERE status = 'queued' AND job_type = $1
+                            ORDER BY id
+                            FOR UPDATE SKIP LOCKED
+                            LIMIT 1
+                        )
+                        RETURNING id, params
+                        """,
+                        job_type,
+                    )
+                if not row:
+                    break
+                params = json.loads(row["params"]) if isinstance(row["params"], str) else dict(row["params"] or {})
+                running.add(row["id"])
+                task = asyncio.create_task(self._execute(pool, job_type, jt, row["id"], params))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _execute(self, pool, job_type: str, jt: JobType, job_id: int, params: dict) -> None:
+        log.info("Job %s (%s) started params=%s", job_id, job_type, params)
+        status, result, error = "succeeded", None, None
+        try:
+            result = await jt.handler(JobContext(pool, job_id), **params)
+        except asyncio.CancelledError:
+            status, error = "failed", "cancelled (shutdown)"
+        except Exception as e:
+            log.exception("Job %s (%s) failed: %s", job_id, job_type, e)
+            status, error = "failed", f"{type(e).__name__}: {e}"
+        finally:
+            self._running.get(job_type, set()).discard(job_id)
+        try:
+            async with pool.acquire() as conn:
+                await conn.execute(
+                    "UPDATE jobs SET status = $2, result = $3, error = $4, finished_at = NOW() WHERE id = $1",
+                    job_id,
+                    status,
+                    json.dumps(result, default=str) if result is not None else None,
+                    error,
+                )
+        except Exception as e:
+            log.error("Failed to record job %s outcome: %s", job_id, e)
+        log.info("Job %s (%s) %s", job_id, job_type, status)
+        self.wake()
+
+
+# ─── Job handlers ────────────────────────────────────────────────────────────
+
+
+async def _job_git_collect(ctx: JobContext) -> dict:
+    await run_git_collect(progress=ctx.progress)
+    return {}
+
+
+async def _job_contribution_recalculate(ctx: JobContext, period_type: str, rule_id: int = 1) -> dict:
+    await run_calculate_latest(period_type, rule_id=rule_id, progress=ctx.progress)
+    return {"period_type": period_type, "rule_id": rule_id}
+
+
+async def _job_contribution_recalculate_range(
+    ctx: JobContext, start: str, end: str, period_types: list[str], rule_id: int = 1
+) -> dict:
+    return await run_recalculate_range(
+        date.fromisoformat(start), date.fromisoformat(end), period_types, rule_id=rule_id, progress=ctx.progress
+    )
+
+
+async def _job_parquet_export(ctx: JobContext) -> dict:
+    return await run_parquet_export(progress=ctx.progress)
+
+
+async def _job_full_sync(ctx: JobContext) -> dict:
+    await run_full_sync()
+    return {}
+
+
+JOB_TYPES: dict[str, JobType] = {
+    "git_collect": JobType(_job_git_collect, settings.job_concurrency_git_collect),
+    "contribution_recalculate": JobType(_job_contribution_recalculate, settings.job_concurrency_contribution),
+    # One range rebuild at a time: it already fans out to recalc_max_parallel connections
+    "contribution_recalculate_range": JobType(_job_contribution_recalculate_range, 1),
+    "parquet_export": JobType(_job_parquet_export, 1),
+    # Cursor Admin API sync submitted at startup, so readiness never waits on the external API
+    "full_sync": JobType(_job_full_sync, 1),
+}
+
+runner = JobRunner()
@@ -0,0 +1,138 @@
+"""
+Leader election for scheduled jobs, so the API can run as several workers / replicas.
+
+Every process starts the APScheduler, but jobs wrapped with leader_only() only run in the
+process that holds a session-level Postgres advisory lock (pg_try_advisory_lock on a
+dedicated connection, not a pool connection). Exactly one process holds it at a time:
+
+- Followers retry every leader_check_seconds. If the leader process dies, or its connection
+  drops, Postgres releases the lock with the session and the next follower attempt takes over.
+- The leader pings its connection on the same interval and steps down as soon as the ping
+  fails (the lock is gone with the connection), so two leaders never overlap for longer than
+  one check.
+- With leader_election_enabled=False every process considers itself leader (single worker).
+
+Background jobs submitted to the jobs table are claimed with FOR UPDATE SKIP LOCKED and are
+already safe across processes; only the schedule needs electing. Requires a direct (session)
+connection: advisory locks do not survive a transaction-pooling pgbouncer.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import socket
+from collections.abc import Awaitable, Callable
+
+from config import settings
+from database import connect
+
+log = logging.getLogger("leader")
+
+LOCK_NAME = "cursor-admin:scheduler"
+
+
+class LeaderElection:
+    def __init__(self, lock_name: str = LOCK_NAME):
+        self.lock_name = lock_name
+        self.identity = f"{socket.gethostname()}:{os.getpid()}"
+        self._conn = None
+        self._task: asyncio.Task | None = None
+        self._is_leader = False
+        self.elections = 0
+
+    @property
+    def is_leader(self) -> bool:
+        return self._is_leader or not settings.leader_election_enabled
+
+    async def _try_acquire(self) -> None:
+        conn = None
+        try:
+            conn = await connect()
+            got = await conn.fetchval("SELECT pg_try_advisory_lock(hashtext($1))", self.lock_name)
+        except Exception as e:
+            log.warning("Leader election attempt failed: %s", e)
+            got = False
+        if got:
+            self._conn, self._is_leader = conn, True
+            self.elections += 1
+            log.info("Scheduler leader: %s", self.identity)
+        elif conn is not None:
+            await conn.close()
+
+    async def _still_leader(self) -> None:
+        try:
+            await asyncio.wait_for(self._conn.fetchval("SELECT 1"), timeout=settings.leader_check_seconds)
+        except Exception as e:
+            log.error("Scheduler leader %s lost its lock connection, stepping down: %s", self.identity, e)
+            await self._release()
+
+    async def _release(self) -> None:
+        conn, self._conn, self._is_leader = self._conn, None, False
+        if conn is None or conn.is_closed():
+            return
+        try:
+            await asyncio.wait_for(
+                conn.fetchval("SELECT pg_advisory_unlock(hashtext($1))", self.lock_name),
+                timeout=settings.leader_check_seconds,
+            )
+            await conn.close()
+        except Exception:
+            conn.terminate()  # closing the session releases the lock anyway
+
+    async def check(self) -> bool:
+        """One election round: acquire when follower, verify when leader."""
+        if self._conn is None:
+            await self._try_acquire()
+        else:
+            await self._still_leader()
+        return self._is_leader
+
+    async def start(self) -> None:
+        """First round runs inline, so is_leader is known before the scheduler's first fire."""
+        if not settings.leader_election_enabled or self._task:
+            return
+        await self.check()
+        self._task = asyncio.create_task(self._loop(), name="leader-election")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._release()
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.leader_check_seconds)
+            try:
+                await self.check()
+            except Exception as e:
+                log.exception("Leader election round failed: %s", e)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": settings.leader_election_enabled,
+            "identity": self.identity,
+            "is_leader": self.is_leader,
+            "elections": self.elections,
+        }
+
+
+leader = LeaderElection()
+
+
+def leader_only(fn: Callable[[], Awaitable[None]]) -> Callable[[], Awaitable[None]]:
+    """Wrap a scheduler job so that it is skipped unless this process is the leader."""
+
+    @functools.wraps(fn)
+    async def run():
+        if not leader.is_leader:
+            log.debug("Skipping %s: not the scheduler leader", fn.__name__)
+            return
+        await fn()
+
+    return run
@@ -5,132 +5,71 @@ Cursor Admin 采集服务
 - 定时同步 Cursor Admin API
 """
 
+import json
 import logging
 from contextlib import asynccontextmanager
-from datetime import date, timedelta
+from datetime import date, datetime, timezone
 
 import asyncpg
 
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from fastapi import Depends, FastAPI, Header, HTTPException, Query
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
+from starlette.background import BackgroundTask
 
-from ai_code_sync import sync_ai_code_commits
-from alerts import check_alerts
+import cache
+import exports
+import profiler
+import request_timing
+import worker
 from config import settings
-from contribution_engine import run_calculate_latest
-from database import close_pool, get_pool, init_db
-from git_collector import run_git_collect
-from sync import run_full_sync
+from cursor_api import close_client
+from database import close_pool, get_pool, get_read_pool, init_db, read_pool_stats
+from jobs import get_job, list_jobs, submit as submit_job
+from leader import leader
+from pagination import CountMode, count_rows, decode_cursor, encode_cursor
+from pubsub import pubsub
+from request_timing import RequestTimingMiddleware
+from serialization import ORJSONResponse, TimedJSONResponse
+from session_buffer import CONVERSATION_LOCK_SQL, SessionRow, buffer as session_buffer, write_rows as write_session_rows
+from singleflight import singleflight
+from summaries import SESSION_VIEW, ai_commit_summary_rows, mark_late_rows, session_summary_rows
+from timerange import day_bounds, parse_date_range
+from workspace_resolver import resolver as workspace_resolver
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
 log = logging.getLogger("main")
 
-scheduler = AsyncIOScheduler()
+
+# 就绪状态：lifespan 启动完成后为 True，开始关闭时置回 False（见 /ready）
+_startup: dict = {"ready": False, "migrations": []}
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await init_db()
-    await run_full_sync()
-    # Git collect runs in scheduler (_sync_and_alert) and via POST /api/admin/trigger-git-collect; not on startup to avoid long clone blocking serve
-
-    scheduler.add_job(
-        _sync_and_alert,
-        "interval",
-        minutes=settings.sync_interval_minutes,
-        id="sync",
-    )
-    scheduler.add_job(
-        _job_ai_code_sync,
-        "interval",
-        hours=1,
-        id="ai_code_sync",
-    )
-    # Contribution score: daily 00:30, weekly Mon 01:00, monthly 1st 01:30 (Asia/Shanghai)
-    try:
-        import zoneinfo
-        tz = zoneinfo.ZoneInfo("Asia/Shanghai")
-    except ImportError:
-        tz = None
-    scheduler.add_job(
-        _job_contribution_daily,
-        "cron",
-        hour=0,
-        minute=30,
-        id="contribution_daily",
-        timezone=tz,
-    )
-    scheduler.add_job(
-        _job_contribution_weekly,
-        "cron",
-        day_of_week="mon",
-        hour=1,
-        minute=0,
-        id="contribution_weekly",
-        timezone=tz,
-    )
-    scheduler.add_job(
-        _job_contribution_monthly,
-        "cron",
-        day=1,
-        hour=1,
-        minute=30,
-        id="contribution_monthly",
-        timezone=tz,
-    )
-    scheduler.start()
-    log.info("Scheduler started, sync every %d min", settings.sync_interval_minutes)
+    if settings.run_mode not in ("all", "api"):
+        raise RuntimeError(f"run_mode={settings.run_mode!r} has no HTTP tier; start python worker.py instead")
+    _startup["migrations"] = await init_db()
+    await pubsub.start()
+    if settings.run_mode == "all":
+        await worker.start()
+    if settings.session_buffer_enabled:
+        await session_buffer.start()
+    _startup["ready"] = True
 
     yield
 
-    scheduler.shutdown()
+    _startup["ready"] = False  # /ready fails first so load balancers drain this process
+    if settings.run_mode == "all":
+        await worker.stop()
+    await session_buffer.stop()
+    await pubsub.stop()
+    await close_client()
     await close_pool()
 
 
-async def _sync_and_alert():
-    await run_full_sync()
-    await check_alerts()
-    try:
-        await run_git_collect()
-    except Exception as e:
-        log.exception("Git collect failed: %s", e)
-    try:
-        await sync_ai_code_commits()
-    except Exception as e:
-        log.exception("AI code sync failed: %s", e)
-
-
-async def _job_ai_code_sync():
-    try:
-        await sync_ai_code_commits()
-    except Exception as e:
-        log.exception("AI code sync job failed: %s", e)
-
-
-async def _job_contribution_daily():
-    try:
-        await run_calculate_latest("daily")
-    except Exception as e:
-        log.exception("Contribution daily failed: %s", e)
-
-
-async def _job_contribution_weekly():
-    try:
-        await run_calculate_latest("weekly")
-    except Exception as e:
-        log.exception("Contribution weekly failed: %s", e)
-
-
-async def _job_contribution_monthly():
-    try:
-        await run_calculate_latest("monthly")
-    except Exception as e:
-        log.exception("Contribution monthly failed: %s", e)
-
-
-app = FastAPI(title="Cursor Admin Collector", lifespan=lifespan)
+app = FastAPI(title="Cursor Admin Collector", lifespan=lifespan, default_response_class=TimedJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -138,6 +77,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestTimingMiddleware)
 
 
 # ─── 内部 API 鉴权 ────────────────────────────────────────────────────────────
@@ -162,71 +102,102 @@ class SessionPayload(BaseModel):
     project_id: int | None = None
 
 
-def _workspace_root_matches_rule(root: str, rule: str) -> bool:
-    """Match root against rule (prefix). Normalize path separators and case for cross-platform.
-    Strips trailing punctuation (e.g. full-width 。) from rule so UI typos do not break matching."""
-    if not root or not rule:
-        return False
-    root_n = root.replace("\\", "/").strip().lower()
-    rule_n = rule.replace("\\", "/").strip().lower()
-    # Strip trailing punctuation/whitespace that may be entered in UI (e.g. "D:\AI\Sierac-tm。")
-    rule_n = rule_n.rstrip("。，,; \t\n\r")
-    if not rule_n:
-        return False
-    return root_n.startswith(rule_n)
-
-
-async def _resolve_project_id_from_workspace_roots(pool, workspace_roots: list[str]) -> int | None:
-    """Resolve project_id by matching workspace_roots against active projects' workspace_rules."""
-    if not workspace_roots:
-        return None
-    async with pool.acquire() as conn:
-        rows = await conn.fetch(
-            "SELECT id, workspace_rules FROM projects WHERE status = 'active'"
-        )
-    for root in workspace_roots:
-        for r in rows:
-            rules = r["workspace_rules"] or []
-            for rule in rules:
-                if _workspace_root_matches_rule(root, rule):
-                    return r["id"]
-    return None
-
+def _like_contains(text: str) -> str:
+    """ILIKE pattern matching text as a literal substring (escapes %, _ and backslash)."""
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
 
-@app.post("/api/sessions", status_code=204)
-async def receive_session(payload: SessionPayload):
-    """Receive Hook session end event. Accept project_id; if missing, resolve from workspace_rules."""
-    from datetime import datetime, timezone
 
-    pool = await get_pool()
+def _session_row(payload: SessionPayload, project_id: int | None) -> SessionRow:
     ended_dt = datetime.fromtimestamp(payload.ended_at, tz=timezone.utc)
     started_dt = None
     if payload.duration_seconds is not None:
         started_dt = datetime.fromtimestamp(
             payload.ended_at - payload.duration_seconds, tz=timezone.utc
         )
+    return (
+        payload.conversation_id,
+        payload.user_email,
+        payload.machine_id,
+        payload.workspace_roots,
+        started_dt,
+        ended_dt,
+        payload.duration_seconds,
+        project_id,
+    )
+
+
+async def _session_rows(pool, payloads: list[SessionPayload]) -> list[SessionRow]:
+    rows = []
+    for p in payloads:
+        project_id = p.project_id
+        if project_id is not None and not await workspace_resolver.known(pool, project_id):
+            project_id = None  # unknown or archived project: resolve from the roots instead
+        if project_id is None and p.workspace_roots:
+            project_id = await workspace_resolver.resolve(pool, p.workspace_roots)
+        rows.append(_session_row(p, project_id))
+    return rows
+
+
+def _offer_sessions(rows: list[SessionRow]) -> None:
+    """Queue rows on the ingest buffer; 429 when it is full so the hook keeps and retries them."""
+    if not session_buffer.offer(rows):
+        raise HTTPException(
+            status_code=429,
+            detail="Session ingest buffer full, retry later",
+            headers={"Retry-After": str(max(1, round(settings.session_buffer_flush_seconds * 5)))},
+        )
+
 
-    project_id = payload.project_id
-    if project_id is None and payload.workspace_roots:
-        project_id = await _resolve_project_id_from_workspace_roots(pool, payload.workspace_roots)
+@app.post("/api/sessions", status_code=204)
+async def receive_session(payload: SessionPayload):
+    """Receive Hook session end event. Accept project_id; if missing, resolve from workspace_rules."""
+    pool = await get_pool()
+    row = (await _session_rows(pool, [payload]))[0]
+    if session_buffer.started:
+        _offer_sessions([row])
+        return
 
     async with pool.acquire() as conn:
-        await conn.execute(
-            """
-            INSERT INTO agent_sessions
-                (conversation_id, user_email, machine_id, workspace_roots, started_at, ended_at, duration_seconds, project_id)
-            VALUES ($1,$2,$3,$4,$5,$6,$7,$8)
-            ON CONFLICT (conversation_id) DO NOTHING
-            """,
-            payload.conversation_id,
-            payload.user_email,
-            payload.machine_id,
-            payload.workspace_roots,
-            started_dt,
-            ended_dt,
-            payload.duration_seconds,
-            project_id,
+        async with conn.transaction():
+            await conn.execute(CONVERSATION_LOCK_SQL, row[0])
+            status = await conn.execute(
+                """
+                INSERT INTO agent_sessions
+                    (conversation_id, user_email, machine_id, workspace_roots, started_at, ended_at, duration_seconds, project_id)
+                SELECT $1::text, $2::text, $3::text, $4::text[], $5::timestamptz, $6::timestamptz, $7::int, $8::int
+                WHERE NOT EXISTS (SELECT 1 FROM agent_sessions WHERE conversation_id = $1)
+                ON CONFLICT DO NOTHING
+                """,
+                *row,
+            )
+        if status == "INSERT 0 1":
+            await mark_late_rows(conn, SESSION_VIEW, row[5])
+    cache.bump(cache.SESSIONS)
+
+
+@app.post("/api/sessions/batch", status_code=202)
+async def receive_session_batch(payloads: list[SessionPayload]):
+    """Receive many session end events at once (hooks replaying an offline spool).
+
+    Duplicates (same conversation_id, in the batch or already stored) are ignored. 413 when
+    the batch exceeds session_batch_max_items, 429 when the ingest buffer cannot take it.
+    """
+    if len(payloads) > settings.session_batch_max_items:
+        raise HTTPException(
+            status_code=413, detail=f"At most {settings.session_batch_max_items} sessions per batch"
         )
+    if not payloads:
+        return {"accepted": 0}
+    pool = await get_pool()
+    rows = await _session_rows(pool, payloads)
+    if session_buffer.started:
+        _offer_sessions(rows)
+    else:
+        async with pool.acquire() as conn:
+            await write_session_rows(conn, rows)
+        cache.bump(cache.SESSIONS)
+    return {"accepted": len(rows)}
 
 
 # ─── 查询 API（管理端使用） ────────────────────────────────────────────────────
@@ -234,44 +205,150 @@ async def receive_session(payload: SessionPayload):
 
 @app.get("/api/members", dependencies=[Depends(require_api_key)])
 async def list_members():
-    pool = await get_pool()
+    pool = await get_read_pool()
     async with pool.acquire() as conn:
         rows = await conn.fetch("SELECT * FROM members WHERE is_removed=FALSE ORDER BY email")
-    return [dict(r) for r in rows]
+    return ORJSONResponse(rows)
+
+
+_USAGE_METRICS = (
+    "agent_requests",
+    "chat_requests",
+    "composer_requests",
+    "total_tabs_accepted",
+    "total_tabs_shown",
+    "total_lines_added",
+    "total_lines_deleted",
+    "accepted_lines_added",
+    "subscription_reqs",
+    "usage_based_reqs",
+)
+_USAGE_GRAINS = ("day", "week", "month")
+_USAGE_DIMENSIONS = ("member", "team")
+
+
+def _parse_usage_group_by(group_by: str) -> tuple[str | None, str]:
+    """'week,member' -> ("week", "member"); time grain optional (None = whole range), dimension defaults to team."""
+    grain, dimension = None, None
+    for part in (p.strip() for p in group_by.split(",") if p.strip()):
+        if part in _USAGE_GRAINS and grain is None:
+            grain = part
+        elif part in _USAGE_DIMENSIONS and dimension is None:
+            dimension = part
+        else:
+            raise HTTPException(400, f"invalid group_by: {group_by}")
+    if grain is None and dimension is None:
+        raise HTTPException(400, "group_by must name a time grain (day/week/month) and/or member/team")
+    return grain, dimension or "team"
 
 
 @app.get("/api/usage/daily", dependencies=[Depends(require_api_key)])
 async def daily_usage(
+    request: Request,
     email: str | None = Query(None),
     start: str | None = Query(None),
     end: str | None = Query(None),
+    group_by: str | None = Query(None, description="e.g. day,team | week,member | member (omit for raw rows)"),
+    top_n: int | None = Query(None, ge=1, le=500, description="with member grouping: only the top N members"),
+    rank_by: str = Query("agent_requests", description="metric used to pick/sort top members"),
 ):
-    """按用户/日期范围查询每日用量"""
-    pool = await get_pool()
-    start_date = date.fromisoformat(start) if start else date.today() - timedelta(days=30)
-    end_date = date.fromisoformat(end) if end else date.today()
+    """
+    按用户/日期范围查询每日用量。不带 group_by 返回原始行；带 group_by 时在库内聚合，
+    每行为 {bucket?, email?, <metrics>, active_days}（bucket 为周期首日，周从周一开始）。
+    """
+    start_date, end_date = parse_date_range(start, end)
+    if group_by is None:
+        pool = await get_read_pool()
+        async with pool.acquire() as conn:
+            if email:
+                rows = await conn.fetch(
+                    "SELECT * FROM daily_usage WHERE email=$1 AND day BETWEEN $2 AND $3 ORDER BY day DESC",
+                    email,
+                    start_date,
+                    end_date,
+                )
+            else:
+                rows = await conn.fetch(
+                    "SELECT * FROM daily_usage WHERE day BETWEEN $1 AND $2 ORDER BY email, day DESC",
+                    start_date,
+                    end_date,
+                )
+        return ORJSONResponse(rows)
+
+    grain, dimension = _parse_usage_group_by(group_by)
+    if top_n is not None and dimension != "member":
+        raise HTTPException(400, "top_n requires member grouping")
+    if rank_by not in _USAGE_METRICS:
+        raise HTTPException(400, f"rank_by must be one of {', '.join(_USAGE_METRICS)}")
+    params = {
+        "email": email,
+        "start": start_date,
+        "end": end_date,
+        "grain": grain,
+        "dimension": dimension,
+        "top_n": top_n,
+        "rank_by": rank_by,
+    }
+    return await cache.respond(
+        request,
+        "usage_daily",
+        params,
+        (cache.USAGE,),
+        lambda: _usage_aggregate(start_date, end_date, email, grain, dimension, top_n, rank_by),
+    )
 
+
+async def _usage_aggregate(
+    start_date: date,
+    end_date: date,
+    email: str | None,
+    grain: str | None,
+    dimension: str,
+    top_n: int | None,
+    rank_by: str,
+) -> list:
+    params: list = [start_date, end_date]
+    conds = ["day BETWEEN $1 AND $2"]
+    if email:
+        params.append(email)
+        conds.append(f"email = ${len(params)}")
+    if top_n is not None:
+        params.append(top_n)
+        conds.append(
+            f"""email IN (
+                SELECT email FROM daily_usage WHERE {" AND ".join(conds)}
+                GROUP BY email ORDER BY SUM({rank_by}) DESC, email LIMIT ${len(params)}
+            )"""
+        )
+    keys, order = [], []
+    if grain:
+        keys.append("day AS bucket" if grain == "day" else f"date_trunc('{grain}', day)::date AS bucket")
+        order.append("bucket")
+    if dimension == "member":
+        keys.append("email")
+        order += [f"{rank_by} DESC", "email"]
+    metrics = ", ".join(f"COALESCE(SUM({m}), 0)::bigint AS {m}" for m in _USAGE_METRICS)
+    group = f"GROUP BY {', '.join(str(i + 1) for i in range(len(keys)))} ORDER BY {', '.join(order)}" if keys else ""
+    sql = f"""
+        SELECT {", ".join(keys + [metrics])},
+               COUNT(*) FILTER (WHERE is_active)::int AS active_days
+        FROM daily_usage
+        WHERE {" AND ".join(conds)}
+        {group}
+    """
+    pool = await get_read_pool()
     async with pool.acquire() as conn:
-        if email:
-            rows = await conn.fetch(
-                "SELECT * FROM daily_usage WHERE email=$1 AND day BETWEEN $2 AND $3 ORDER BY day DESC",
-                email,
-                start_date,
-                end_date,
-            )
-        else:
-            rows = await conn.fetch(
-                "SELECT * FROM daily_usage WHERE day BETWEEN $1 AND $2 ORDER BY email, day DESC",
-                start_date,
-                end_date,
-            )
-    return [dict(r) for r in rows]
+        return await conn.fetch(sql, *params)
 
 
 @app.get("/api/usage/spend", dependencies=[Depends(require_api_key)])
-async def spend_data():
+async def spend_data(request: Request):
     """当前计费周期各成员支出"""
-    pool = await get_pool()
+    return await cache.respond(request, "spend_data", {}, (cache.SPEND, cache.MEMBERS), _spend_data)
+
+
+async def _spend_data() -> list[dict]:
+    pool = await get_read_pool()
     async with pool.acquire() as conn:
         rows = await conn.fetch(
             """
@@ -287,20 +364,20 @@ async def spend_data():
 @app.get("/api/sessions", dependencies=[Depends(require_api_key)])
 async def list_sessions(
     email: str | None = Query(None),
-    workspace: str | None = Query(None),
+    workspace: str | None = Query(None, description="substring of primary_workspace (case-insensitive)"),
     start: str | None = Query(None),
     end: str | None = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=500),
+    cursor: str | None = Query(None, description="next_cursor from the previous page; overrides page"),
+    count: CountMode = Query("auto", description="auto | exact | estimate | none"),
 ):
-    """按用户/工作目录/时间范围查询 Agent 会话"""
-    pool = await get_pool()
-    start_date = date.fromisoformat(start) if start else date.today() - timedelta(days=30)
-    end_date = date.fromisoformat(end) if end else date.today()
-    offset = (page - 1) * page_size
+    """按用户/工作目录/时间范围查询 Agent 会话（游标分页：ended_at DESC, id DESC）"""
+    pool = await get_read_pool()
+    start_ts, end_ts = day_bounds(*parse_date_range(start, end))
 
-    conditions = ["ended_at::date BETWEEN $1 AND $2"]
-    params: list = [start_date, end_date]
+    conditions = ["ended_at >= $1", "ended_at < $2"]
+    params: list = [start_ts, end_ts]
     idx = 3
 
     if email:
@@ -309,79 +386,92 @@ async def list_sessions(
         idx += 1
     if workspace:
         conditions.append(f"primary_workspace ILIKE ${idx}")
-        params.append(f"%{workspace}%")
+        params.append(_like_contains(workspace))
         idx += 1
 
-    where = " AND ".join(conditions)
+    filter_where = " AND ".join(conditions)
+    page_conditions = list(conditions)
+    page_params = list(params)
+    offset = 0
+    if cursor:
+        try:
+            after_ts, after_id = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        page_conditions.append(f"(ended_at, id) < (${idx}, ${idx + 1})")
+        page_params.extend([after_ts, after_id])
+    else:
+        offset = (page - 1) * page_size
+
     async with pool.acquire() as conn:
-        total = await conn.fetchval(f"SELECT COUNT(*) FROM agent_sessions WHERE {where}", *params)
+        total, total_is_estimate = await count_rows(
+            conn, f"FROM agent_sessions WHERE {filter_where}", params, count
+        )
         rows = await conn.fetch(
-            f"SELECT * FROM agent_sessions WHERE {where} ORDER BY ended_at DESC LIMIT {page_size} OFFSET {offset}",
-            *params,
+            f"""
+            SELECT * FROM agent_sessions WHERE {" AND ".join(page_conditions)}
+            ORDER BY ended_at DESC, id DESC LIMIT {page_size + 1} OFFSET {offset}
+            """,
+            *page_params,
         )
-    return {"total": total, "page": page, "page_size": page_size, "data": [dict(r) for r in rows]}
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    next_cursor = encode_cursor(rows[-1]["ended_at"], rows[-1]["id"]) if has_more else None
+    return ORJSONResponse({
+        "total": total,
+        "total_is_estimate": total_is_estimate,
+        "page": page,
+        "page_size": page_size,
+        "next_cursor": next_cursor,
+        "data": rows,
+    })
 
 
 @app.get("/api/sessions/summary", dependencies=[Depends(require_api_key)])
 async def sessions_summary(
+    request: Request,
     start: str | None = Query(None),
     end: str | None = Query(None),
 ):
     """按用户 + 工作目录汇总：会话数、总时长"""
-    pool = await get_pool()
-    start_date = date.fromisoformat(start) if start else date.today() - timedelta(days=30)
-    end_date = date.fromisoformat(end) if end else date.today()
+    start_date, end_date = parse_date_range(start, end)
+    return await cache.respond(
+        request,
+        "sessions_summary",
+        {"start": start_date, "end": end_date},
+        (cache.SESSIONS,),
+        lambda: _sessions_summary(start_date, end_date),
+    )
+
+
+async def _sessions_summary(start_date: date, end_date: date) -> list[dict]:
+    pool = await get_read_pool()
     async with pool.acquire() as conn:
-        rows = await conn.fetch(
-            """
-            SELECT
-                user_email,
-                primary_workspace,
-                COUNT(*)                                AS session_count,
-                COALESCE(SUM(duration_seconds), 0)     AS total_seconds,
-                MIN(ended_at)                           AS first_seen,
-                MAX(ended_at)                           AS last_seen
-            FROM agent_sessions
-            WHERE ended_at::date BETWEEN $1 AND $2
-              AND primary_workspace IS NOT NULL
-            GROUP BY user_email, primary_workspace
-            ORDER BY user_email, total_seconds DESC
-            """,
-            start_date,
-            end_date,
-        )
+        rows = await session_summary_rows(conn, start_date, end_date, by="workspace")
     return [dict(r) for r in rows]
 
 
 @app.get("/api/sessions/summary-by-project", dependencies=[Depends(require_api_key)])
 async def sessions_summary_by_project(
+    request: Request,
     start: str | None = Query(None),
     end: str | None = Query(None),
 ):
     """按用户 + 项目聚合：会话数、总时长；project_id 为空时显示为「未归属」。"""
-    pool = await get_pool()
-    start_date = date.fromisoformat(start) if start else date.today() - timedelta(days=30)
-    end_date = date.fromisoformat(end) if end else date.today()
+    start_date, end_date = parse_date_range(start, end)
+    return await cache.respond(
+        request,
+        "sessions_summary_by_project",
+        {"start": start_date, "end": end_date},
+        (cache.SESSIONS, cache.PROJECTS),
+        lambda: _sessions_summary_by_project(start_date, end_date),
+    )
+
+
+async def _sessions_summary_by_project(start_date: date, end_date: date) -> list[dict]:
+    pool = await get_read_pool()
     async with pool.acquire() as conn:
-        rows = await conn.fetch(
-            """
-            SELECT
-                a.project_id,
-                COALESCE(p.name, '未归属') AS project_name,
-                a.user_email,
-                COUNT(*) AS session_count,
-                COALESCE(SUM(a.duration_seconds), 0)::bigint AS total_seconds,
-                MIN(a.ended_at) AS first_seen,
-                MAX(a.ended_at) AS last_seen
-            FROM agent_sessions a
-            LEFT JOIN projects p ON p.id = a.project_id
-            WHERE a.ended_at::date BETWEEN $1 AND $2
-            GROUP BY a.project_id, p.name, a.user_email
-            ORDER BY project_name, a.user_email, total_seconds DESC
-            """,
-            start_date,
-            end_date,
-        )
+        rows = await session_summary_rows(conn, start_date, end_date, by="project")
     return [
         {
             "project_id": r["project_id"],
@@ -411,7 +501,7 @@ class AlertRuleIn(BaseModel):
 
 @app.get("/api/alerts/rules", dependencies=[Depends(require_api_key)])
 async def list_alert_rules():
-    pool = await get_pool()
+    pool = await get_read_pool()
     async with pool.acquire() as conn:
         rows = await conn.fetch("SELECT * FROM alert_rules ORDER BY id")
     return [dict(r) for r in rows]
@@ -419,8 +509,6 @@ async def list_alert_rules():
 
 @app.post("/api/alerts/rules", dependencies=[Depends(require_api_key)])
 async def create_alert_rule(body: AlertRuleIn):
-    import json
-
     pool = await get_pool()
     async with pool.acquire() as conn:
         row = await conn.fetchrow(
@@ -441,8 +529,6 @@ async def create_alert_rule(body: AlertRuleIn):
 
 @app.put("/api/alerts/rules/{rule_id}", dependencies=[Depends(require_api_key)])
 async def update_alert_rule(rule_id: int, body: AlertRuleIn):
-    import json
-
     pool = await get_pool()
     async with pool.acquire() as conn:
         row = await conn.fetchrow(
@@ -474,7 +560,7 @@ async def delete_alert_rule(rule_id: int):
 
 @app.get("/api/alerts/events", dependencies=[Depends(require_api_key)])
 async def list_alert_events(limit: int = Query(50, ge=1, le=500)):
-    pool = await get_pool()
+    pool = await get_read_pool()
     async with pool.acquire() as conn:
         rows = await conn.fetch(
             """
@@ -485,7 +571,7 @@ async def list_alert_events(limit: int = Query(50, ge=1, le=500)):
             """,
             limit,
         )
-    return [dict(r) for r in rows]
+    return ORJSONResponse(rows)
 
 
 # ─── 项目 CRUD（管理端） ───────────────────────────────────────────────────────
@@ -518,7 +604,7 @@ class ProjectUpdate(BaseModel):
 @app.get("/api/projects", dependencies=[Depends(require_api_key)])
 async def list_projects(status: str | None = Query(None)):
     """List projects; optional ?status=active to filter."""
-    pool = await get_pool()
+    pool = await get_read_pool()
     async with pool.acquire() as conn:
         if status:
             rows = await conn.fetch(
@@ -527,7 +613,7 @@ async def list_projects(status: str | None = Query(None)):
             )
         else:
             rows = await conn.fetch("SELECT * FROM projects ORDER BY id")
-    return [dict(r) for r in rows]
+    return ORJSONResponse(rows)
 
 
 @app.post("/api/projects", dependencies=[Depends(require_api_key)])
@@ -551,13 +637,55 @@ async def create_project(body: ProjectCreate):
             body.incentive_pool,
             body.incentive_rule_id,
         )
+    cache.bump(cache.PROJECTS)
     return dict(row)
 
 
 
+@app.get("/api/projects/whitelist")
+async def get_projects_whitelist(request: Request):
+    """Workspace whitelist for hooks (public, no API key): active projects' normalised
+    workspace_rules and member_emails. Rebuilt only when projects change; hooks poll with
+    If-None-Match and get 304 while the version is unchanged."""
+    pool = await get_pool()
+    version, body = await workspace_resolver.whitelist(pool)
+    return cache.conditional_response(request, f'"{version}"', body)
+
+
+@app.get("/api/projects/summaries", dependencies=[Depends(require_api_key)])
+async def get_project_summaries(
+    request: Request,
+    ids: str = Query(..., description="comma-separated project ids, e.g. 1,2,3"),
+):
+    """Batch of /api/projects/{id}/summary in one query (projects page). Unknown ids are listed in missing."""
+    try:
+        project_ids = sorted({int(x) for x in ids.split(",") if x.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    if not project_ids or len(project_ids) > 200:
+        raise HTTPException(status_code=400, detail="ids must contain 1-200 project ids")
+
+    async def produce() -> dict:
+        pool = await get_read_pool()
+        async with pool.acquire() as conn:
+            summaries = await _fetch_project_summaries(conn, project_ids)
+        return {
+            "items": [summaries[i] for i in project_ids if i in summaries],
+            "missing": [i for i in project_ids if i not in summaries],
+        }
+
+    return await cache.respond(
+        request,
+        "project_summaries",
+        {"ids": ",".join(map(str, project_ids))},
+        (cache.PROJECTS, cache.AI_COMMITS, cache.SPEND),
+        produce,
+    )
+
+
 @app.get("/api/projects/{project_id}", dependencies=[Depends(require_api_key)])
 async def get_project(project_id: int):
-    pool = await get_pool()
+    pool = await get_read_pool()
     async with pool.acquire() as conn:
         row = await conn.fetchrow("SELECT * FROM projects WHERE id=$1", project_id)
     if not row:
@@ -572,7 +700,7 @@ async def get_project_contributions(
     end: str | None = Query(None),
 ):
     """Git contributions for this project (by author, by date). Optional start/end date filter."""
-    pool = await get_pool()
+    pool = await get_read_pool()
     async with pool.acquire() as conn:
         exists = await conn.fetchval("SELECT 1 FROM projects WHERE id=$1", project_id)
     if not exists:
@@ -612,70 +740,105 @@ async def get_project_contributions(
 
 
 @app.get("/api/projects/{project_id}/summary", dependencies=[Depends(require_api_key)])
-async def get_project_summary(project_id: int):
+async def get_project_summary(request: Request, project_id: int):
     """Project summary: budget, AI code contribution (from ai_code_commits), member breakdown."""
-    pool = await get_pool()
+    return await cache.respond(
+        request,
+        "project_summary",
+        {"project_id": project_id},
+        (cache.PROJECTS, cache.AI_COMMITS, cache.SPEND),
+        lambda: _project_summary(project_id),
+    )
+
+
+async def _project_summary(project_id: int) -> dict:
+    pool = await get_read_pool()
     async with pool.acquire() as conn:
-        proj = await conn.fetchrow("SELECT * FROM projects WHERE id=$1", project_id)
-    if not proj:
+        summaries = await _fetch_project_summaries(conn, [project_id])
+    if project_id not in summaries:
         raise HTTPException(status_code=404, detail="Project not found")
+    return summaries[project_id]
+
+
+# One round trip for any number of projects: AI code totals and the per-member breakdown come
+# from a single GROUPING SETS pass; the current billing cycle is resolved once, not per project.
+_PROJECT_SUMMARIES_SQL = """
+WITH sel AS (
+    SELECT * FROM projects WHERE id = ANY($1::int[])
+),
+agg AS (
+    SELECT project_id, user_email, GROUPING(user_email) = 1 AS is_total,
+           COALESCE(SUM(tab_lines_added + composer_lines_added), 0)::int AS ai_lines_added,
+           COALESCE(SUM(total_lines_added), 0)::int AS total_lines_added,
+           COUNT(DISTINCT commit_hash)::int AS commit_count,
+           COUNT(DISTINCT user_email)::int AS member_count
+    FROM ai_code_commits
+    WHERE project_id = ANY($1::int[])
+    GROUP BY GROUPING SETS ((project_id, user_email), (project_id))
+),
+members AS (
+    SELECT project_id,
+           jsonb_agg(
+               jsonb_build_object(
+                   'user_email', user_email,
+                   'ai_lines_added', ai_lines_added,
+                   'total_lines_added', total_lines_added,
+                   'commit_count', commit_count
+               )
+               ORDER BY ai_lines_added DESC
+           ) AS rows
+    FROM agg WHERE NOT is_total
+    GROUP BY project_id
+),
+cycle AS (
+    SELECT MAX(billing_cycle_start) AS start FROM spend_snapshots
+),
+spend AS (
+    SELECT sel.id AS project_id, SUM(s.spend_cents)::bigint AS total_spend_cents
+    FROM sel
+    CROSS JOIN cycle
+    JOIN spend_snapshots s ON s.billing_cycle_start = cycle.start AND s.email = ANY(sel.member_emails)
+    GROUP BY sel.id
+)
+SELECT sel.*,
+       t.ai_lines_added            AS agg_total_ai_lines,
+       t.total_lines_added         AS agg_total_lines,
+       t.commit_count              AS agg_commit_count,
+       t.member_count              AS agg_member_count,
+       m.rows                      AS agg_members,
+       sp.total_spend_cents        AS agg_spend_cents
+FROM sel
+LEFT JOIN agg t ON t.project_id = sel.id AND t.is_total
+LEFT JOIN members m ON m.project_id = sel.id
+LEFT JOIN spend sp ON sp.project_id = sel.id
+ORDER BY sel.id
+"""
 
-    async with pool.acquire() as conn:
-        # AI code contribution totals
-        contrib = await conn.fetchrow(
-            """
-            SELECT
-                COALESCE(SUM(tab_lines_added + composer_lines_added), 0)::int AS total_ai_lines,
-                COALESCE(SUM(total_lines_added), 0)::int AS total_lines,
-                COUNT(DISTINCT commit_hash)::int AS commit_count,
-                COUNT(DISTINCT user_email)::int AS member_count
-            FROM ai_code_commits WHERE project_id = $1
-            """,
-            project_id,
-        )
-        # Per-member breakdown
-        members = await conn.fetch(
-            """
-            SELECT user_email,
-                   SUM(tab_lines_added + composer_lines_added)::int AS ai_lines_added,
-                   SUM(total_lines_added)::int AS total_lines_added,
-                   COUNT(DISTINCT commit_hash)::int AS commit_count
-            FROM ai_code_commits WHERE project_id = $1
-            GROUP BY user_email ORDER BY ai_lines_added DESC
-            """,
-            project_id,
-        )
-        # Budget spend estimate from spend_snapshots (sum for member_emails)
-        member_emails = list(proj["member_emails"] or [])
-        spend_row = await conn.fetchrow(
-            """
-            SELECT COALESCE(SUM(spend_cents), 0)::bigint AS total_spend_cents
-            FROM spend_snapshots
-            WHERE billing_cycle_start = (SELECT MAX(billing_cycle_start) FROM spend_snapshots)
-              AND email = ANY($1)
-            """,
-            member_emails,
-        ) if member_emails else None
 
-    total_ai = contrib["total_ai_lines"] or 0
-    total_lines = contrib["total_lines"] or 0
-    spent_cents = spend_row["total_spend_cents"] if spend_row else 0
+def _project_summary_from_row(r) -> dict:
+    proj = {k: v for k, v in r.items() if not k.startswith("agg_")}
+    total_ai = r["agg_total_ai_lines"] or 0
+    total_lines = r["agg_total_lines"] or 0
+    spent_cents = r["agg_spend_cents"] or 0
+    members = r["agg_members"]
+    if isinstance(members, str):
+        members = json.loads(members)
 
     member_list = []
-    for r in members:
-        ai = r["ai_lines_added"] or 0
-        tl = r["total_lines_added"] or 0
+    for m in members or []:
+        ai = m["ai_lines_added"] or 0
+        tl = m["total_lines_added"] or 0
         member_list.append({
-            "user_email": r["user_email"],
+            "user_email": m["user_email"],
             "ai_lines_added": ai,
             "total_lines_added": tl,
             "ai_ratio": round(ai / tl, 4) if tl else 0,
-            "commit_count": r["commit_count"],
+            "commit_count": m["commit_count"],
             "contribution_pct": round(ai / total_ai, 4) if total_ai else 0,
         })
 
     return {
-        "project": dict(proj),
+        "project": proj,
         "budget": {
             "amount": float(proj["budget_amount"]) if proj["budget_amount"] else None,
             "period": proj["budget_period"],
@@ -685,14 +848,19 @@ async def get_project_summary(project_id: int):
             "total_ai_lines": total_ai,
             "total_lines": total_lines,
             "ai_ratio": round(total_ai / total_lines, 4) if total_lines else 0,
-            "commit_count": contrib["commit_count"] or 0,
-            "member_count": contrib["member_count"] or 0,
+            "commit_count": r["agg_commit_count"] or 0,
+            "member_count": r["agg_member_count"] or 0,
         },
         "incentive_pool": float(proj["incentive_pool"]) if proj["incentive_pool"] else None,
         "members": member_list,
     }
 
 
+async def _fetch_project_summaries(conn, project_ids: list[int]) -> dict[int, dict]:
+    rows = await conn.fetch(_PROJECT_SUMMARIES_SQL, project_ids)
+    return {r["id"]: _project_summary_from_row(r) for r in rows}
+
+
 @app.put("/api/projects/{project_id}", dependencies=[Depends(require_api_key)])
 async def update_project(project_id: int, body: ProjectUpdate):
     pool = await get_pool()
@@ -721,6 +889,7 @@ async def update_project(project_id: int, body: ProjectUpdate):
         )
     if not row:
         raise HTTPException(status_code=404, detail="Project not found")
+    cache.bump(cache.PROJECTS)
     return dict(row)
 
 
@@ -735,6 +904,7 @@ async def archive_project(project_id: int):
         )
     if result == "UPDATE 0":
         raise HTTPException(status_code=404, detail="Project not found")
+    cache.bump(cache.PROJECTS)
 
 
 
@@ -755,7 +925,7 @@ async def get_my_contributions(
     Without: raw git contributions list (optional start/end).
     """
     if period_type and period_key:
-        pool = await get_pool()
+        pool = await get_read_pool()
         try:
             async with pool.acquire() as conn:
                 agg = await conn.fetchrow(
@@ -810,7 +980,7 @@ async def get_my_contributions(
             ],
         }
 
-    pool = await get_pool()
+    pool = await get_read_pool()
     conditions = ["g.author_email = $1", "p.status = 'active'"]
     params: list = [email]
     idx = 2
@@ -854,11 +1024,22 @@ async def get_my_contributions(
 
 @app.get("/api/contributions/leaderboard", dependencies=[Depends(require_api_key)])
 async def get_leaderboard(
+    request: Request,
     period_type: str = Query(..., description="weekly | monthly"),
     period_key: str = Query(..., description="e.g. 2026-W08 or 2026-02"),
 ):
     """Leaderboard for the given period. Ranked by ai_lines_added DESC (all members, no Hook filter)."""
-    pool = await get_pool()
+    return await cache.respond(
+        request,
+        "leaderboard",
+        {"period_type": period_type, "period_key": period_key},
+        (cache.CONTRIBUTIONS,),
+        lambda: _leaderboard(period_type, period_key),
+    )
+
+
+async def _leaderboard(period_type: str, period_key: str) -> dict:
+    pool = await get_read_pool()
     try:
         async with pool.acquire() as conn:
             rows = await conn.fetch(
@@ -898,6 +1079,36 @@ async def get_leaderboard(
     }
 
 
+class RecalculateRangeIn(BaseModel):
+    start: date
+    end: date
+    period_types: list[str] = ["weekly", "monthly"]
+    rule_id: int = 1
+
+
+@app.post("/api/contributions/recalculate-range", dependencies=[Depends(require_api_key)], status_code=202)
+async def recalculate_contribution_range(body: RecalculateRangeIn):
+    """
+    Queue a rebuild of contribution_scores for every period of each period_type in [start, end].
+    Poll GET /api/jobs/{job_id}; result.periods holds per-period timings.
+    """
+    if body.start > body.end:
+        raise HTTPException(status_code=400, detail="start must be <= end")
+    bad = [p for p in body.period_types if p not in ("daily", "weekly", "monthly")]
+    if bad or not body.period_types:
+        raise HTTPException(status_code=400, detail=f"period_types must be daily/weekly/monthly, got {bad or '[]'}")
+    job_id, coalesced = await submit_job(
+        "contribution_recalculate_range",
+        {
+            "start": body.start.isoformat(),
+            "end": body.end.isoformat(),
+            "period_types": sorted(set(body.period_types)),
+            "rule_id": body.rule_id,
+        },
+    )
+    return {"ok": True, "job_id": job_id, "coalesced": coalesced}
+
+
 # ─── 激励规则 CRUD ─────────────────────────────────────────────────────────────
 
 
@@ -939,7 +1150,7 @@ def _norm_jsonb(val):
 @app.get("/api/incentive-rules", dependencies=[Depends(require_api_key)])
 async def list_incentive_rules(enabled_only: bool = Query(False)):
     """List incentive rules. enabled_only=true returns only enabled rules."""
-    pool = await get_pool()
+    pool = await get_read_pool()
     try:
         async with pool.acquire() as conn:
             if enabled_only:
@@ -997,7 +1208,7 @@ async def create_incentive_rule(body: IncentiveRuleCreate):
 
 @app.get("/api/incentive-rules/{rule_id}", dependencies=[Depends(require_api_key)])
 async def get_incentive_rule(rule_id: int):
-    pool = await get_pool()
+    pool = await get_read_pool()
     async with pool.acquire() as conn:
         row = await conn.fetchrow(
             "SELECT id, name, period_type, weights, caps, enabled, created_at, updated_at FROM incentive_rules WHERE id = $1",
@@ -1088,11 +1299,9 @@ async def delete_incentive_rule(rule_id: int):
         await conn.execute("UPDATE incentive_rules SET enabled = FALSE WHERE id = $1", rule_id)
 
 
-@app.post("/api/incentive-rules/{rule_id}/recalculate", dependencies=[Depends(require_api_key)])
+@app.post("/api/incentive-rules/{rule_id}/recalculate", dependencies=[Depends(require_api_key)], status_code=202)
 async def recalculate_incentive_rule(rule_id: int):
-    """Trigger contribution calculation for the rule's period_type (latest period)."""
-    from contribution_engine import run_calculate_latest
-
+    """Queue contribution calculation for the rule's period_type (latest period). Poll GET /api/jobs/{job_id}."""
     pool = await get_pool()
     async with pool.acquire() as conn:
         row = await conn.fetchrow(
@@ -1101,31 +1310,37 @@ async def recalculate_incentive_rule(rule_id: int):
         )
     if not row:
         raise HTTPException(status_code=404, detail="Incentive rule not found or disabled")
-    await run_calculate_latest(row["period_type"], rule_id=rule_id)
-    return {"ok": True, "message": f"Recalculated {row['period_type']} for rule {rule_id}."}
+    job_id, coalesced = await submit_job(
+        "contribution_recalculate", {"period_type": row["period_type"], "rule_id": rule_id}
+    )
+    return {
+        "ok": True,
+        "job_id": job_id,
+        "coalesced": coalesced,
+        "message": f"Recalculation of {row['period_type']} for rule {rule_id} queued as job {job_id}.",
+    }
 
 
 # ─── AI Code Commits 查询 API ─────────────────────────────────────────────────
 
 
-def _ts(v) -> str | None:
-    return v.isoformat() if v and hasattr(v, "isoformat") else (str(v) if v else None)
-
-
 @app.get("/api/ai-commits", dependencies=[Depends(require_api_key)])
 async def list_ai_commits(
     project_id: int | None = Query(None),
     user_email: str | None = Query(None),
     start: str | None = Query(None),
     end: str | None = Query(None),
+    q: str | None = Query(None, description="commit message search (websearch_to_tsquery syntax)"),
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=500),
+    cursor: str | None = Query(None, description="next_cursor from the previous page; overrides page"),
+    count: CountMode = Query("auto", description="auto | exact | estimate | none"),
 ):
     """
-    List ai_code_commits with optional filters.
+    List ai_code_commits with optional filters (cursor pagination: commit_ts DESC, id DESC).
     Returns items with ai_lines_added (tab+composer), total_lines_added, ai_ratio, project_name.
     """
-    pool = await get_pool()
+    pool = await get_read_pool()
     conditions: list[str] = []
     params: list = []
     idx = 1
@@ -1146,28 +1361,48 @@ async def list_ai_commits(
         conditions.append(f"c.commit_ts < (${idx}::date + INTERVAL '1 day')")
         params.append(date.fromisoformat(end))
         idx += 1
+    if q and q.strip():
+        # Same expression as idx_ai_code_commits_msg_fts so the GIN index is used
+        conditions.append(
+            f"to_tsvector('simple', COALESCE(c.commit_message, '')) @@ websearch_to_tsquery('simple', ${idx})"
+        )
+        params.append(q.strip())
+        idx += 1
 
     where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
-    offset = (page - 1) * page_size
+    page_conditions = list(conditions)
+    page_params = list(params)
+    offset = 0
+    if cursor:
+        try:
+            after_ts, after_id = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        page_conditions.append(f"(c.commit_ts, c.id) < (${idx}, ${idx + 1})")
+        page_params.extend([after_ts, after_id])
+    else:
+        offset = (page - 1) * page_size
+    page_where = ("WHERE " + " AND ".join(page_conditions)) if page_conditions else ""
 
     async with pool.acquire() as conn:
-        total = await conn.fetchval(
-            f"SELECT COUNT(*) FROM ai_code_commits c {where}", *params
-        )
+        total, total_is_estimate = await count_rows(conn, f"FROM ai_code_commits c {where}", params, count)
         rows = await conn.fetch(
             f"""
-            SELECT c.commit_hash, c.user_email, c.repo_name, c.branch_name,
+            SELECT c.id, c.commit_hash, c.user_email, c.repo_name, c.branch_name,
                    c.tab_lines_added + c.composer_lines_added AS ai_lines_added,
                    c.total_lines_added, c.commit_message, c.commit_ts,
                    c.project_id, p.name AS project_name
             FROM ai_code_commits c
             LEFT JOIN projects p ON p.id = c.project_id
-            {where}
-            ORDER BY c.commit_ts DESC
-            LIMIT {page_size} OFFSET {offset}
+            {page_where}
+            ORDER BY c.commit_ts DESC, c.id DESC
+            LIMIT {page_size + 1} OFFSET {offset}
             """,
-            *params,
+            *page_params,
         )
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    next_cursor = encode_cursor(rows[-1]["commit_ts"], rows[-1]["id"]) if has_more else None
 
     items = []
     for r in rows:
@@ -1184,13 +1419,21 @@ async def list_ai_commits(
             "total_lines_added": total_l,
             "ai_ratio": round(ai / total_l, 4) if total_l else 0,
             "commit_message": r["commit_message"],
-            "commit_ts": _ts(r["commit_ts"]),
+            "commit_ts": r["commit_ts"],
         })
-    return {"total": total, "page": page, "page_size": page_size, "items": items}
+    return ORJSONResponse({
+        "total": total,
+        "total_is_estimate": total_is_estimate,
+        "page": page,
+        "page_size": page_size,
+        "next_cursor": next_cursor,
+        "items": items,
+    })
 
 
 @app.get("/api/ai-commits/summary", dependencies=[Depends(require_api_key)])
 async def ai_commits_summary(
+    request: Request,
     project_id: int | None = Query(None),
     period: str | None = Query(None, description="monthly | weekly"),
     period_key: str | None = Query(None, description="e.g. 2026-02 or 2026-W08"),
@@ -1201,8 +1444,6 @@ async def ai_commits_summary(
     Aggregate ai_code_commits by project+member.
     Supports period filter (monthly/weekly) or explicit start/end.
     """
-    pool = await get_pool()
-
     # Resolve date range from period or explicit start/end
     start_dt: date | None = None
     end_dt: date | None = None
@@ -1216,40 +1457,21 @@ async def ai_commits_summary(
         start_dt = date.fromisoformat(start)
     if end:
         end_dt = date.fromisoformat(end)
+    return await cache.respond(
+        request,
+        "ai_commits_summary",
+        {"project_id": project_id, "start": start_dt, "end": end_dt, "period_key": period_key},
+        (cache.AI_COMMITS, cache.PROJECTS),
+        lambda: _ai_commits_summary(project_id, start_dt, end_dt, period_key),
+    )
 
-    conditions: list[str] = []
-    params: list = []
-    idx = 1
-    if project_id is not None:
-        conditions.append(f"c.project_id = ${idx}")
-        params.append(project_id)
-        idx += 1
-    if start_dt:
-        conditions.append(f"c.commit_ts >= ${idx}")
-        params.append(start_dt)
-        idx += 1
-    if end_dt:
-        conditions.append(f"c.commit_ts < (${idx}::date + INTERVAL '1 day')")
-        params.append(end_dt)
-        idx += 1
-
-    where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
 
+async def _ai_commits_summary(
+    project_id: int | None, start_dt: date | None, end_dt: date | None, period_key: str | None
+) -> dict:
+    pool = await get_read_pool()
     async with pool.acquire() as conn:
-        rows = await conn.fetch(
-            f"""
-            SELECT c.project_id, p.name AS project_name, c.user_email,
-                   SUM(c.tab_lines_added + c.composer_lines_added)::int AS ai_lines_added,
-                   SUM(c.total_lines_added)::int AS total_lines_added,
-                   COUNT(DISTINCT c.commit_hash)::int AS commit_count
-            FROM ai_code_commits c
-            LEFT JOIN projects p ON p.id = c.project_id
-            {where}
-            GROUP BY c.project_id, p.name, c.user_email
-            ORDER BY ai_lines_added DESC
-            """,
-            *params,
-        )
+        rows = await ai_commit_summary_rows(conn, project_id, start_dt, end_dt)
 
     # Group by project
     projects_map: dict = {}
@@ -1294,7 +1516,7 @@ async def my_ai_commits(
     end: str | None = Query(None),
 ):
     """Member-facing: my AI code contribution summary with per-project breakdown and trend."""
-    pool = await get_pool()
+    pool = await get_read_pool()
 
     start_dt: date | None = None
     end_dt: date | None = None
@@ -1362,6 +1584,61 @@ async def my_ai_commits(
     }
 
 
+# ─── 原始数据导出（流式） ─────────────────────────────────────────────────────
+
+
+@app.get("/api/export/{table}", dependencies=[Depends(require_api_key)])
+async def export_table(
+    table: str,
+    start: str | None = Query(None, description="YYYY-MM-DD (default: 90 days ago)"),
+    end: str | None = Query(None, description="YYYY-MM-DD inclusive (default: today)"),
+    fmt: str = Query("ndjson", alias="format", description="ndjson | csv"),
+    gzip: bool = Query(False),
+):
+    """
+    Stream a raw table dump for [start, end] (agent_sessions by ended_at, daily_usage by day,
+    ai_code_commits by commit_ts, contribution_scores by overlapping period).
+    """
+    if table not in exports.EXPORTS:
+        raise HTTPException(404, f"unknown export: {table}; expected one of {', '.join(exports.EXPORTS)}")
+    if fmt not in exports.FORMATS:
+        raise HTTPException(400, "format must be ndjson or csv")
+    try:
+        start_date, end_date = parse_date_range(start, end, default_days=90)
+    except ValueError as e:
+        raise HTTPException(400, f"invalid date: {e}") from e
+    if start_date > end_date:
+        raise HTTPException(400, "start must not be after end")
+    # Taken here rather than inside the body, so concurrent requests get 429 instead of queueing
+    if not await exports.try_acquire_slot():
+        raise HTTPException(429, "too many exports in progress", headers={"Retry-After": "30"})
+    released = False
+
+    def release():
+        nonlocal released
+        if not released:
+            released = True
+            exports.slots().release()
+
+    async def body():
+        try:
+            async for chunk in exports.stream(table, start_date, end_date, fmt, gzip):
+                yield chunk
+        finally:
+            release()
+
+    filename = f"{table}_{start_date}_{end_date}.{fmt}"
+    if gzip:
+        filename += ".gz"
+    # background: also frees the slot if the body was never started (client gone before streaming)
+    return StreamingResponse(
+        body(),
+        media_type="application/gzip" if gzip else exports.FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        background=BackgroundTask(release),
+    )
+
+
 # ─── 健康检查与闭环健康 ───────────────────────────────────────────────────────
 
 
@@ -1370,15 +1647,102 @@ async def health():
     return {"status": "ok"}
 
 
-@app.post("/api/admin/trigger-git-collect", status_code=200, dependencies=[Depends(require_api_key)])
-async def trigger_git_collect():
-    """Manually trigger Git collection for all active projects with git_repos."""
+@app.get("/ready")
+async def ready():
+    """Readiness (public, for load balancers / orchestrators), separate from /health liveness:
+    503 until startup finished (migrations applied, background loops started), while shutting
+    down, or when the database does not answer. The initial Cursor sync is not waited for."""
+    checks: dict = {"startup": _startup["ready"]}
+    ok = _startup["ready"]
     try:
-        await run_git_collect()
-        return {"ok": True, "message": "Git collect completed"}
+        pool = await get_pool()
+        async with pool.acquire(timeout=settings.ready_timeout_seconds) as conn:
+            await conn.fetchval("SELECT 1", timeout=settings.ready_timeout_seconds)
+        checks["database"] = "ok"
     except Exception as e:
-        log.exception("Git collect failed: %s", e)
-        raise HTTPException(status_code=500, detail=str(e))
+        checks["database"] = f"error: {type(e).__name__}"
+        ok = False
+    body = {
+        "status": "ready" if ok else "not_ready",
+        "run_mode": settings.run_mode,
+        "checks": checks,
+        "migrations_applied": _startup["migrations"],
+    }
+    return ORJSONResponse(body, status_code=200 if ok else 503)
+
+
+@app.post("/api/admin/trigger-git-collect", status_code=202, dependencies=[Depends(require_api_key)])
+async def trigger_git_collect():
+    """Queue Git collection for all active projects with git_repos. Poll GET /api/jobs/{job_id}."""
+    job_id, coalesced = await submit_job("git_collect")
+    return {"ok": True, "job_id": job_id, "coalesced": coalesced, "message": f"Git collect queued as job {job_id}"}
+
+
+@app.post("/api/admin/trigger-parquet-export", status_code=202, dependencies=[Depends(require_api_key)])
+async def trigger_parquet_export():
+    """Queue a Parquet snapshot export (see parquet_export). Poll GET /api/jobs/{job_id}."""
+    job_id, coalesced = await submit_job("parquet_export")
+    return {"ok": True, "job_id": job_id, "coalesced": coalesced, "message": f"Parquet export queued as job {job_id}"}
+
+
+@app.get("/api/admin/metrics", dependencies=[Depends(require_api_key)])
+async def admin_metrics():
+    """In-process counters: response cache, single-flight coalescing, workspace resolver, session ingest buffer,
+    scheduler leadership, cross-process notifications, read-replica routing, per-endpoint DB / serialisation timing."""
+    return {
+        "response_cache": {"enabled": settings.response_cache_enabled, **cache.response_cache.stats()},
+        "singleflight": singleflight.stats(),
+        "workspace_resolver": workspace_resolver.stats(),
+        "session_buffer": session_buffer.stats(),
+        "scheduler_leader": leader.stats(),
+        "pubsub": pubsub.stats(),
+        "read_pool": read_pool_stats(),
+        "request_timing": request_timing.stats(),
+        "run_mode": settings.run_mode,
+    }
+
+
+@app.post("/api/admin/profile", dependencies=[Depends(require_api_key)])
+async def admin_profile(
+    seconds: float = Query(10, gt=0),
+    interval_ms: float = Query(10, ge=1, le=1000),
+    mode: str = Query("all", description="all | loop | tasks"),
+):
+    """Sample this process for `seconds` and return folded stacks (flamegraph.pl / speedscope input).
+    Requires PROFILER_ENABLED; one profile at a time, at most PROFILER_MAX_SECONDS. See profiler."""
+    if not settings.profiler_enabled:
+        raise HTTPException(403, "profiler disabled (set PROFILER_ENABLED=true)")
+    if seconds > settings.profiler_max_seconds:
+        raise HTTPException(400, f"seconds must be at most {settings.profiler_max_seconds:g}")
+    if mode not in profiler.MODES:
+        raise HTTPException(400, f"mode must be one of {', '.join(profiler.MODES)}")
+    try:
+        body, samples = await profiler.profile(seconds, interval_ms, mode)
+    except profiler.ProfilerBusy:
+        retry = f"{settings.profiler_max_seconds:.0f}"
+        raise HTTPException(409, "a profile is already running", headers={"Retry-After": retry}) from None
+    return PlainTextResponse(body, headers={"X-Profile-Samples": str(samples)})
+
+
+# ─── 后台任务状态 ─────────────────────────────────────────────────────────────
+
+
+@app.get("/api/jobs", dependencies=[Depends(require_api_key)])
+async def list_background_jobs(
+    job_type: str | None = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+):
+    """Recent background jobs, newest first."""
+    return await list_jobs(job_type, limit)
+
+
+@app.get("/api/jobs/{job_id}", dependencies=[Depends(require_api_key)])
+async def get_background_job(job_id: int):
+    """Job status: queued | running | succeeded | failed, with progress, duration and error."""
+    job = await get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 
 @app.get("/api/health/loop", dependencies=[Depends(require_api_key)])
@@ -1387,7 +1751,7 @@ async def health_loop(days: int = Query(7, ge=1, le=30)):
     Loop health: whether we have received any Hook sessions in the last N days.
     Used by admin UI to show "loop not connected" guidance when loop_ok is false.
     """
-    pool = await get_pool()
+    pool = await get_read_pool()
     try:
         async with pool.acquire() as conn:
             row = await conn.fetchrow(
@@ -0,0 +1,56 @@
+"""
+Keyset pagination helpers for list endpoints ordered by (timestamp DESC, id DESC).
+
+- Cursor tokens are opaque base64url strings wrapping the last row's (timestamp, id).
+- Totals are optional: exact COUNT(*) when the planner estimates the result is small,
+  otherwise the planner's row estimate (flagged total_is_estimate) so deep listings
+  never pay for a full count.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Literal
+
+from config import settings
+
+CountMode = Literal["auto", "exact", "estimate", "none"]
+
+
+def encode_cursor(ts: datetime, row_id: int) -> str:
+    raw = json.dumps([ts.isoformat(), row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> tuple[datetime, int]:
+    """Inverse of encode_cursor. Raises ValueError on a malformed token."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        ts_s, row_id = json.loads(raw)
+        return datetime.fromisoformat(ts_s), int(row_id)
+    except (ValueError, TypeError, json.JSONDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {token!r}") from e
+
+
+async def estimate_rows(conn, query: str, *params) -> int:
+    """Planner row estimate for query (EXPLAIN only, the query is not executed)."""
+    plan = await conn.fetchval(f"EXPLAIN (FORMAT JSON) {query}", *params)
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def count_rows(conn, from_where: str, params: list, mode: CountMode) -> tuple[int | None, bool]:
+    """
+    Count rows of "SELECT ... {from_where}" per mode. Returns (total, is_estimate).
+    auto: estimate first; run the exact COUNT(*) only when the estimate is under
+    settings.exact_count_threshold.
+    """
+    if mode == "none":
+        return None, False
+    if mode == "exact":
+        return await conn.fetchval(f"SELECT COUNT(*) {from_where}", *params), False
+    estimate = await estimate_rows(conn, f"SELECT 1 {from_where}", *params)
+    if mode == "auto" and estimate < settings.exact_count_threshold:
+        return await conn.fetchval(f"SELECT COUNT(*) {from_where}", *params), False
+    return estimate, True
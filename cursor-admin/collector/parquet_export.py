@@ -0,0 +1,201 @@
+"""
+Parquet snapshots of the fact tables for BI / DuckDB (optional: pip install pyarrow, or
+poetry install -E parquet).
+
+Layout (hive-style, one file per table-month, months in report timezone):
+
+    {parquet_export_dir}/{table}/month=YYYY-MM/part-0.parquet
+    {parquet_export_dir}/{table}/_manifest.json
+
+- Months from the table's first row up to the current month are considered. A month is
+  written when its file is missing, or it has not yet been exported after it closed plus
+  parquet_export_grace_days (late hook uploads / usage re-syncs); such exports are marked
+  final and never rewritten. The current month is rewritten on every run.
+- Rows are read through the same server-side cursor queries as the streaming exports and
+  written batch by batch (row group per batch), to a temp file that replaces the old one
+  atomically, so readers never see a half-written month.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from collections.abc import Awaitable, Callable
+from datetime import date, datetime, timedelta
+
+from config import settings
+from database import get_pool
+from exports import EXPORTS, args
+from timerange import report_tz, today
+
+log = logging.getLogger("parquet_export")
+
+# table -> time column the month partition is taken from (must match EXPORTS[table] bounds)
+TABLES = {
+    "agent_sessions": "ended_at",
+    "daily_usage": "day",
+    "ai_code_commits": "commit_ts",
+}
+
+MANIFEST = "_manifest.json"
+
+Progress = Callable[[int, int | None, str | None], Awaitable[None]]
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise RuntimeError("Parquet export requires pyarrow (poetry install -E parquet)") from e
+    return pyarrow
+
+
+def _arrow_type(pa, pg_type: str):
+    return {
+        "int2": pa.int16(),
+        "int4": pa.int32(),
+        "int8": pa.int64(),
+        "float4": pa.float32(),
+        "float8": pa.float64(),
+        "numeric": pa.float64(),
+        "bool": pa.bool_(),
+        "date": pa.date32(),
+        "timestamptz": pa.timestamp("us", tz="UTC"),
+        "timestamp": pa.timestamp("us"),
+        "text[]": pa.list_(pa.string()),
+    }.get(pg_type, pa.string())
+
+
+def _column(pa, values: list, typ):
+    if pa.types.is_floating(typ):
+        values = [None if v is None else float(v) for v in values]
+    elif pa.types.is_string(typ):
+        values = [None if v is None else str(v) for v in values]
+    return pa.array(values, type=typ)
+
+
+def month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def next_month(d: date) -> date:
+    return (d.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def months_between(first: date, last: date) -> list[date]:
+    months, m = [], month_start(first)
+    while m <= last:
+        months.append(m)
+        m = next_month(m)
+    return months
+
+
+def _load_manifest(table_dir: str) -> dict:
+    try:
+        with open(os.path.join(table_dir, MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _save_manifest(table_dir: str, manifest: dict) -> None:
+    tmp = os.path.join(table_dir, MANIFEST + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, os.path.join(table_dir, MANIFEST))
+
+
+def months_to_write(months: list[date], manifest: dict, table_dir: str, current: date) -> list[date]:
+    """Months that are missing, not yet final, or current (see module docstring)."""
+    out = []
+    for m in months:
+        key = m.strftime("%Y-%m")
+        entry = manifest.get(key)
+        path = os.path.join(table_dir, f"month={key}", "part-0.parquet")
+        if m >= current or not entry or not entry.get("final") or not os.path.exists(path):
+            out.append(m)
+    return out
+
+
+async def _first_day(conn, table: str) -> date | None:
+    first = await conn.fetchval(f"SELECT MIN({TABLES[table]}) FROM {table}")
+    if isinstance(first, datetime):
+        return first.astimezone(report_tz()).date()
+    return first
+
+
+async def _write_month(pool, table: str, month: date, path: str) -> int:
+    """Stream one table-month into path (atomically). Returns the row count."""
+    pa = _pyarrow()
+    pq = pa.parquet
+    spec = EXPORTS[table]
+    tmp = path + ".tmp"
+    rows = 0
+    async with pool.acquire() as conn:
+        async with conn.transaction(isolation="repeatable_read", readonly=True):
+            stmt = await conn.prepare(spec.sql)
+            attrs = stmt.get_attributes()
+            schema = pa.schema([(a.name, _arrow_type(pa, a.type.name)) for a in attrs])
+            writer = pq.ParquetWriter(tmp, schema, compression=settings.parquet_compression)
+            try:
+                batch: list = []
+
+                def flush(records: list):
+                    cols = [_column(pa, [r[i] for r in records], f.type) for i, f in enumerate(schema)]
+                    writer.write_table(pa.Table.from_arrays(cols, schema=schema))
+
+                cursor = stmt.cursor(
+                    *args(spec, month, next_month(month) - timedelta(days=1)),
+                    prefetch=settings.export_fetch_size,
+                )
+                async for record in cursor:
+                    batch.append(record)
+                    if len(batch) >= settings.export_fetch_size:
+                        await asyncio.to_thread(flush, batch)
+                        rows += len(batch)
+                        batch = []
+                if batch or rows == 0:
+                    await asyncio.to_thread(flush, batch)
+                    rows += len(batch)
+            finally:
+                writer.close()
+    os.replace(tmp, path)
+    return rows
+
+
+async def run_parquet_export(progress: Progress | None = None) -> dict:
+    """Export every table in TABLES; returns per-table written months and row counts."""
+    _pyarrow()
+    pool = await get_pool()
+    current = month_start(today())
+    grace = timedelta(days=settings.parquet_export_grace_days)
+    result: dict = {}
+    done = 0
+    for table in TABLES:
+        table_dir = os.path.join(settings.parquet_export_dir, table)
+        os.makedirs(table_dir, exist_ok=True)
+        manifest = _load_manifest(table_dir)
+        async with pool.acquire() as conn:
+            first = await _first_day(conn, table)
+        months = months_between(first, current) if first else []
+        pending = months_to_write(months, manifest, table_dir, current)
+        written: dict[str, int] = {}
+        for m in pending:
+            key = m.strftime("%Y-%m")
+            part_dir = os.path.join(table_dir, f"month={key}")
+            os.makedirs(part_dir, exist_ok=True)
+            n = await _write_month(pool, table, m, os.path.join(part_dir, "part-0.parquet"))
+            manifest[key] = {
+                "rows": n,
+                "exported_at": datetime.now(report_tz()).isoformat(),
+                "final": today() >= next_month(m) + grace,
+            }
+            _save_manifest(table_dir, manifest)
+            written[key] = n
+        result[table] = {"months": len(months), "written": written}
+        done += 1
+        log.info("Parquet export %s: %d/%d months written", table, len(written), len(months))
+        if progress:
+            await progress(done, len(TABLES), f"{table}: {len(written)} months written")
+    return result
@@ -0,0 +1,325 @@
+"""
+Monthly range partitioning and retention for agent_sessions (ended_at) and ai_code_commits
+(commit_ts).
+
+- convert: one-off, offline migration of an existing heap table. In one transaction the table
+  is locked, renamed aside, recreated as PARTITION BY RANGE with one partition per month
+  that holds data (plus a DEFAULT partition for out-of-range timestamps), copied, and
+  dropped. The migrations are then re-applied so indexes and summary views are rebuilt on
+  the partitioned table. The id sequence is kept.
+- maintain (scheduled daily): creates partitions up to partition_premake_months ahead. When
+  a retention is configured, each month older than it is rolled up into the daily archive
+  tables (014_partitioning.sql), which the summary views include. The partition is then
+  detached (kept as a standalone table) or dropped, in the same transaction, so totals are
+  never counted twice.
+- Month boundaries follow summaries.MV_TIMEZONE, so archived days never straddle partitions.
+- Heap (not yet converted) tables are left alone by maintain.
+
+Usage: python partitions.py status | convert TABLE [TABLE ...] | maintain
+"""
+
+import asyncio
+import logging
+import re
+import sys
+import zoneinfo
+from datetime import date, datetime, time
+
+from config import settings
+from database import apply_migrations, close_pool, get_pool
+from summaries import MV_TIMEZONE
+
+log = logging.getLogger("partitions")
+
+TABLES = {"agent_sessions": "ended_at", "ai_code_commits": "commit_ts"}
+
+_DDL = {
+    "agent_sessions": """
+        CREATE TABLE agent_sessions (
+            id                  INT         NOT NULL DEFAULT nextval('agent_sessions_id_seq'),
+            conversation_id     TEXT        NOT NULL,
+            user_email          TEXT        NOT NULL,
+            machine_id          TEXT,
+            workspace_roots     TEXT[],
+            primary_workspace   TEXT GENERATED ALWAYS AS (
+                                    CASE WHEN array_length(workspace_roots, 1) > 0
+                                         THEN workspace_roots[1]
+                                         ELSE NULL
+                                    END
+                                ) STORED,
+            started_at          TIMESTAMPTZ,
+            ended_at            TIMESTAMPTZ NOT NULL,
+            duration_seconds    INT,
+            created_at          TIMESTAMPTZ DEFAULT NOW(),
+            project_id          INT         REFERENCES projects(id),
+            PRIMARY KEY (id, ended_at)
+        ) PARTITION BY RANGE (ended_at)
+    """,
+    "ai_code_commits": """
+        CREATE TABLE ai_code_commits (
+            id                      INT  NOT NULL DEFAULT nextval('ai_code_commits_id_seq'),
+            commit_hash             TEXT NOT NULL,
+            user_id                 TEXT,
+            user_email              TEXT NOT NULL,
+            repo_name               TEXT NOT NULL,
+            branch_name             TEXT,
+            project_id              INT REFERENCES projects(id),
+            total_lines_added       INT NOT NULL DEFAULT 0,
+            total_lines_deleted     INT NOT NULL DEFAULT 0,
+            tab_lines_added         INT NOT NULL DEFAULT 0,
+            tab_lines_deleted       INT NOT NULL DEFAULT 0,
+            composer_lines_added    INT NOT NULL DEFAULT 0,
+            composer_lines_deleted  INT NOT NULL DEFAULT 0,
+            non_ai_lines_added      INT NOT NULL DEFAULT 0,
+            non_ai_lines_deleted    INT NOT NULL DEFAULT 0,
+            commit_message          TEXT,
+            commit_ts               TIMESTAMPTZ NOT NULL,
+            synced_at               TIMESTAMPTZ DEFAULT NOW(),
+            PRIMARY KEY (id, commit_ts)
+        ) PARTITION BY RANGE (commit_ts)
+    """,
+}
+
+# Copied on convert (generated primary_workspace is recomputed)
+_COLUMNS = {
+    "agent_sessions": (
+        "id, conversation_id, user_email, machine_id, workspace_roots, started_at, ended_at, "
+        "duration_seconds, created_at, project_id"
+    ),
+    "ai_code_commits": (
+        "id, commit_hash, user_id, user_email, repo_name, branch_name, project_id, "
+        "total_lines_added, total_lines_deleted, tab_lines_added, tab_lines_deleted, "
+        "composer_lines_added, composer_lines_deleted, non_ai_lines_added, non_ai_lines_deleted, "
+        "commit_message, commit_ts, synced_at"
+    ),
+}
+
+# Daily rollup of one partition into its archive table (additive, see 014_partitioning.sql)
+_ROLLUP = {
+    "agent_sessions": f"""
+        INSERT INTO agent_session_daily_archive AS a
+            (day, user_email, primary_workspace, project_id, session_count, total_seconds, first_seen, last_seen)
+        SELECT (ended_at AT TIME ZONE '{MV_TIMEZONE}')::date, user_email, primary_workspace, project_id,
+               COUNT(*), COALESCE(SUM(duration_seconds), 0), MIN(ended_at), MAX(ended_at)
+        FROM {{partition}}
+        GROUP BY 1, 2, 3, 4
+        ON CONFLICT (day, user_email, primary_workspace, project_id) DO UPDATE SET
+            session_count = a.session_count + EXCLUDED.session_count,
+            total_seconds = a.total_seconds + EXCLUDED.total_seconds,
+            first_seen    = LEAST(a.first_seen, EXCLUDED.first_seen),
+            last_seen     = GREATEST(a.last_seen, EXCLUDED.last_seen)
+    """,
+    "ai_code_commits": f"""
+        INSERT INTO ai_commit_daily_archive AS a
+            (day, project_id, user_email, ai_lines_added, total_lines_added, commit_count)
+        SELECT (commit_ts AT TIME ZONE '{MV_TIMEZONE}')::date, project_id, user_email,
+               SUM(tab_lines_added + composer_lines_added), SUM(total_lines_added), COUNT(*)
+        FROM {{partition}}
+        GROUP BY 1, 2, 3
+        ON CONFLICT (day, project_id, user_email) DO UPDATE SET
+            ai_lines_added    = a.ai_lines_added + EXCLUDED.ai_lines_added,
+            total_lines_added = a.total_lines_added + EXCLUDED.total_lines_added,
+            commit_count      = a.commit_count + EXCLUDED.commit_count
+    """,
+}
+
+_PARTITION_RE = re.compile(r"_p(\d{4})(\d{2})$")
+
+
+def _tz():
+    return zoneinfo.ZoneInfo(MV_TIMEZONE)
+
+
+def month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def add_months(d: date, n: int) -> date:
+    y, m = divmod(d.year * 12 + d.month - 1 + n, 12)
+    return date(y, m + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def partition_month(name: str) -> date | None:
+    m = _PARTITION_RE.search(name)
+    return date(int(m.group(1)), int(m.group(2)), 1) if m else None
+
+
+def retention_months(table: str) -> int:
+    return {
+        "agent_sessions": settings.agent_sessions_retention_months,
+        "ai_code_commits": settings.ai_code_commits_retention_months,
+    }[table]
+
+
+def _bound(month: date) -> str:
+    return datetime.combine(month, time.min, tzinfo=_tz()).isoformat()
+
+
+async def is_partitioned(conn, table: str) -> bool:
+    return bool(await conn.fetchval("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass($1)", table))
+
+
+async def list_partitions(conn, table: str) -> list[str]:
+    rows = await conn.fetch(
+        """
+        SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass($1) ORDER BY c.relname
+        """,
+        table,
+    )
+    return [r["relname"] for r in rows]
+
+
+async def create_partition(conn, table: str, month: date) -> bool:
+    """Create the partition for month if missing; returns True if created."""
+    name = partition_name(table, month)
+    if await conn.fetchval("SELECT to_regclass($1) IS NOT NULL", name):
+        return False
+    await conn.execute(
+        f"CREATE TABLE {name} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{_bound(month)}') TO ('{_bound(add_months(month, 1))}')"
+    )
+    return True
+
+
+async def ensure_partitions(conn, table: str, today: date) -> list[str]:
+    """Partitions for the current month and partition_premake_months ahead."""
+    created = []
+    current = month_start(today)
+    for i in range(settings.partition_premake_months + 1):
+        month = add_months(current, i)
+        try:
+            if await create_partition(conn, table, month):
+                created.append(partition_name(table, month))
+        except Exception as e:
+            # e.g. rows for that month already landed in the DEFAULT partition
+            log.error("Could not create partition %s: %s", partition_name(table, month), e)
+    return created
+
+
+async def convert(conn, table: str, today: date) -> dict:
+    """Rebuild a heap table as a monthly partitioned table (see module docstring)."""
+    col = TABLES[table]
+    async with conn.transaction():
+        if await is_partitioned(conn, table):
+            return {"table": table, "converted": False}
+        await conn.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+        lo, hi, rows = await conn.fetchrow(f"SELECT MIN({col}), MAX({col}), COUNT(*) FROM {table}")
+        old = f"{table}_unpartitioned"
+        await conn.execute(f"ALTER TABLE {table} RENAME TO {old}")
+        await conn.execute(f"ALTER INDEX {table}_pkey RENAME TO {old}_pkey")
+        await conn.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE")
+        await conn.execute(_DDL[table])
+        await conn.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+        first = month_start(lo.astimezone(_tz()).date()) if lo else month_start(today)
+        last = month_start(hi.astimezone(_tz()).date()) if hi else month_start(today)
+        month = first
+        while month <= last:
+            await create_partition(conn, table, month)
+            month = add_months(month, 1)
+        await ensure_partitions(conn, table, today)
+        cols = _COLUMNS[table]
+        await conn.execute(f"INSERT INTO {table} ({cols}) SELECT {cols} FROM {old}")
+        copied = await conn.fetchval(f"SELECT COUNT(*) FROM {table}")
+        if copied != rows:
+            raise RuntimeError(f"{table}: copied {copied} of {rows} rows")
+        await conn.execute(f"DROP TABLE {old} CASCADE")  # also drops the summary views
+        await conn.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+        await apply_migrations(conn, reapply=True)  # indexes on the new parent, summary views
+    log.info("Converted %s to monthly partitions (%d rows)", table, rows)
+    return {"table": table, "converted": True, "rows": rows}
+
+
+async def apply_retention(conn, table: str, today: date) -> list[str]:
+    """Roll up and detach/drop partitions older than the table's retention; returns their names."""
+    keep = retention_months(table)
+    if keep <= 0:
+        return []
+    cutoff = add_months(month_start(today), -keep)
+    retired = []
+    for name in await list_partitions(conn, table):
+        month = partition_month(name)
+        if month is None or month >= cutoff:
+            continue
+        async with conn.transaction():
+            await conn.execute(_ROLLUP[table].format(partition=name))
+            await conn.execute(f"ALTER TABLE {table} DETACH PARTITION {name}")
+            if settings.partition_retention_mode == "drop":
+                await conn.execute(f"DROP TABLE {name}")
+        log.info(
+            "Retired partition %s (%s)", name, "dropped" if settings.partition_retention_mode == "drop" else "detached"
+        )
+        retired.append(name)
+    return retired
+
+
+async def run_partition_maintenance(today: date | None = None) -> dict:
+    """Premake future partitions and apply retention on every partitioned table."""
+    from timerange import today as report_today
+
+    today = today or report_today()
+    pool = await get_pool()
+    result = {}
+    async with pool.acquire() as conn:
+        for table in TABLES:
+            if not await is_partitioned(conn, table):
+                continue
+            result[table] = {
+                "created": await ensure_partitions(conn, table, today),
+                "retired": await apply_retention(conn, table, today),
+            }
+    return result
+
+
+async def _status() -> None:
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        for table in TABLES:
+            if not await is_partitioned(conn, table):
+                print(f"{table}: not partitioned")
+                continue
+            rows = await conn.fetch(
+                """
+                SELECT c.relname, c.reltuples::bigint AS est_rows, pg_get_expr(c.relpartbound, c.oid) AS bound
+                FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = to_regclass($1) ORDER BY c.relname
+                """,
+                table,
+            )
+            print(f"{table}: {len(rows)} partitions, retention {retention_months(table) or 'none'} months")
+            for r in rows:
+                print(f"  {r['relname']:<32} ~{max(r['est_rows'], 0):>10} rows  {r['bound']}")
+
+
+async def _main(argv: list[str]) -> int:
+    from timerange import today
+
+    if not argv or argv[0] not in ("status", "convert", "maintain"):
+        print(__doc__.strip().splitlines()[-1])
+        return 2
+    try:
+        if argv[0] == "status":
+            await _status()
+        elif argv[0] == "convert":
+            unknown = [t for t in argv[1:] if t not in TABLES]
+            if not argv[1:] or unknown:
+                print(f"convert expects one or more of: {', '.join(TABLES)}")
+                return 2
+            pool = await get_pool()
+            async with pool.acquire() as conn:
+                for table in argv[1:]:
+                    print(await convert(conn, table, today()))
+        else:
+            print(await run_partition_maintenance())
+    finally:
+        await close_pool()
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
@@ -0,0 +1,145 @@
+"""
+On-demand sampling profiler for POST /api/admin/profile (stdlib only, no tracing hooks).
+
+While a profile runs, a daemon thread wakes every interval and records:
+
+- loop:  the event-loop thread's Python stack, i.e. where CPU time goes (request handlers,
+         scheduler jobs, serialisation). Samples taken while the loop waits in select()
+         are folded into "loop;<idle>", so idle vs busy share is visible.
+- task:  the await chain of every pending asyncio task, i.e. where work is waiting (git
+         subprocess output, DB round trips, Cursor API calls). Root frame is the task name.
+- thread: other threads that are not blocked in a wait (asyncio.to_thread work, e.g. the
+         Parquet flush).
+
+Output is folded stacks, one "root;outer;...;inner count" line per distinct stack, which
+flamegraph.pl, inferno and speedscope read directly. Only one profile runs at a time and its
+duration is capped by settings.profiler_max_seconds; between profiles nothing is sampled.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+from collections import Counter
+
+from config import settings
+
+MODES = ("all", "loop", "tasks")
+
+_lock = threading.Lock()
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+def _label(frame) -> str:
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _thread_stack(frame) -> list[str]:
+    labels = []
+    while frame is not None:
+        labels.append(_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+# Leaf frames of a thread blocked in C (select, lock / queue wait): the wait has no Python frame
+_WAIT_LEAVES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),  # idle executor worker (SimpleQueue.get)
+}
+
+
+def _is_waiting(frame) -> bool:
+    filename = os.path.basename(frame.f_code.co_filename)
+    # uvloop runs the loop in C: an idle loop thread's innermost Python frame is asyncio.run's
+    return filename == "runners.py" or (filename, frame.f_code.co_name) in _WAIT_LEAVES
+
+
+def _await_chain(coro) -> list[str]:
+    labels = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None) or getattr(coro, "ag_frame", None)
+        if frame is None:
+            break
+        labels.append(_label(frame))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None) or getattr(coro, "ag_await", None)
+    return labels
+
+
+class _Sampler(threading.Thread):
+    def __init__(self, loop, loop_thread: int, caller: asyncio.Task | None, interval: float, mode: str):
+        super().__init__(name="profiler-sampler", daemon=True)
+        self.loop = loop
+        self.loop_thread = loop_thread
+        self.caller = caller  # the task waiting for the profile: left out of the task stacks
+        self.interval = interval
+        self.mode = mode
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self.stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self.stop_event.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        self.samples += 1
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            if ident == self.loop_thread:
+                if self.mode in ("all", "loop"):
+                    stack = ["loop", "<idle>"] if _is_waiting(frame) else ["loop", *_thread_stack(frame)]
+                    self.stacks[";".join(stack)] += 1
+            elif self.mode == "all" and not _is_waiting(frame):
+                self.stacks[";".join([f"thread:{names.get(ident, ident)}", *_thread_stack(frame)])] += 1
+        if self.mode in ("all", "tasks"):
+            try:
+                tasks = list(asyncio.all_tasks(self.loop))
+            except RuntimeError:  # task set changed while copying; skip this sample's tasks
+                return
+            for task in tasks:
+                if task is self.caller:
+                    continue
+                chain = _await_chain(task.get_coro())
+                if chain:
+                    self.stacks[";".join([f"task:{task.get_name()}", *chain])] += 1
+
+
+def folded(stacks: Counter) -> str:
+    return "".join(f"{stack} {n}\n" for stack, n in sorted(stacks.items()))
+
+
+async def profile(seconds: float, interval_ms: float, mode: str = "all") -> tuple[str, int]:
+    """Sample the running loop for seconds; returns (folded stacks, samples taken).
+
+    Raises ProfilerBusy when another profile is running. Sampling stops when the caller is
+    cancelled (e.g. the client disconnects).
+    """
+    if not _lock.acquire(blocking=False):
+        raise ProfilerBusy()
+    seconds = min(seconds, settings.profiler_max_seconds)
+    try:
+        sampler = _Sampler(
+            asyncio.get_running_loop(), threading.get_ident(), asyncio.current_task(), interval_ms / 1000, mode
+        )
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            sampler.stop_event.set()
+            await asyncio.to_thread(sampler.join)
+        return folded(sampler.stacks), sampler.samples
+    finally:
+        _lock.release()
@@ -0,0 +1,142 @@
+"""
+Cross-process notifications over Postgres LISTEN/NOTIFY, for run_mode=api / worker splits and
+multi-worker deployments.
+
+- Cache: every cache.bump() is published (domains coalesced per event-loop tick) and other
+  processes apply it with cache.bump_local(), so their response caches and the workspace
+  resolver drop stale entries at once instead of after the TTL. The worker's syncs thereby
+  invalidate the API processes' caches.
+- Jobs: jobs.submit() notifies JOBS_CHANNEL; every process with a started job runner wakes
+  it, so a worker claims jobs queued by the API without waiting for its next poll.
+
+Listening holds one dedicated connection. When it drops, the listener reconnects and bumps
+every domain locally, since notifications sent meanwhile are lost.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+
+import cache
+from config import settings
+from database import connect, get_pool
+from jobs import JOBS_CHANNEL, runner as job_runner
+
+log = logging.getLogger("pubsub")
+
+CACHE_CHANNEL = "cursor_admin_cache"
+
+
+class PubSub:
+    def __init__(self):
+        self.identity = f"{socket.gethostname()}:{os.getpid()}:{id(self):x}"
+        self._conn = None
+        self._task: asyncio.Task | None = None
+        self._pending: set[str] = set()
+        self._flush: asyncio.Task | None = None
+        self._stats = {"published": 0, "received": 0, "publish_errors": 0, "reconnects": 0}
+
+    @property
+    def started(self) -> bool:
+        return self._task is not None
+
+    # ─── publish ───
+
+    def _on_local_bump(self, domains: tuple[str, ...]) -> None:
+        self._pending.update(domains)
+        if self._flush is None or self._flush.done():
+            try:
+                self._flush = asyncio.get_running_loop().create_task(self._publish_pending())
+            except RuntimeError:  # bump outside the event loop (scripts): nothing to tell
+                self._pending.clear()
+
+    async def _publish_pending(self) -> None:
+        await asyncio.sleep(0)  # coalesce bumps made in the same tick
+        while self._pending:  # bumps made while a publish was in flight go out next
+            domains, self._pending = sorted(self._pending), set()
+            payload = json.dumps({"sender": self.identity, "domains": domains})
+            try:
+                pool = await get_pool()
+                async with pool.acquire() as conn:
+                    await conn.execute("SELECT pg_notify($1, $2)", CACHE_CHANNEL, payload)
+                self._stats["published"] += 1
+            except Exception as e:
+                # Other processes fall back to the cache TTL for this bump
+                self._stats["publish_errors"] += 1
+                log.warning("Cache invalidation publish failed (%s): %s", ",".join(domains), e)
+
+    # ─── listen ───
+
+    def _on_notify(self, _conn, _pid, channel: str, payload: str) -> None:
+        if channel == JOBS_CHANNEL:
+            job_runner.wake()
+            return
+        try:
+            msg = json.loads(payload)
+        except ValueError:
+            return
+        if msg.get("sender") == self.identity:
+            return
+        domains = [d for d in msg.get("domains", []) if d in cache.DOMAINS]
+        if domains:
+            self._stats["received"] += 1
+            cache.bump_local(*domains)
+
+    async def _listen(self) -> None:
+        conn = await connect()
+        await conn.add_listener(CACHE_CHANNEL, self._on_notify)
+        await conn.add_listener(JOBS_CHANNEL, self._on_notify)
+        self._conn = conn
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(settings.pubsub_reconnect_seconds)
+            if self._conn is not None and not self._conn.is_closed():
+                continue
+            try:
+                await self._listen()
+            except Exception as e:
+                log.warning("LISTEN reconnect failed: %s", e)
+                continue
+            self._stats["reconnects"] += 1
+            cache.bump_local(*cache.DOMAINS)
+            job_runner.wake()
+            log.info("LISTEN connection re-established; local caches invalidated")
+
+    async def start(self) -> None:
+        if not settings.pubsub_enabled or self._task:
+            return
+        try:
+            await self._listen()
+        except Exception as e:
+            log.warning("LISTEN connection failed, retrying in background: %s", e)
+        cache.on_bump(self._on_local_bump)
+        self._task = asyncio.create_task(self._watch(), name="pubsub-watch")
+
+    async def stop(self) -> None:
+        if not self._task:
+            return
+        cache.off_bump(self._on_local_bump)
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._flush and not self._flush.done():
+            await self._flush
+        if self._conn is not None and not self._conn.is_closed():
+            await self._conn.close()
+        self._conn = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": settings.pubsub_enabled,
+            "listening": self._conn is not None and not self._conn.is_closed(),
+            **self._stats,
+        }
+
+
+pubsub = PubSub()
@@ -0,0 +1,235 @@
+"""
+Per-request database and serialisation timing.
+
+RequestTimingMiddleware gives every HTTP request a RequestTiming in a context variable.
+While it is set:
+
+- TimedPool (wrapping every pool from database.get_pool / get_read_pool) adds the time spent
+  waiting in pool.acquire();
+- TimedConnection (the pools' connection class) adds one query and its wall time per
+  execute / executemany / fetch / fetchrow / fetchval / copy_records_to_table;
+- serialization.dumps adds the time spent encoding JSON, and TimedJSONResponse (the app's
+  default response class) the json.dumps of endpoints that return plain dicts.
+
+When the response has been sent the request is folded into per-endpoint aggregates (route
+template, not raw path) exported by /api/admin/metrics, and requests slower than
+slow_request_ms are logged with their most expensive SQL fingerprints (whitespace collapsed,
+literals replaced by ?; computed only for the log line). Outside a request (jobs, scheduler,
+scripts) the wrappers only do one context variable lookup.
+
+Not counted: rows streamed through server-side cursors (exports), and FastAPI's
+jsonable_encoder pass over plain dicts, which runs before the response class renders them;
+such endpoints report only the final json.dumps, so their serialisation time is understated.
+"""
+
+import contextvars
+import logging
+import re
+import time
+from functools import lru_cache
+
+import asyncpg
+
+from config import settings
+
+log = logging.getLogger("request_timing")
+
+_current: contextvars.ContextVar["RequestTiming | None"] = contextvars.ContextVar("request_timing", default=None)
+
+_WS = re.compile(r"\s+")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|(?<![\w$])\d+(?:\.\d+)?\b")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql: str) -> str:
+    return _LITERAL.sub("?", _WS.sub(" ", sql).strip())[:200]
+
+
+class RequestTiming:
+    __slots__ = ("started", "queries", "db_seconds", "acquire_seconds", "serialise_seconds", "sql")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.acquire_seconds = 0.0
+        self.serialise_seconds = 0.0
+        self.sql: dict[str, list] = {}  # query text -> [count, seconds]; fingerprinted when reported
+
+    def add_query(self, sql: str, seconds: float) -> None:
+        self.queries += 1
+        self.db_seconds += seconds
+        entry = self.sql.get(sql)
+        if entry is None:
+            self.sql[sql] = [1, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+
+
+def current() -> RequestTiming | None:
+    return _current.get()
+
+
+# ─── 连接与连接池包装 ───
+
+
+def _timed(name: str):
+    method = getattr(asyncpg.Connection, name)
+    perf_counter = time.perf_counter
+
+    async def wrapper(self, query, *args, **kwargs):
+        timing = _current.get()
+        if timing is None:
+            return await method(self, query, *args, **kwargs)
+        t0 = perf_counter()
+        try:
+            return await method(self, query, *args, **kwargs)
+        finally:
+            timing.add_query(query, perf_counter() - t0)
+
+    wrapper.__name__ = name
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+class TimedConnection(asyncpg.Connection):
+    """asyncpg connection that reports each query to the current request's timing."""
+
+    execute = _timed("execute")
+    executemany = _timed("executemany")
+    fetch = _timed("fetch")
+    fetchrow = _timed("fetchrow")
+    fetchval = _timed("fetchval")
+    copy_records_to_table = _timed("copy_records_to_table")  # query = table name
+
+
+class _TimedAcquire:
+    __slots__ = ("_ctx",)
+
+    def __init__(self, ctx):
+        self._ctx = ctx
+
+    async def __aenter__(self):
+        timing = _current.get()
+        if timing is None:
+            return await self._ctx.__aenter__()
+        t0 = time.perf_counter()
+        try:
+            return await self._ctx.__aenter__()
+        finally:
+            timing.acquire_seconds += time.perf_counter() - t0
+
+    async def __aexit__(self, *exc):
+        return await self._ctx.__aexit__(*exc)
+
+
+class TimedPool:
+    """Pool proxy whose acquire() reports the wait to the current request's timing."""
+
+    __slots__ = ("_pool",)
+
+    def __init__(self, pool: asyncpg.Pool):
+        self._pool = pool
+
+    def acquire(self, *, timeout: float | None = None) -> _TimedAcquire:
+        return _TimedAcquire(self._pool.acquire(timeout=timeout))
+
+    def __getattr__(self, name):
+        return getattr(self._pool, name)
+
+
+# ─── 中间件与聚合 ───
+
+_FIELDS = ("requests", "slow", "queries", "total_ms", "db_ms", "acquire_ms", "serialise_ms")
+_endpoints: dict[str, dict[str, float]] = {}
+
+
+def _endpoint(scope) -> str:
+    route = scope.get("route")
+    return f"{scope['method']} {route.path if route is not None else '<unmatched>'}"
+
+
+def _record(scope, status: int, timing: RequestTiming) -> None:
+    total = time.perf_counter() - timing.started
+    key = _endpoint(scope)
+    agg = _endpoints.get(key)
+    if agg is None:
+        agg = _endpoints[key] = dict.fromkeys(_FIELDS, 0)
+    slow = total * 1000 >= settings.slow_request_ms
+    agg["requests"] += 1
+    agg["slow"] += slow
+    agg["queries"] += timing.queries
+    agg["total_ms"] += total * 1000
+    agg["db_ms"] += timing.db_seconds * 1000
+    agg["acquire_ms"] += timing.acquire_seconds * 1000
+    agg["serialise_ms"] += timing.serialise_seconds * 1000
+    if slow:
+        by_fp: dict[str, list] = {}
+        for sql, (n, s) in timing.sql.items():
+            entry = by_fp.setdefault(fingerprint(sql), [0, 0.0])
+            entry[0] += n
+            entry[1] += s
+        top = sorted(by_fp.items(), key=lambda kv: kv[1][1], reverse=True)[: settings.slow_request_top_sql]
+        log.warning(
+            "Slow request %s -> %d: %.0f ms total, db %.0f ms in %d queries, acquire wait %.0f ms, serialise %.0f ms%s",
+            key,
+            status,
+            total * 1000,
+            timing.db_seconds * 1000,
+            timing.queries,
+            timing.acquire_seconds * 1000,
+            timing.serialise_seconds * 1000,
+            "".join(f"\n  {s * 1000:8.1f} ms x{n:<4d} {fp}" for fp, (n, s) in top),
+        )
+
+
+class RequestTimingMiddleware:
+    """Pure ASGI middleware, so the timing also covers streamed response bodies."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.request_timing_enabled:
+            await self.app(scope, receive, send)
+            return
+        timing = RequestTiming()
+        token = _current.set(timing)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            _record(scope, status, timing)
+
+
+def stats() -> dict:
+    """Per-endpoint totals plus per-request averages."""
+    endpoints = {}
+    for key, agg in sorted(_endpoints.items()):
+        n = agg["requests"] or 1
+        endpoints[key] = {
+            **{k: round(v, 3) if isinstance(v, float) else v for k, v in agg.items()},
+            "avg_ms": round(agg["total_ms"] / n, 3),
+            "avg_db_ms": round(agg["db_ms"] / n, 3),
+            "avg_acquire_ms": round(agg["acquire_ms"] / n, 3),
+            "avg_serialise_ms": round(agg["serialise_ms"] / n, 3),
+            "avg_queries": round(agg["queries"] / n, 2),
+        }
+    return {
+        "enabled": settings.request_timing_enabled,
+        "slow_request_ms": settings.slow_request_ms,
+        "endpoints": endpoints,
+    }
+
+
+def reset() -> None:
+    _endpoints.clear()
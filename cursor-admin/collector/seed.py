@@ -0,0 +1,475 @@
+"""
+Deterministic synthetic data for scale testing (disposable databases only).
+
+Seeds members, projects (workspace rules, git repos, member lists), agent_sessions,
+ai_code_commits, daily_usage and spend_snapshots with COPY. The rows depend only on --seed
+and the volume / date arguments, and each table draws from its own random stream, so changing
+one volume does not reshuffle the others.
+
+- Member activity is Zipf-like (a few heavy users, a long tail); the same weights drive
+  sessions, commits and usage. Timestamps fall in working hours (MV_TIMEZONE), weekdays ~4x
+  weekends.
+- Each member works on 1-3 projects. 85% of sessions run in a workspace under one of their
+  active projects' rules, with the project_id workspace_resolver would assign; the rest run
+  in personal folders (project_id NULL). Commit repo_name matches the project's git_repos the
+  way ai_code_sync.match_project does.
+- Session length and commit size are log-normal; each member has their own AI share of added
+  lines, split between tab and composer.
+- daily_usage is derived from that member's generated sessions and commits per day, and
+  spend_snapshots from usage-based requests per calendar month.
+
+Secondary indexes of the loaded tables are dropped for the COPY and rebuilt afterwards;
+partitioned tables get their monthly partitions first. Tables are then ANALYZEd and the
+summary views refreshed. Non-empty tables are refused unless --truncate (which also empties
+the tables referencing them, e.g. git_contributions).
+
+Usage: python seed.py [--seed 42] [--members 500] [--projects 60] [--sessions 1000000] [--commits 5000000] [--days 365] [--end 2026-09-30] [--truncate]
+"""
+
+import argparse
+import asyncio
+import logging
+import math
+import random
+import sys
+import time
+import uuid
+import zoneinfo
+from bisect import bisect
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+
+from database import close_pool, get_pool
+from partitions import add_months, create_partition, is_partitioned, month_start
+from session_buffer import COLUMNS as SESSION_COLUMNS
+from summaries import AI_COMMIT_VIEW, MV_TIMEZONE, SESSION_VIEW, refresh_views
+
+log = logging.getLogger("seed")
+
+TABLES = ("members", "projects", "agent_sessions", "ai_code_commits", "daily_usage", "spend_snapshots")
+
+MEMBER_COLUMNS = ("id", "user_id", "email", "name", "role", "is_removed")
+PROJECT_COLUMNS = (
+    "id",
+    "name",
+    "description",
+    "git_repos",
+    "workspace_rules",
+    "member_emails",
+    "status",
+    "created_by",
+    "budget_amount",
+    "budget_period",
+    "incentive_pool",
+)
+COMMIT_COLUMNS = (
+    "commit_hash",
+    "user_id",
+    "user_email",
+    "repo_name",
+    "branch_name",
+    "project_id",
+    "total_lines_added",
+    "total_lines_deleted",
+    "tab_lines_added",
+    "tab_lines_deleted",
+    "composer_lines_added",
+    "composer_lines_deleted",
+    "non_ai_lines_added",
+    "non_ai_lines_deleted",
+    "commit_message",
+    "commit_ts",
+)
+USAGE_COLUMNS = (
+    "email",
+    "day",
+    "agent_requests",
+    "chat_requests",
+    "composer_requests",
+    "total_tabs_accepted",
+    "total_tabs_shown",
+    "total_lines_added",
+    "total_lines_deleted",
+    "accepted_lines_added",
+    "subscription_reqs",
+    "usage_based_reqs",
+    "most_used_model",
+    "client_version",
+    "is_active",
+)
+SPEND_COLUMNS = ("email", "billing_cycle_start", "spend_cents", "fast_premium_requests", "monthly_limit_dollars")
+
+_FIRST = ("wei", "li", "na", "jun", "fang", "lei", "ming", "yan", "hao", "jing", "tao", "xin", "alex", "sam", "kai")
+_LAST = ("wang", "zhang", "liu", "chen", "yang", "zhao", "huang", "zhou", "wu", "xu", "sun", "ma", "hu", "guo", "lin")
+_WORDS = ("atlas", "beacon", "cobalt", "delta", "ember", "falcon", "granite", "harbor", "iris", "jade", "kepler", "lumen")
+_SUBDIRS = ("", "", "", "/src", "/web", "/services/api", "/docs")
+_BRANCHES = ("main", "main", "develop", "release", "feature/login", "feature/report", "fix/sync")
+_MESSAGES = ("fix: edge case", "feat: add endpoint", "refactor", "chore: deps", "test: cover parser", "docs", "wip")
+MODELS = ("claude-4-sonnet", "gpt-5", "claude-4-opus", "auto", "gemini-2.5-pro")
+_VERSIONS = ("1.4.5", "1.5.2", "1.6.0", "1.7.1")
+# share of sessions / commits per local hour (working hours, lunch dip)
+_HOUR_WEIGHTS = (1, 0, 0, 0, 0, 0, 1, 2, 5, 9, 10, 9, 4, 6, 10, 10, 9, 8, 5, 4, 4, 3, 2, 1)
+_HOUR_CUM = list(accumulate(_HOUR_WEIGHTS))
+
+
+@dataclass
+class Volumes:
+    seed: int = 42
+    members: int = 500
+    projects: int = 60
+    sessions: int = 1_000_000
+    commits: int = 5_000_000
+    days: int = 365
+    end: date = date(2026, 9, 30)
+
+
+@dataclass
+class Member:
+    id: int
+    user_id: str
+    email: str
+    name: str
+    role: str
+    is_removed: bool
+    windows: bool
+    machines: list[str]
+    personal_root: str
+    ai_share: float
+    projects: list[int] = field(default_factory=list)  # active projects they work in
+
+
+@dataclass
+class Project:
+    id: int
+    slug: str
+    repo: str  # "team/slug", as the AI Code Tracking API reports repoName
+    unix_rule: str
+    windows_rule: str
+    status: str
+
+
+def _rng(seed: int, stream: str) -> random.Random:
+    return random.Random(f"{seed}:{stream}")
+
+
+def _pick(cum: list, rnd: float) -> int:
+    return bisect(cum, rnd * cum[-1])
+
+
+class World:
+    """Members, projects and the weights every table draws from (all derived from the seed)."""
+
+    def __init__(self, v: Volumes):
+        self.v = v
+        rng = _rng(v.seed, "world")
+        self.start = v.end - timedelta(days=v.days - 1)
+        tz = zoneinfo.ZoneInfo(MV_TIMEZONE)
+        self.day_starts = [datetime.combine(self.start + timedelta(days=d), datetime.min.time(), tz) for d in range(v.days)]
+        self.day_cum = list(accumulate(4 if ds.weekday() < 5 else 1 for ds in self.day_starts))
+
+        self.projects = []
+        for i in range(1, v.projects + 1):
+            slug = f"{_WORDS[i % len(_WORDS)]}-{i}"
+            team = f"team{i % 8}"
+            self.projects.append(
+                Project(
+                    id=i,
+                    slug=slug,
+                    repo=f"{team}/{slug}",
+                    unix_rule=f"/work/{team}/{slug}",
+                    windows_rule=f"D:\\Work\\{team}\\{slug}",
+                    status="archived" if rng.random() < 0.1 else "active",
+                )
+            )
+        active = [p.id for p in self.projects if p.status == "active"] or [p.id for p in self.projects]
+
+        self.members = []
+        for i in range(1, v.members + 1):
+            first, last = rng.choice(_FIRST), rng.choice(_LAST)
+            user = f"{first}.{last}{i}"
+            windows = rng.random() < 0.3
+            self.members.append(
+                Member(
+                    id=i,
+                    user_id=f"user_{i:06d}",
+                    email=f"{user}@example.com",
+                    name=f"{first.title()} {last.title()}",
+                    role="admin" if i == 1 or rng.random() < 0.03 else "member",
+                    is_removed=i > 1 and rng.random() < 0.03,
+                    windows=windows,
+                    machines=[f"{user}-{k}" for k in range(rng.randint(1, 2))],
+                    personal_root=f"C:\\Users\\{user}\\scratch" if windows else f"/home/{user}/scratch",
+                    ai_share=rng.betavariate(2, 3),
+                    projects=rng.sample(active, min(len(active), rng.randint(1, 3))) if self.projects else [],
+                )
+            )
+        # Zipf-like activity over a shuffled rank, so heavy users are spread over ids
+        ranks = list(range(v.members))
+        rng.shuffle(ranks)
+        self.member_cum = list(accumulate(1 / (r + 1) ** 0.9 for r in ranks))
+        self.by_project = {p.id: p for p in self.projects}
+
+        # per (member, day) activity, filled while sessions / commits are generated
+        self.sessions = [0] * (v.members * v.days)
+        self.lines_added = [0] * (v.members * v.days)
+        self.ai_lines = [0] * (v.members * v.days)
+        self.tab_lines = [0] * (v.members * v.days)
+
+    def _when(self, rng: random.Random) -> tuple[int, int, datetime]:
+        m = _pick(self.member_cum, rng.random())
+        d = _pick(self.day_cum, rng.random())
+        seconds = _pick(_HOUR_CUM, rng.random()) * 3600 + rng.randrange(3600)
+        return m, d, self.day_starts[d] + timedelta(seconds=seconds)
+
+    # ─── 各表数据 ───
+
+    def member_rows(self):
+        for m in self.members:
+            yield (m.id, m.user_id, m.email, m.name, m.role, m.is_removed)
+
+    def project_rows(self):
+        rng = _rng(self.v.seed, "projects")
+        created_by = self.members[0].email if self.members else "seed@example.com"
+        emails = {p.id: [] for p in self.projects}
+        for m in self.members:
+            for pid in m.projects:
+                emails[pid].append(m.email)
+        for p in self.projects:
+            budget = float(rng.choice((500, 1000, 2000, 5000)))
+            yield (
+                p.id,
+                p.slug,
+                f"Synthetic project {p.slug}",
+                [f"git@git.example.com:{p.repo}.git"],
+                [p.unix_rule, p.windows_rule],
+                emails[p.id],
+                p.status,
+                created_by,
+                budget,
+                "monthly",
+                budget * 0.1,
+            )
+
+    def session_rows(self):
+        """Rows in session_buffer.COLUMNS order."""
+        rng = _rng(self.v.seed, "agent_sessions")
+        rnd, days = rng.random, self.v.days
+        for _ in range(self.v.sessions):
+            m, d, ended = self._when(rng)
+            member = self.members[m]
+            duration = min(int(rng.lognormvariate(6.2, 1.0)), 4 * 3600)  # median ~8 min
+            started = ended - timedelta(seconds=duration)
+            if rnd() < 0.03:
+                started = duration = None
+            if member.projects and rnd() < 0.85:
+                p = self.by_project[member.projects[int(rnd() * len(member.projects))]]
+                sub = _SUBDIRS[int(rnd() * len(_SUBDIRS))]
+                root = p.windows_rule + sub.replace("/", "\\") if member.windows else p.unix_rule + sub
+                project_id = p.id
+            else:
+                root, project_id = member.personal_root, None
+            self.sessions[m * days + d] += 1
+            yield (
+                str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                member.email,
+                member.machines[int(rnd() * len(member.machines))],
+                [root],
+                started,
+                ended,
+                duration,
+                project_id,
+            )
+
+    def commit_rows(self):
+        """Rows in COMMIT_COLUMNS order."""
+        rng = _rng(self.v.seed, "ai_code_commits")
+        rnd, days = rng.random, self.v.days
+        for _ in range(self.v.commits):
+            m, d, ts = self._when(rng)
+            member = self.members[m]
+            if member.projects and rnd() < 0.9:
+                p = self.by_project[member.projects[int(rnd() * len(member.projects))]]
+                repo, project_id = p.repo, p.id
+            else:
+                repo, project_id = f"{member.user_id}/sandbox", None
+            added = int(rng.lognormvariate(3.5, 1.2)) + 1  # median ~34 lines
+            deleted = int(added * rnd() * 0.6)
+            share = min(max(rng.gauss(member.ai_share, 0.15), 0.0), 1.0)
+            ai_added, ai_deleted = int(added * share), int(deleted * share)
+            tab_added, tab_deleted = int(ai_added * rnd() * 0.6), int(ai_deleted * rnd() * 0.6)
+            idx = m * days + d
+            self.lines_added[idx] += added
+            self.ai_lines[idx] += ai_added
+            self.tab_lines[idx] += tab_added
+            yield (
+                f"{rng.getrandbits(160):040x}",
+                member.user_id,
+                member.email,
+                repo,
+                _BRANCHES[int(rnd() * len(_BRANCHES))],
+                project_id,
+                added,
+                deleted,
+                tab_added,
+                tab_deleted,
+                ai_added - tab_added,
+                ai_deleted - tab_deleted,
+                added - ai_added,
+                deleted - ai_deleted,
+                _MESSAGES[int(rnd() * len(_MESSAGES))],
+                ts,
+            )
+
+    def usage_rows(self):
+        """One row per member and day (is_active false on idle days), from the generated activity."""
+        rng = _rng(self.v.seed, "daily_usage")
+        rnd, days = rng.random, self.v.days
+        self.monthly_usage: dict[tuple[int, date], list[int]] = {}
+        for m, member in enumerate(self.members):
+            model = rng.choice(MODELS)
+            for d in range(days):
+                idx = m * days + d
+                sessions, added, ai, tab = self.sessions[idx], self.lines_added[idx], self.ai_lines[idx], self.tab_lines[idx]
+                chat = int(rnd() * 4) if sessions or rnd() < 0.05 else 0
+                active = bool(sessions or added or chat)
+                agent = sessions * (2 + int(rnd() * 5))
+                composer = sessions * int(rnd() * 3)
+                requests = agent + chat + composer
+                usage_based = max(0, requests - 50)
+                day = self.start + timedelta(days=d)
+                month = self.monthly_usage.setdefault((m, month_start(day)), [0, 0])
+                month[0] += requests - usage_based
+                month[1] += usage_based
+                yield (
+                    member.email,
+                    day,
+                    agent,
+                    chat,
+                    composer,
+                    math.ceil(tab / 3),
+                    math.ceil(tab / 3 * (1.5 + rnd())),
+                    added,
+                    int(added * 0.3),
+                    ai,
+                    requests - usage_based,
+                    usage_based,
+                    model if active else None,
+                    _VERSIONS[min(len(_VERSIONS) - 1, d * len(_VERSIONS) // days)] if active else None,
+                    active,
+                )
+
+    def spend_rows(self):
+        """One row per member and calendar month, from usage_rows() (which must run first)."""
+        rng = _rng(self.v.seed, "spend_snapshots")
+        for (m, month), (subscription, usage_based) in sorted(self.monthly_usage.items()):
+            limit = rng.choice((None, 100, 200, 500))
+            yield (self.members[m].email, month, usage_based * 4, subscription, limit)
+
+
+# ─── 导入 ───
+
+
+async def _secondary_indexes(conn, table: str) -> list[tuple[str, str]]:
+    """(name, definition) of the table's indexes that do not back a constraint."""
+    rows = await conn.fetch(
+        """
+        SELECT i.indexrelid::regclass::text AS name, pg_get_indexdef(i.indexrelid) AS def
+        FROM pg_index i
+        WHERE i.indrelid = to_regclass($1)
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)
+        """,
+        table,
+    )
+    return [(r["name"], r["def"].replace(" ON ONLY ", " ON ")) for r in rows]
+
+
+async def _copy(conn, table: str, columns: tuple, records) -> int:
+    """COPY with the secondary indexes dropped and rebuilt, in one transaction so a failed load
+    leaves the table and its indexes as they were."""
+    t0 = time.monotonic()
+    async with conn.transaction():
+        indexes = await _secondary_indexes(conn, table)
+        for name, _ in indexes:
+            await conn.execute(f"DROP INDEX {name}")
+        status = await conn.copy_records_to_table(table, records=records, columns=columns)
+        copied = time.monotonic()
+        for _, definition in indexes:
+            await conn.execute(definition)
+        await conn.execute(f"ANALYZE {table}")
+    n = int(status.rsplit(" ", 1)[-1])
+    log.info(
+        "%s: %d rows copied in %.1fs, %d indexes rebuilt in %.1fs",
+        table,
+        n,
+        copied - t0,
+        len(indexes),
+        time.monotonic() - copied,
+    )
+    return n
+
+
+async def seed(conn, v: Volumes, truncate: bool = False) -> dict[str, int]:
+    """Load the synthetic data set into the connection's database; returns rows per table."""
+    counts = {t: await conn.fetchval(f"SELECT COUNT(*) FROM (SELECT 1 FROM {t} LIMIT 1) s") for t in TABLES}
+    if any(counts.values()):
+        if not truncate:
+            raise RuntimeError(f"tables not empty: {', '.join(t for t, n in counts.items() if n)} (use --truncate)")
+        await conn.execute(f"TRUNCATE {', '.join(TABLES)} RESTART IDENTITY CASCADE")
+
+    world = World(v)
+    for table in ("agent_sessions", "ai_code_commits"):
+        if await is_partitioned(conn, table):
+            month = month_start(world.start)
+            while month <= v.end:
+                await create_partition(conn, table, month)
+                month = add_months(month, 1)
+
+    loaded = {
+        "members": await _copy(conn, "members", MEMBER_COLUMNS, world.member_rows()),
+        "projects": await _copy(conn, "projects", PROJECT_COLUMNS, world.project_rows()),
+        "agent_sessions": await _copy(conn, "agent_sessions", SESSION_COLUMNS, world.session_rows()),
+        "ai_code_commits": await _copy(conn, "ai_code_commits", COMMIT_COLUMNS, world.commit_rows()),
+        "daily_usage": await _copy(conn, "daily_usage", USAGE_COLUMNS, world.usage_rows()),
+        "spend_snapshots": await _copy(conn, "spend_snapshots", SPEND_COLUMNS, world.spend_rows()),
+    }
+    for table in ("members", "projects"):
+        await conn.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))")
+    return loaded
+
+
+def _parse(argv: list[str]) -> tuple[Volumes, bool]:
+    d = Volumes()
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--seed", type=int, default=d.seed)
+    ap.add_argument("--members", type=int, default=d.members)
+    ap.add_argument("--projects", type=int, default=d.projects)
+    ap.add_argument("--sessions", type=int, default=d.sessions)
+    ap.add_argument("--commits", type=int, default=d.commits)
+    ap.add_argument("--days", type=int, default=d.days, help="length of the seeded period, ending at --end")
+    ap.add_argument("--end", type=date.fromisoformat, default=d.end, help="last seeded day (fixed, for reproducibility)")
+    ap.add_argument("--truncate", action="store_true", help="empty the seeded tables first")
+    a = ap.parse_args(argv)
+    if a.members < 1 or a.days < 1:
+        ap.error("--members and --days must be at least 1")
+    v = Volumes(a.seed, a.members, a.projects, a.sessions, a.commits, a.days, a.end)
+    return v, a.truncate
+
+
+async def _main(argv: list[str]) -> int:
+    v, truncate = _parse(argv)
+    t0 = time.monotonic()
+    try:
+        pool = await get_pool()
+        async with pool.acquire() as conn:
+            loaded = await seed(conn, v, truncate)
+        await refresh_views(SESSION_VIEW, AI_COMMIT_VIEW)
+    finally:
+        await close_pool()
+    print(f"seeded {sum(loaded.values())} rows in {time.monotonic() - t0:.0f}s: {loaded}")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
@@ -0,0 +1,70 @@
+"""
+Fast JSON responses (orjson).
+
+Returning a plain dict/list from an endpoint makes FastAPI walk it with jsonable_encoder and
+then json.dumps it, which dominates latency for 500-row pages. ORJSONResponse hands rows
+(asyncpg Records included) straight to orjson, which encodes datetime/date/UUID natively;
+the output matches FastAPI's JSONResponse (compact separators, UTF-8, ISO 8601 datetimes).
+Endpoints return ORJSONResponse(data) directly; cache.respond() serialises with dumps().
+TimedJSONResponse is the app's default response class, so the json.dumps of endpoints that
+still return plain data is counted in the request's serialisation time as well.
+"""
+
+import time
+from collections.abc import Callable
+from datetime import timedelta
+from decimal import Decimal
+from typing import Any
+
+import asyncpg
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+import request_timing
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, asyncpg.Record):
+        return dict(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, timedelta):
+        return obj.total_seconds()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _timed(encode: Callable[[Any], bytes], data: Any) -> bytes:
+    timing = request_timing.current()
+    if timing is None:
+        return encode(data)
+    t0 = time.perf_counter()
+    try:
+        return encode(data)
+    finally:
+        timing.serialise_seconds += time.perf_counter() - t0
+
+
+def _orjson(data: Any) -> bytes:
+    return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def dumps(data: Any) -> bytes:
+    return _timed(_orjson, data)
+
+
+class ORJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class TimedJSONResponse(JSONResponse):
+    """FastAPI's JSONResponse with render() counted as serialisation time (jsonable_encoder, which
+    FastAPI runs before it, is not)."""
+
+    def render(self, content: Any) -> bytes:
+        return _timed(super().render, content)
@@ -0,0 +1,225 @@
+"""
+Buffered writer for hook session events.
+
+POST /api/sessions and /api/sessions/batch hand resolved rows to the buffer and return
+immediately. A single background task flushes them with COPY into a temp staging table
+followed by one merging INSERT, when session_buffer_flush_rows are queued or every
+session_buffer_flush_seconds, so ingest holds at most one pool connection however bursty
+the hooks are.
+
+- The buffer is bounded (session_buffer_max_rows). offer() refuses a batch that does not
+  fit and the endpoints answer 429, so hooks keep the events and retry later.
+- A flush that fails on the rows' data (a value COPY rejects, a violated constraint) retries
+  that batch row by row and drops, logs and counts the rows that still fail, so one bad row
+  cannot block ingest. Any other failure (connection lost, statement timeout, lock or
+  serialization conflict, read-only failover, cancellation) puts the rows back at the front
+  and is retried on the next tick.
+- Writers of the same conversation_id are serialised with transaction-level advisory locks
+  (see CONVERSATION_LOCK_SQL), so concurrent flushes from several API processes cannot both
+  insert it.
+- stop() (application shutdown) drains everything still queued.
+- Until start() has run (tests, scripts) the endpoints write synchronously via write_rows().
+"""
+
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime
+
+import asyncpg
+
+import cache
+from config import settings
+from database import get_pool
+from summaries import SESSION_VIEW, mark_late_rows
+
+log = logging.getLogger("session_buffer")
+
+# (conversation_id, user_email, machine_id, workspace_roots, started_at, ended_at, duration_seconds, project_id)
+SessionRow = tuple[str, str, str, list[str], datetime | None, datetime, int | None, int | None]
+
+COLUMNS = (
+    "conversation_id",
+    "user_email",
+    "machine_id",
+    "workspace_roots",
+    "started_at",
+    "ended_at",
+    "duration_seconds",
+    "project_id",
+)
+
+_STAGE_DDL = """
+CREATE TEMP TABLE IF NOT EXISTS session_ingest_stage (
+    conversation_id  TEXT        NOT NULL,
+    user_email       TEXT        NOT NULL,
+    machine_id       TEXT,
+    workspace_roots  TEXT[],
+    started_at       TIMESTAMPTZ,
+    ended_at         TIMESTAMPTZ NOT NULL,
+    duration_seconds INT,
+    project_id       INT
+) ON COMMIT DELETE ROWS
+"""
+
+# Partitioned agent_sessions can only be unique on (conversation_id, ended_at), so a repeat
+# report with another ended_at passes ON CONFLICT and NOT EXISTS alone races between
+# processes. Every writer takes this lock per conversation_id before its NOT EXISTS check;
+# the staged batch locks its keys in hash order so two batches cannot deadlock.
+CONVERSATION_LOCK_SQL = "SELECT pg_advisory_xact_lock(hashtext('agent_sessions:' || $1))"
+
+_STAGE_LOCK_SQL = """
+SELECT pg_advisory_xact_lock(k)
+FROM (SELECT DISTINCT hashtext('agent_sessions:' || conversation_id) AS k FROM session_ingest_stage ORDER BY k) s
+"""
+
+# Same dedupe as the single-row insert: one row per conversation_id (earliest end within the
+# batch), skipped if the conversation is already stored.
+_MERGE_SQL = """
+INSERT INTO agent_sessions
+    (conversation_id, user_email, machine_id, workspace_roots, started_at, ended_at, duration_seconds, project_id)
+SELECT DISTINCT ON (s.conversation_id)
+       s.conversation_id, s.user_email, s.machine_id, s.workspace_roots,
+       s.started_at, s.ended_at, s.duration_seconds, s.project_id
+FROM session_ingest_stage s
+WHERE NOT EXISTS (SELECT 1 FROM agent_sessions a WHERE a.conversation_id = s.conversation_id)
+ORDER BY s.conversation_id, s.ended_at
+ON CONFLICT DO NOTHING
+"""
+
+
+# Errors that are about the rows themselves: retrying them can never succeed. ValueError covers
+# asyncpg's client-side DataError (a value the codec cannot encode).
+_BAD_DATA = (asyncpg.DataError, asyncpg.IntegrityConstraintViolationError, ValueError)
+
+
+async def write_rows(conn, rows: list[SessionRow]) -> int:
+    """COPY rows into the staging table and merge them into agent_sessions. Returns rows inserted."""
+    async with conn.transaction():
+        await conn.execute(_STAGE_DDL)
+        await conn.copy_records_to_table("session_ingest_stage", records=rows, columns=COLUMNS)
+        await conn.execute(_STAGE_LOCK_SQL)
+        status = await conn.execute(_MERGE_SQL)
+    inserted = int(status.rsplit(" ", 1)[-1])
+    if inserted:
+        await mark_late_rows(conn, SESSION_VIEW, min(r[5] for r in rows))
+    return inserted
+
+
+class SessionBuffer:
+    def __init__(self):
+        self._rows: deque[SessionRow] = deque()
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._flush_lock = asyncio.Lock()
+        self._stats = {"accepted": 0, "rejected": 0, "flushes": 0, "inserted": 0, "flush_errors": 0, "dropped": 0}
+
+    @property
+    def started(self) -> bool:
+        return self._task is not None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def offer(self, rows: list[SessionRow]) -> bool:
+        """Queue rows (all or nothing). False when the buffer cannot take them (backpressure)."""
+        if len(self._rows) + len(rows) > settings.session_buffer_max_rows:
+            self._stats["rejected"] += len(rows)
+            return False
+        self._rows.extend(rows)
+        self._stats["accepted"] += len(rows)
+        if self._wake and len(self._rows) >= settings.session_buffer_flush_rows:
+            self._wake.set()
+        return True
+
+    async def flush(self) -> int:
+        """Write everything queued, session_buffer_flush_rows per COPY. Returns rows inserted."""
+        inserted = 0
+        async with self._flush_lock:
+            if not self._rows:
+                return 0
+            try:
+                try:
+                    pool = await get_pool()  # before popping anything, so a failure leaves the queue as it was
+                except BaseException:
+                    self._stats["flush_errors"] += 1
+                    raise
+                while self._rows:
+                    n = min(len(self._rows), settings.session_buffer_flush_rows)
+                    batch = [self._rows.popleft() for _ in range(n)]
+                    try:
+                        async with pool.acquire() as conn:
+                            inserted += await write_rows(conn, batch)
+                    except BaseException as e:
+                        self._stats["flush_errors"] += 1
+                        if not isinstance(e, _BAD_DATA):  # incl. timeouts, locks, cancellation by stop()
+                            self._rows.extendleft(reversed(batch))
+                            raise
+                        log.warning("Session buffer batch of %d rows rejected (%s); retrying row by row", n, e)
+                        for i, row in enumerate(batch):
+                            try:
+                                async with pool.acquire() as conn:
+                                    inserted += await write_rows(conn, [row])
+                            except BaseException as e:
+                                if not isinstance(e, _BAD_DATA):
+                                    self._rows.extendleft(reversed(batch[i:]))
+                                    raise
+                                self._stats["dropped"] += 1
+                                log.error(
+                                    "Session buffer dropped row conversation_id=%r: %s: %s", row[0], type(e).__name__, e
+                                )
+                    self._stats["flushes"] += 1
+            finally:
+                self._stats["inserted"] += inserted
+                if inserted:
+                    cache.bump(cache.SESSIONS)
+        return inserted
+
+    async def start(self) -> None:
+        if self._task:
+            return
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._loop(), name="session-buffer")
+
+    async def stop(self) -> None:
+        """Stop the flush loop and drain the buffer."""
+        if not self._task:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task, self._wake = None, None
+        if self._rows:
+            try:
+                n = len(self._rows)
+                await self.flush()
+                log.info("Session buffer drained %d rows on shutdown", n)
+            except Exception as e:
+                log.error("Session buffer lost %d rows on shutdown: %s", len(self._rows), e)
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=settings.session_buffer_flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if self._rows:
+                try:
+                    await self.flush()
+                except Exception as e:
+                    log.exception("Session buffer flush failed (%d rows queued): %s", len(self._rows), e)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": settings.session_buffer_enabled,
+            "started": self.started,
+            "queued": len(self._rows),
+            "capacity": settings.session_buffer_max_rows,
+            **self._stats,
+        }
+
+
+buffer = SessionBuffer()
@@ -0,0 +1,45 @@
+"""
+In-process single-flight: concurrent calls with the same key share one execution.
+
+The first caller starts the work as a task; callers arriving while it is in flight await
+the same task instead of issuing their own query. The task is shielded, so a caller that
+disconnects does not cancel the work for the others. Errors propagate to every waiter and
+nothing is remembered once the flight lands (use the response cache for that).
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self._stats: dict[str, dict[str, int]] = {}
+
+    async def do(self, name: str, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn() once per key at a time; name groups the metrics (e.g. endpoint)."""
+        stats = self._stats.setdefault(name, {"calls": 0, "executions": 0, "coalesced": 0})
+        stats["calls"] += 1
+        task = self._inflight.get(key)
+        if task is None:
+            stats["executions"] += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._landed(key, t))
+        else:
+            stats["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    def _landed(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the error retrieved in case every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._inflight), "endpoints": {k: dict(v) for k, v in self._stats.items()}}
+
+
+singleflight = SingleFlight()
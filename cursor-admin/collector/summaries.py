@@ -0,0 +1,210 @@
+"""
+Daily pre-aggregates for the session and AI-commit summary endpoints.
+
+- mv_agent_session_daily / mv_ai_commit_daily (migration 013) roll raw rows up per calendar
+  day in MV_TIMEZONE; refresh_views() rebuilds them with REFRESH ... CONCURRENTLY after the
+  relevant sync stage and records when each refresh started.
+- Summary queries are hybrid: days before the refresh day are read from the view, the rest
+  (today, late data since the refresh) from the raw table, and the two parts are merged in SQL.
+- Writers call mark_late_rows() after committing rows for a day before today (hook spool
+  replays, AI-commit backfills); summaries then read live from the earliest such day until a
+  refresh that started after the mark has folded them into the view. The only staleness left
+  is the moment between a writer's commit and its mark (or until the next refresh, if the
+  writer dies in between).
+- Without a recorded refresh, with summary views disabled, or when settings.report_timezone
+  differs from the views' grain, the whole range is queried live.
+"""
+
+import logging
+import time
+import zoneinfo
+from datetime import date, datetime, timedelta
+
+from config import settings
+from database import get_pool
+from timerange import day_bounds, report_tz
+
+log = logging.getLogger("summaries")
+
+MV_TIMEZONE = "Asia/Shanghai"  # must match the AT TIME ZONE used in 013_summary_views.sql
+
+SESSION_VIEW = "mv_agent_session_daily"
+AI_COMMIT_VIEW = "mv_ai_commit_daily"
+
+
+async def refresh_views(*views: str) -> None:
+    """REFRESH MATERIALIZED VIEW CONCURRENTLY each view (readers are not blocked)."""
+    pool = await get_pool()
+    for view in views:
+        t0 = time.monotonic()
+        try:
+            async with pool.acquire() as conn:
+                started_at = await conn.fetchval("SELECT NOW()")
+                await conn.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}")
+                duration_ms = int((time.monotonic() - t0) * 1000)
+                await conn.execute(
+                    """
+                    INSERT INTO summary_view_refreshes (view_name, refreshed_at, duration_ms)
+                    VALUES ($1, $2, $3)
+                    ON CONFLICT (view_name) DO UPDATE SET
+                        refreshed_at = EXCLUDED.refreshed_at, duration_ms = EXCLUDED.duration_ms,
+                        -- marks made before this refresh started are for rows it has read
+                        stale_from = CASE WHEN summary_view_refreshes.stale_marked_at >= EXCLUDED.refreshed_at
+                                          THEN summary_view_refreshes.stale_from END,
+                        stale_marked_at = CASE WHEN summary_view_refreshes.stale_marked_at >= EXCLUDED.refreshed_at
+                                               THEN summary_view_refreshes.stale_marked_at END
+                    """,
+                    view,
+                    started_at,
+                    duration_ms,
+                )
+            log.info("Refreshed %s in %d ms", view, duration_ms)
+        except Exception as e:
+            log.exception("Refresh %s failed: %s", view, e)
+
+
+async def mark_late_rows(conn, view: str, earliest: datetime) -> None:
+    """Call after committing rows for view's source table, earliest being their minimum timestamp:
+    days before today are read live until the next refresh picks the rows up."""
+    tz = zoneinfo.ZoneInfo(MV_TIMEZONE)
+    day = earliest.astimezone(tz).date()
+    if day >= datetime.now(tz).date():  # no refresh can have rolled today into the view yet
+        return
+    await conn.execute(
+        """
+        UPDATE summary_view_refreshes
+        SET stale_from = LEAST(stale_from, $2), stale_marked_at = clock_timestamp()
+        WHERE view_name = $1
+        """,
+        view,
+        day,
+    )
+
+
+async def _view_cutoff(conn, view: str) -> date | None:
+    """First day NOT served from view (the day its last refresh started, or the earliest late
+    day marked since), or None for live only."""
+    if not settings.summary_views_enabled or settings.report_timezone != MV_TIMEZONE:
+        return None
+    row = await conn.fetchrow("SELECT refreshed_at, stale_from FROM summary_view_refreshes WHERE view_name = $1", view)
+    if row is None:
+        return None
+    cutoff = row["refreshed_at"].astimezone(report_tz()).date()
+    return min(cutoff, row["stale_from"]) if row["stale_from"] else cutoff
+
+
+async def session_summary_rows(conn, start_date: date, end_date: date, by: str) -> list:
+    """
+    Per user + primary_workspace (by="workspace", NULL workspaces excluded) or per
+    user + project (by="project") over [start_date, end_date].
+    """
+    if by == "workspace":
+        key_cols, extra = "user_email, primary_workspace", "AND primary_workspace IS NOT NULL"
+    else:
+        key_cols, extra = "project_id, user_email", ""
+    start_ts, end_ts = day_bounds(start_date, end_date)
+    cutoff = await _view_cutoff(conn, SESSION_VIEW)
+
+    parts: list[str] = []
+    params: list = [start_ts, end_ts]
+    if cutoff and cutoff > start_date:
+        params[0] = max(start_ts, day_bounds(cutoff, cutoff)[0])
+        params += [start_date, min(end_date, cutoff - timedelta(days=1))]
+        parts.append(
+            f"""
+            SELECT {key_cols}, session_count, total_seconds, first_seen, last_seen
+            FROM {SESSION_VIEW}
+            WHERE day >= $3 AND day <= $4 {extra}
+            """
+        )
+    parts.append(
+        f"""
+        SELECT {key_cols}, COUNT(*), COALESCE(SUM(duration_seconds), 0), MIN(ended_at), MAX(ended_at)
+        FROM agent_sessions
+        WHERE ended_at >= $1 AND ended_at < $2 {extra}
+        GROUP BY {key_cols}
+        """
+    )
+    union = " UNION ALL ".join(parts)
+    agg = """
+        SUM(s.session_count)::bigint AS session_count,
+        SUM(s.total_seconds)::bigint AS total_seconds,
+        MIN(s.first_seen)            AS first_seen,
+        MAX(s.last_seen)             AS last_seen
+    """
+    if by == "workspace":
+        sql = f"""
+            SELECT s.user_email, s.primary_workspace, {agg}
+            FROM ({union}) AS s (user_email, primary_workspace, session_count, total_seconds, first_seen, last_seen)
+            GROUP BY s.user_email, s.primary_workspace
+            ORDER BY s.user_email, total_seconds DESC
+        """
+    else:
+        sql = f"""
+            SELECT s.project_id, COALESCE(p.name, '未归属') AS project_name, s.user_email, {agg}
+            FROM ({union}) AS s (project_id, user_email, session_count, total_seconds, first_seen, last_seen)
+            LEFT JOIN projects p ON p.id = s.project_id
+            GROUP BY s.project_id, p.name, s.user_email
+            ORDER BY project_name, s.user_email, total_seconds DESC
+        """
+    return await conn.fetch(sql, *params)
+
+
+async def ai_commit_summary_rows(
+    conn, project_id: int | None, start_date: date | None, end_date: date | None
+) -> list:
+    """Per project + member AI line totals over [start_date, end_date] (either bound optional)."""
+    cutoff = await _view_cutoff(conn, AI_COMMIT_VIEW)
+    params: list = []
+
+    def p(value) -> str:
+        params.append(value)
+        return f"${len(params)}"
+
+    project_cond = f"AND project_id = {p(project_id)}" if project_id is not None else ""
+    lo = day_bounds(start_date, start_date)[0] if start_date else None
+    hi = day_bounds(end_date, end_date)[1] if end_date else None
+
+    parts: list[str] = []
+    if cutoff and (start_date is None or cutoff > start_date):
+        mv_conds = [f"day < {p(cutoff)}"]
+        if start_date:
+            mv_conds.append(f"day >= {p(start_date)}")
+        if end_date:
+            mv_conds.append(f"day <= {p(end_date)}")
+        parts.append(
+            f"""
+            SELECT project_id, user_email, ai_lines_added, total_lines_added, commit_count
+            FROM {AI_COMMIT_VIEW}
+            WHERE {" AND ".join(mv_conds)} {project_cond}
+            """
+        )
+        cutoff_ts = day_bounds(cutoff, cutoff)[0]
+        lo = max(lo, cutoff_ts) if lo else cutoff_ts
+    live_conds = ["TRUE"]
+    if lo:
+        live_conds.append(f"commit_ts >= {p(lo)}")
+    if hi:
+        live_conds.append(f"commit_ts < {p(hi)}")
+    parts.append(
+        f"""
+        SELECT project_id, user_email,
+               SUM(tab_lines_added + composer_lines_added), SUM(total_lines_added), COUNT(DISTINCT commit_hash)
+        FROM ai_code_commits
+        WHERE {" AND ".join(live_conds)} {project_cond}
+        GROUP BY project_id, user_email
+        """
+    )
+    return await conn.fetch(
+        f"""
+        SELECT s.project_id, p.name AS project_name, s.user_email,
+               SUM(s.ai_lines_added)::int    AS ai_lines_added,
+               SUM(s.total_lines_added)::int AS total_lines_added,
+               SUM(s.commit_count)::int      AS commit_count
+        FROM ({" UNION ALL ".join(parts)}) AS s (project_id, user_email, ai_lines_added, total_lines_added, commit_count)
+        LEFT JOIN projects p ON p.id = s.project_id
+        GROUP BY s.project_id, p.name, s.user_email
+        ORDER BY ai_lines_added DESC
+        """,
+        *params,
+    )
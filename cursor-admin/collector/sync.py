@@ -5,6 +5,7 @@
 import logging
 from datetime import date, datetime, timedelta
 
+import cache
 from cursor_api import get_members, get_daily_usage, get_spend
 from database import get_pool
 
@@ -48,6 +49,7 @@ async def sync_members():
                 m.get("role", "member"),
                 bool(m.get("isRemoved", False)),
             )
+    cache.bump(cache.MEMBERS)
     log.info("Synced %d members", len(members))
 
 
@@ -118,12 +120,15 @@ async def sync_daily_usage(days_back: int = 2):
             break
         page += 1
 
+    cache.bump(cache.USAGE)
     log.info("Synced %d daily-usage rows (last %d days)", total_rows, days_back)
 
 
-async def sync_spend():
-    data = await get_spend(page=1, page_size=500)
+async def sync_spend(page_size: int = 500):
+    data = await get_spend(page=1, page_size=page_size)
     members = data.get("teamMemberSpend", [])
+    for page in range(2, (data.get("totalPages") or 1) + 1):
+        members += (await get_spend(page=page, page_size=page_size)).get("teamMemberSpend", [])
     cycle_start_ms = data.get("subscriptionCycleStart", 0)
     from datetime import datetime
 
@@ -152,6 +157,7 @@ async def sync_spend():
                 m.get("fastPremiumRequests", 0),
                 m.get("monthlyLimitDollars"),
             )
+    cache.bump(cache.SPEND)
     log.info("Synced spend for %d members (cycle start %s)", len(members), cycle_start)
 
 
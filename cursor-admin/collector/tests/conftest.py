@@ -46,7 +46,7 @@ def mock_pool():
 
 @pytest.fixture
 def app_with_mocked_db(mock_pool):
-    """FastAPI app with init_db, run_full_sync, and get_pool mocked for testing."""
+    """FastAPI app with init_db, run_full_sync (worker), and get_pool / get_read_pool (main, jobs) mocked for testing."""
     pool, _ = mock_pool
 
     async def mock_init_db():
@@ -57,10 +57,17 @@ def app_with_mocked_db(mock_pool):
 
     with (
         patch("main.init_db", AsyncMock(side_effect=mock_init_db)),
-        patch("main.run_full_sync", AsyncMock(return_value=None)),
+        patch("worker.run_full_sync", AsyncMock(return_value=None)),
         patch("main.get_pool", AsyncMock(side_effect=mock_get_pool)),
+        patch("main.get_read_pool", AsyncMock(side_effect=mock_get_pool)),
+        patch("jobs.get_pool", AsyncMock(side_effect=mock_get_pool)),
     ):
+        from cache import response_cache
         from main import app
+        from workspace_resolver import resolver
+
+        response_cache.clear()
+        resolver.invalidate()
         yield app
 
 
@@ -0,0 +1,34 @@
+"""
+Fixtures for integration tests against a real PostgreSQL.
+Skipped unless TEST_DATABASE_URL points at a disposable database (tests migrate it and truncate the tables they seed).
+"""
+import os
+from pathlib import Path
+
+import pytest
+
+_MIGRATIONS_DIR = Path(__file__).resolve().parents[3] / "db" / "migrations"
+_TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL", "")
+
+
+@pytest.fixture
+async def db_pool():
+    """asyncpg pool on TEST_DATABASE_URL with all migrations applied."""
+    if not _TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL not set")
+    import asyncpg
+
+    dsn = _TEST_DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://")
+    pool = await asyncpg.create_pool(dsn, min_size=1, max_size=4)
+    async with pool.acquire() as conn:
+        for path in sorted(_MIGRATIONS_DIR.glob("*.sql")):
+            await conn.execute(path.read_text(encoding="utf-8"))
+    from cache import response_cache
+    from workspace_resolver import resolver
+
+    response_cache.clear()
+    resolver.invalidate()
+    try:
+        yield pool
+    finally:
+        await pool.close()
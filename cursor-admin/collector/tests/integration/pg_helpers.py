@@ -0,0 +1,90 @@
+"""Helpers for integration tests: record the SQL an endpoint issues and inspect its plan."""
+import json
+
+
+class RecordingPool:
+    """
+    Wraps a real pool; every fetch/fetchrow/fetchval issued through acquire() is run for real
+    and recorded as (sql, args) so tests can EXPLAIN exactly what an endpoint sent.
+    """
+
+    def __init__(self, pool, setup_sql: str = ""):
+        self._pool = pool
+        self._setup_sql = setup_sql
+        self.queries: list[tuple[str, tuple]] = []
+
+    def acquire(self):
+        return _RecordingAcquire(self)
+
+
+class _RecordingAcquire:
+    def __init__(self, owner: RecordingPool):
+        self._owner = owner
+        self._ctx = None
+
+    async def __aenter__(self):
+        self._ctx = self._owner._pool.acquire()
+        conn = await self._ctx.__aenter__()
+        if self._owner._setup_sql:
+            await conn.execute(self._owner._setup_sql)
+        return _RecordingConn(conn, self._owner.queries)
+
+    async def __aexit__(self, *exc):
+        await self._ctx.__aexit__(*exc)
+
+
+class _RecordingConn:
+    def __init__(self, conn, queries: list):
+        self._conn = conn
+        self._queries = queries
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    async def _run(self, method: str, sql: str, *args):
+        if not sql.lstrip().upper().startswith("EXPLAIN"):
+            self._queries.append((sql, args))
+        return await getattr(self._conn, method)(sql, *args)
+
+    async def fetch(self, sql, *args):
+        return await self._run("fetch", sql, *args)
+
+    async def fetchrow(self, sql, *args):
+        return await self._run("fetchrow", sql, *args)
+
+    async def fetchval(self, sql, *args):
+        return await self._run("fetchval", sql, *args)
+
+
+def plan_nodes(plan: dict):
+    """Yield every node of an EXPLAIN (FORMAT JSON) plan tree."""
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+async def explain(conn, sql: str, args: tuple, setup_sql: str = "") -> dict:
+    if setup_sql:
+        await conn.execute(setup_sql)
+    raw = await conn.fetchval(f"EXPLAIN (FORMAT JSON) {sql}", *args)
+    return (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+
+
+async def api_request(path: str, method: str = "GET", json=None, **params):
+    """Call path on the collector app in the current event loop (the pool is bound to it)."""
+    import httpx
+
+    from config import settings
+    from main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        r = await client.request(
+            method, path, params=params, json=json, headers={"x-api-key": settings.internal_api_key}
+        )
+    r.raise_for_status()
+    return r
+
+
+async def api_get(path: str, **params):
+    return (await api_request(path, **params)).json()
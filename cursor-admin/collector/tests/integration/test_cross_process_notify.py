@@ -0,0 +1,52 @@
+"""LISTEN/NOTIFY between processes (two PubSub instances stand in for api and worker)."""
+import asyncio
+import os
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+import cache
+from jobs import JOBS_CHANNEL
+from pubsub import PubSub
+
+
+@pytest.fixture
+async def buses(db_pool):
+    dsn = os.environ["TEST_DATABASE_URL"].replace("postgresql+asyncpg://", "postgresql://")
+    api, worker = PubSub(), PubSub()
+    with (
+        patch("database.settings.database_url", dsn),
+        patch("pubsub.get_pool", AsyncMock(return_value=db_pool)),
+    ):
+        await api.start()
+        await worker.start()
+        yield api, worker
+        await worker.stop()
+        await api.stop()
+
+
+async def _until(predicate, timeout=2.0):
+    for _ in range(int(timeout / 0.02)):
+        if predicate():
+            return True
+        await asyncio.sleep(0.02)
+    return False
+
+
+async def test_bump_reaches_other_process_once_per_tick(buses):
+    api, worker = buses
+    before = cache.generation(cache.USAGE)
+    # Both hooks are registered in this single test process: one bump publishes twice,
+    # and each instance applies only the other's message
+    cache.bump(cache.USAGE)
+    cache.bump(cache.USAGE, cache.SPEND)
+    assert await _until(lambda: api.stats()["received"] == 1 and worker.stats()["received"] == 1)
+    assert api.stats()["published"] == 1
+    assert cache.generation(cache.USAGE) == before + 2 + 2
+
+
+async def test_job_notify_wakes_runner(buses, db_pool):
+    with patch("pubsub.job_runner") as runner:
+        async with db_pool.acquire() as conn:
+            await conn.execute("SELECT pg_notify($1, 'git_collect')", JOBS_CHANNEL)
+        assert await _until(lambda: runner.wake.call_count >= 2)
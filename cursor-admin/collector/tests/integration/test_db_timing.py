@@ -0,0 +1,41 @@
+"""Real connections report queries, DB time and acquire wait to the request's timing."""
+import os
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+import request_timing
+from pg_helpers import api_request
+from request_timing import TimedConnection, TimedPool
+
+
+@pytest.fixture
+async def timed_pool(db_pool):
+    import asyncpg
+
+    dsn = os.environ["TEST_DATABASE_URL"].replace("postgresql+asyncpg://", "postgresql://")
+    pool = await asyncpg.create_pool(dsn, min_size=1, max_size=2, connection_class=TimedConnection)
+    request_timing.reset()
+    try:
+        yield TimedPool(pool)
+    finally:
+        request_timing.reset()
+        await pool.close()
+
+
+async def test_endpoint_queries_are_timed(timed_pool):
+    with patch("main.get_read_pool", AsyncMock(return_value=timed_pool)):
+        await api_request("/api/members")
+        await api_request("/api/members")
+    agg = request_timing.stats()["endpoints"]["GET /api/members"]
+    assert agg["requests"] == 2
+    assert agg["queries"] >= 2  # the SELECT, plus the pool's reset on release
+    assert 0 < agg["db_ms"] < agg["total_ms"]
+    assert agg["acquire_ms"] > 0
+    assert agg["serialise_ms"] > 0
+
+
+async def test_queries_outside_requests_are_not_recorded(timed_pool):
+    async with timed_pool.acquire() as conn:
+        assert await conn.fetchval("SELECT 1") == 1
+    assert request_timing.stats()["endpoints"] == {}
@@ -0,0 +1,114 @@
+"""Streaming exports: server-side cursor, NDJSON/CSV/gzip bodies, range filters."""
+import csv
+import gzip
+import io
+import json
+from datetime import date
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from pg_helpers import api_request
+
+import exports
+
+
+@pytest.fixture
+async def seeded_pool(db_pool):
+    async with db_pool.acquire() as conn:
+        await conn.execute("TRUNCATE agent_sessions, contribution_scores RESTART IDENTITY")
+        await conn.execute(
+            """
+            INSERT INTO agent_sessions (conversation_id, user_email, workspace_roots, ended_at, duration_seconds)
+            SELECT 'c' || g, 'u' || (g % 7) || '@x.com', ARRAY['/repo/' || (g % 3), '/other'],
+                   '2026-01-01 00:00+08'::timestamptz + g * INTERVAL '1 minute', g
+            FROM generate_series(0, 2999) AS g
+            """
+        )
+        # Outside the exported range (previous day in report timezone)
+        await conn.execute(
+            """
+            INSERT INTO agent_sessions (conversation_id, user_email, ended_at)
+            VALUES ('early', 'u@x.com', '2025-12-31 23:59+08')
+            """
+        )
+        await conn.execute(
+            """
+            INSERT INTO contribution_scores (user_email, period_type, period_key, score_breakdown, total_score)
+            VALUES ('a@x.com', 'weekly', '2026-W01', '{"ai_lines": 12}', 3.5),
+                   ('a@x.com', 'monthly', '2026-01', '{}', 7),
+                   ('a@x.com', 'monthly', '2025-12', '{}', 1)
+            """
+        )
+    return db_pool
+
+
+async def test_ndjson_export_streams_all_rows_in_range(seeded_pool):
+    with patch("exports.get_read_pool", AsyncMock(return_value=seeded_pool)):
+        r = await api_request("/api/export/agent_sessions", start="2026-01-01", end="2026-01-03")
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    assert 'filename="agent_sessions_2026-01-01_2026-01-03.ndjson"' in r.headers["content-disposition"]
+    lines = r.content.decode().splitlines()
+    assert len(lines) == 3000
+    first = json.loads(lines[0])
+    assert first["conversation_id"] == "c0"
+    assert first["workspace_roots"] == ["/repo/0", "/other"]
+    assert first["ended_at"] == "2025-12-31T16:00:00+00:00"
+
+
+async def test_csv_gzip_export_has_header_and_rows(seeded_pool):
+    with patch("exports.get_read_pool", AsyncMock(return_value=seeded_pool)):
+        r = await api_request(
+            "/api/export/agent_sessions", start="2026-01-01", end="2026-01-01", format="csv", gzip="true"
+        )
+    assert r.headers["content-type"] == "application/gzip"
+    rows = list(csv.reader(io.StringIO(gzip.decompress(r.content).decode())))
+    assert rows[0][:3] == ["id", "conversation_id", "user_email"]
+    assert len(rows) == 1 + 1440  # one row per minute of 2026-01-01 (+08)
+    assert rows[1][4] == '["/repo/0","/other"]'
+
+
+async def test_stream_uses_cursor_and_yields_in_chunks(seeded_pool):
+    with (
+        patch("exports.get_read_pool", AsyncMock(return_value=seeded_pool)),
+        patch("exports.settings.export_fetch_size", 100),
+        patch("exports.settings.export_chunk_bytes", 16 * 1024),
+    ):
+        chunks = [c async for c in exports.stream("agent_sessions", date(2026, 1, 1), date(2026, 1, 3), "ndjson", False)]
+    assert len(chunks) > 10
+    assert all(len(c) < 32 * 1024 for c in chunks)
+    assert sum(c.count(b"\n") for c in chunks) == 3000
+
+
+async def test_contribution_scores_export_by_overlapping_period(seeded_pool):
+    with patch("exports.get_read_pool", AsyncMock(return_value=seeded_pool)):
+        r = await api_request("/api/export/contribution_scores", start="2026-01-01", end="2026-01-31")
+    rows = [json.loads(line) for line in r.content.decode().splitlines()]
+    assert [(x["period_type"], x["period_key"]) for x in rows] == [("monthly", "2026-01"), ("weekly", "2026-W01")]
+    assert rows[1]["score_breakdown"] == {"ai_lines": 12}
+    assert rows[1]["total_score"] == 3.5
+
+
+async def test_contribution_scores_export_carries_engine_payouts(seeded_pool):
+    import contribution_engine
+
+    async with seeded_pool.acquire() as conn:
+        await conn.execute("TRUNCATE projects RESTART IDENTITY CASCADE")
+        pid = await conn.fetchval(
+            """
+            INSERT INTO projects (name, workspace_rules, created_by, incentive_pool)
+            VALUES ('p', '{/w}', 'a@x.com', 1000) RETURNING id
+            """
+        )
+    data = {
+        ("a@x.com", pid): {"ai_lines_added": 30, "total_lines_added": 40, "commit_count": 2},
+        ("b@x.com", pid): {"ai_lines_added": 10, "total_lines_added": 50, "commit_count": 1},
+    }
+    with patch("contribution_engine.get_pool", AsyncMock(return_value=seeded_pool)):
+        await contribution_engine.calculate_period("monthly", "2026-02", data=data)
+    with patch("exports.get_read_pool", AsyncMock(return_value=seeded_pool)):
+        r = await api_request("/api/export/contribution_scores", start="2026-02-01", end="2026-02-28")
+    rows = [json.loads(line) for line in r.content.decode().splitlines()]
+    a = next(x for x in rows if x["user_email"] == "a@x.com" and x["project_id"] == pid)
+    assert a["incentive_amount"] == 750
+    assert (a["ai_lines_added"], a["total_lines_added"], a["ai_ratio"], a["contribution_pct"]) == (30, 40, 0.75, 0.75)
+    assert a["delivery_factor"] == 1
@@ -0,0 +1,44 @@
+"""Scheduler leader election on a real advisory lock: single leader, release, takeover."""
+import os
+from unittest.mock import patch
+
+import pytest
+
+from leader import LeaderElection
+
+
+@pytest.fixture
+async def elections(db_pool):
+    dsn = os.environ["TEST_DATABASE_URL"].replace("postgresql+asyncpg://", "postgresql://")
+    created = []
+
+    def make():
+        e = LeaderElection("test:leader-election")
+        created.append(e)
+        return e
+
+    with patch("database.settings.database_url", dsn):
+        yield make
+    for e in created:
+        await e.stop()
+
+
+async def test_one_leader_and_takeover_after_release(elections):
+    a, b = elections(), elections()
+    assert await a.check() is True
+    assert await b.check() is False
+    assert await a.check() is True
+
+    await a.stop()
+    assert await b.check() is True
+    assert await a.check() is False
+
+
+async def test_leader_steps_down_when_backend_killed_and_follower_takes_over(elections, db_pool):
+    a, b = elections(), elections()
+    assert await a.check() is True
+    pid = a._conn.get_server_pid()
+    async with db_pool.acquire() as conn:
+        await conn.execute("SELECT pg_terminate_backend($1)", pid)
+    assert await a.check() is False
+    assert await b.check() is True
@@ -0,0 +1,54 @@
+"""Parquet snapshots: hive month partitions, incremental re-export of open months only."""
+import json
+from datetime import date
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+import parquet_export  # noqa: E402
+
+
+@pytest.fixture
+async def seeded_pool(db_pool):
+    async with db_pool.acquire() as conn:
+        await conn.execute("TRUNCATE agent_sessions, daily_usage, ai_code_commits RESTART IDENTITY")
+        await conn.execute(
+            """
+            INSERT INTO agent_sessions (conversation_id, user_email, workspace_roots, ended_at, duration_seconds)
+            VALUES ('a', 'u@x.com', ARRAY['/r'], '2026-01-31 23:30+08', 10),
+                   ('b', 'u@x.com', NULL,        '2026-02-01 00:30+08', NULL),
+                   ('c', 'v@x.com', ARRAY['/r'], '2026-03-05 12:00+08', 30)
+            """
+        )
+        await conn.execute(
+            "INSERT INTO daily_usage (email, day, agent_requests) VALUES ('u@x.com', '2026-02-10', 4)"
+        )
+    return db_pool
+
+
+async def test_export_writes_month_partitions_and_skips_closed_months(seeded_pool, tmp_path):
+    with (
+        patch("parquet_export.get_pool", AsyncMock(return_value=seeded_pool)),
+        patch("parquet_export.settings.parquet_export_dir", str(tmp_path)),
+        patch("parquet_export.today", return_value=date(2026, 3, 2)),
+    ):
+        first = await parquet_export.run_parquet_export()
+        second = await parquet_export.run_parquet_export()
+
+    assert first["agent_sessions"] == {"months": 3, "written": {"2026-01": 1, "2026-02": 1, "2026-03": 1}}
+    assert first["ai_code_commits"] == {"months": 0, "written": {}}
+    # January closed more than grace days ago -> final; February is still within grace
+    assert second["agent_sessions"]["written"] == {"2026-02": 1, "2026-03": 1}
+
+    jan = pq.read_table(tmp_path / "agent_sessions" / "month=2026-01" / "part-0.parquet").to_pylist()
+    assert [r["conversation_id"] for r in jan] == ["a"]
+    assert jan[0]["workspace_roots"] == ["/r"]
+    assert str(jan[0]["ended_at"]) == "2026-01-31 15:30:00+00:00"
+    usage = pq.read_table(tmp_path / "daily_usage" / "month=2026-02" / "part-0.parquet").to_pylist()
+    assert usage[0]["day"] == date(2026, 2, 10) and usage[0]["agent_requests"] == 4
+
+    manifest = json.loads((tmp_path / "agent_sessions" / "_manifest.json").read_text())
+    assert manifest["2026-01"]["final"] is True
+    assert manifest["2026-02"]["final"] is False
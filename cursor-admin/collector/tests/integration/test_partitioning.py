@@ -0,0 +1,185 @@
+"""Monthly partitioning: conversion keeps data and ids, queries prune, retention rolls up then detaches."""
+import asyncio
+import os
+from datetime import date
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from pg_helpers import api_request, explain, plan_nodes
+
+import partitions
+from database import apply_migrations
+from timerange import day_bounds
+
+TODAY = date(2026, 3, 15)
+
+
+@pytest.fixture
+async def part_pool():
+    """Pool on a scratch schema so converting tables does not affect the other integration tests."""
+    url = os.environ.get("TEST_DATABASE_URL", "")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL not set")
+    import asyncpg
+
+    dsn = url.replace("postgresql+asyncpg://", "postgresql://")
+    admin = await asyncpg.connect(dsn)
+    await admin.execute("DROP SCHEMA IF EXISTS part_test CASCADE; CREATE SCHEMA part_test")
+    pool = await asyncpg.create_pool(dsn, min_size=1, max_size=4, server_settings={"search_path": "part_test"})
+    try:
+        async with pool.acquire() as conn:
+            await apply_migrations(conn)
+            await conn.execute(
+                """
+                INSERT INTO agent_sessions (conversation_id, user_email, workspace_roots, ended_at, duration_seconds)
+                SELECT 'c' || g, 'u' || (g % 3) || '@x.com', ARRAY['/repo'],
+                       '2026-01-01 00:00+08'::timestamptz + g * INTERVAL '1 day', 60
+                FROM generate_series(0, 69) AS g   -- 2026-01-01 .. 2026-03-11 (+08)
+                """
+            )
+            await conn.execute(
+                """
+                INSERT INTO ai_code_commits (commit_hash, user_email, repo_name, tab_lines_added, total_lines_added, commit_ts)
+                SELECT 'h' || g, 'u@x.com', 'r', 2, 5, '2026-01-15 12:00+08'::timestamptz + g * INTERVAL '10 days'
+                FROM generate_series(0, 5) AS g
+                """
+            )
+        yield pool
+    finally:
+        await pool.close()
+        await admin.execute("DROP SCHEMA IF EXISTS part_test CASCADE")
+        await admin.close()
+
+
+async def _convert_all(pool):
+    async with pool.acquire() as conn:
+        for table in partitions.TABLES:
+            result = await partitions.convert(conn, table, TODAY)
+            assert result["converted"] is True
+        assert (await partitions.convert(conn, "agent_sessions", TODAY))["converted"] is False
+
+
+async def test_convert_keeps_rows_ids_and_prunes(part_pool):
+    async with part_pool.acquire() as conn:
+        before = await conn.fetch("SELECT id, conversation_id, primary_workspace FROM agent_sessions ORDER BY id")
+    await _convert_all(part_pool)
+
+    async with part_pool.acquire() as conn:
+        assert await partitions.is_partitioned(conn, "agent_sessions")
+        assert await partitions.list_partitions(conn, "agent_sessions") == [
+            "agent_sessions_default",
+            "agent_sessions_p202601",
+            "agent_sessions_p202602",
+            "agent_sessions_p202603",
+            "agent_sessions_p202604",
+            "agent_sessions_p202605",
+            "agent_sessions_p202606",
+        ]
+        after = await conn.fetch("SELECT id, conversation_id, primary_workspace FROM agent_sessions ORDER BY id")
+        assert [tuple(r) for r in after] == [tuple(r) for r in before]
+        assert await conn.fetchval("SELECT COUNT(*) FROM agent_sessions_p202602") == 28
+        assert await conn.fetchval("SELECT COUNT(*) FROM ai_code_commits") == 6
+
+        # Indexes and summary views were rebuilt on the partitioned parent
+        assert await conn.fetchval("SELECT to_regclass('idx_agent_sessions_ended_cover') IS NOT NULL")
+        assert await conn.fetchval("SELECT COUNT(*) FROM mv_agent_session_daily") == 70
+
+        plan = await explain(
+            conn,
+            "SELECT COUNT(*) FROM agent_sessions WHERE ended_at >= $1 AND ended_at < $2",
+            day_bounds(date(2026, 2, 1), date(2026, 2, 28)),
+        )
+        scanned = {n["Relation Name"] for n in plan_nodes(plan) if "Relation Name" in n}
+        assert scanned == {"agent_sessions_p202602"}
+
+        # Writers' ON CONFLICT targets exist on the partitioned tables
+        await conn.execute(
+            """
+            INSERT INTO ai_code_commits (commit_hash, user_email, repo_name, commit_ts)
+            VALUES ('h0', 'u@x.com', 'r2', '2026-01-15 12:00+08')
+            ON CONFLICT (commit_hash, user_email, commit_ts) DO UPDATE SET repo_name = EXCLUDED.repo_name
+            """
+        )
+        assert await conn.fetchval("SELECT repo_name FROM ai_code_commits WHERE commit_hash = 'h0'") == "r2"
+
+    payload = {"event": "stop", "conversation_id": "c0", "user_email": "u0@x.com", "ended_at": 1767225600}
+    with patch("main.get_pool", AsyncMock(return_value=part_pool)):
+        await api_request("/api/sessions", method="POST", json=payload)  # duplicate conversation: ignored
+        await api_request("/api/sessions", method="POST", json={**payload, "conversation_id": "new"})
+    async with part_pool.acquire() as conn:
+        assert await conn.fetchval("SELECT COUNT(*) FROM agent_sessions WHERE conversation_id = 'c0'") == 1
+        new_id = await conn.fetchval("SELECT id FROM agent_sessions WHERE conversation_id = 'new'")
+        assert new_id > max(r["id"] for r in before)
+
+
+async def test_retention_rolls_up_then_detaches(part_pool):
+    await _convert_all(part_pool)
+    with (
+        patch("partitions.get_pool", AsyncMock(return_value=part_pool)),
+        patch("partitions.settings.agent_sessions_retention_months", 1),
+    ):
+        result = await partitions.run_partition_maintenance(TODAY)
+    assert result["agent_sessions"] == {"created": [], "retired": ["agent_sessions_p202601"]}
+    assert result["ai_code_commits"]["retired"] == []
+
+    async with part_pool.acquire() as conn:
+        assert "agent_sessions_p202601" not in await partitions.list_partitions(conn, "agent_sessions")
+        assert await conn.fetchval("SELECT COUNT(*) FROM agent_sessions_p202601") == 31  # detached, kept
+        assert await conn.fetchval("SELECT SUM(session_count) FROM agent_session_daily_archive") == 31
+        await conn.execute("REFRESH MATERIALIZED VIEW mv_agent_session_daily")
+        assert await conn.fetchval("SELECT SUM(session_count) FROM mv_agent_session_daily") == 70
+        assert await conn.fetchval(
+            "SELECT SUM(session_count) FROM mv_agent_session_daily WHERE day < '2026-02-01'"
+        ) == 31
+
+
+async def test_retention_drop_mode(part_pool):
+    await _convert_all(part_pool)
+    with (
+        patch("partitions.get_pool", AsyncMock(return_value=part_pool)),
+        patch("partitions.settings.ai_code_commits_retention_months", 1),
+        patch("partitions.settings.partition_retention_mode", "drop"),
+    ):
+        result = await partitions.run_partition_maintenance(TODAY)
+    assert result["ai_code_commits"]["retired"] == ["ai_code_commits_p202601"]
+    async with part_pool.acquire() as conn:
+        assert not await conn.fetchval("SELECT to_regclass('ai_code_commits_p202601') IS NOT NULL")
+        assert await conn.fetchval("SELECT SUM(commit_count) FROM ai_commit_daily_archive") == 2
+
+
+async def test_concurrent_session_writes_insert_a_conversation_once(part_pool):
+    """Partitioned agent_sessions is unique on (conversation_id, ended_at) only: the writers'
+    per-conversation advisory lock is what keeps a repeat report with another ended_at out."""
+    from datetime import datetime, timedelta, timezone
+
+    from session_buffer import CONVERSATION_LOCK_SQL, write_rows
+
+    await _convert_all(part_pool)
+    t = datetime(2026, 3, 12, tzinfo=timezone.utc)
+
+    def rows(offset_minutes):
+        return [
+            (f"dup{i}", "u@x.com", None, [], None, t + timedelta(minutes=offset_minutes + i), None, None)
+            for i in range(20)
+        ]
+
+    async def write(batch):
+        async with part_pool.acquire() as conn:
+            return await write_rows(conn, batch)
+
+    assert sum(await asyncio.gather(write(rows(0)), write(rows(30)))) == 20
+
+    # a writer that holds the lock makes the other wait, then see its row
+    async with part_pool.acquire() as holder:
+        async with holder.transaction():
+            await holder.execute(CONVERSATION_LOCK_SQL, "held")
+            await holder.execute(
+                "INSERT INTO agent_sessions (conversation_id, user_email, ended_at) VALUES ('held', 'u@x.com', $1)", t
+            )
+            waiting = asyncio.create_task(write([("held", "u@x.com", None, [], None, t + timedelta(hours=1), None, None)]))
+            await asyncio.sleep(0.3)
+            assert not waiting.done()
+        assert await waiting == 0
+    async with part_pool.acquire() as conn:
+        assert await conn.fetchval("SELECT COUNT(*) FROM agent_sessions WHERE conversation_id LIKE 'dup%'") == 20
+        assert await conn.fetchval("SELECT COUNT(*) FROM agent_sessions WHERE conversation_id = 'held'") == 1
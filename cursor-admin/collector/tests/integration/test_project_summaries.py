@@ -0,0 +1,67 @@
+"""Project summaries (single and batch) come from one query and aggregate correctly."""
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from pg_helpers import RecordingPool, api_get
+
+
+@pytest.fixture
+async def seeded_pool(db_pool):
+    async with db_pool.acquire() as conn:
+        await conn.execute("TRUNCATE ai_code_commits, spend_snapshots RESTART IDENTITY")
+        await conn.execute("TRUNCATE projects RESTART IDENTITY CASCADE")
+        await conn.execute(
+            """
+            INSERT INTO projects (name, workspace_rules, member_emails, created_by, budget_amount, incentive_pool)
+            VALUES ('alpha', '{}', ARRAY['a@x.com', 'b@x.com'], 'admin', 1000, 50),
+                   ('beta',  '{}', ARRAY[]::text[],            'admin', NULL, NULL)
+            """
+        )
+        await conn.execute(
+            """
+            INSERT INTO ai_code_commits (commit_hash, user_email, repo_name, project_id,
+                                         tab_lines_added, composer_lines_added, total_lines_added, commit_ts)
+            VALUES ('h1', 'a@x.com', 'r', 1, 10, 20, 60, NOW()),
+                   ('h2', 'a@x.com', 'r', 1, 5,  0,  10, NOW()),
+                   ('h1', 'b@x.com', 'r', 1, 1,  1,  4,  NOW()),  -- same commit, second author
+                   ('h9', 'c@x.com', 'r', NULL, 100, 0, 100, NOW())
+            """
+        )
+        await conn.execute(
+            """
+            INSERT INTO spend_snapshots (email, billing_cycle_start, spend_cents)
+            VALUES ('a@x.com', '2026-01-01', 9999), ('a@x.com', '2026-02-01', 1250),
+                   ('b@x.com', '2026-02-01', 250), ('z@x.com', '2026-02-01', 777)
+            """
+        )
+    return db_pool
+
+
+async def test_project_summary_aggregates(seeded_pool):
+    with patch("main.get_read_pool", AsyncMock(return_value=seeded_pool)):
+        data = await api_get("/api/projects/1/summary")
+    assert data["project"]["name"] == "alpha"
+    assert "agg_members" not in data["project"]
+    assert data["budget"] == {"amount": 1000.0, "period": "monthly", "spent_estimate": 15.0}
+    assert data["contribution"] == {
+        "total_ai_lines": 37, "total_lines": 74, "ai_ratio": 0.5, "commit_count": 2, "member_count": 2,
+    }
+    assert data["incentive_pool"] == 50.0
+    assert [m["user_email"] for m in data["members"]] == ["a@x.com", "b@x.com"]
+    assert data["members"][0] == {
+        "user_email": "a@x.com", "ai_lines_added": 35, "total_lines_added": 70, "ai_ratio": 0.5,
+        "commit_count": 2, "contribution_pct": round(35 / 37, 4),
+    }
+
+
+async def test_project_summaries_batch_is_one_query(seeded_pool):
+    recording = RecordingPool(seeded_pool)
+    with patch("main.get_read_pool", AsyncMock(return_value=recording)):
+        data = await api_get("/api/projects/summaries", ids="2,1,42")
+    assert len(recording.queries) == 1
+    assert [s["project"]["name"] for s in data["items"]] == ["alpha", "beta"]
+    assert data["missing"] == [42]
+    beta = data["items"][1]
+    assert beta["members"] == []
+    assert beta["contribution"]["commit_count"] == 0
+    assert beta["budget"]["spent_estimate"] == 0
@@ -0,0 +1,54 @@
+"""Tracked migrations: only new or changed files run, recorded in schema_migrations."""
+import os
+from unittest.mock import patch
+
+import pytest
+
+from database import apply_migrations, migrations_dir
+
+
+@pytest.fixture
+async def scratch_conn():
+    url = os.environ.get("TEST_DATABASE_URL", "")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL not set")
+    import asyncpg
+
+    dsn = url.replace("postgresql+asyncpg://", "postgresql://")
+    conn = await asyncpg.connect(dsn, server_settings={"search_path": "mig_test"})
+    await conn.execute("DROP SCHEMA IF EXISTS mig_test CASCADE; CREATE SCHEMA mig_test")
+    try:
+        yield conn
+    finally:
+        await conn.execute("DROP SCHEMA IF EXISTS mig_test CASCADE")
+        await conn.close()
+
+
+async def test_only_new_or_changed_migrations_run(scratch_conn, tmp_path):
+    files = sorted(f for f in os.listdir(migrations_dir()) if f.endswith(".sql"))
+    assert await apply_migrations(scratch_conn) == files
+    assert await scratch_conn.fetchval("SELECT COUNT(*) FROM schema_migrations") == len(files)
+    assert await apply_migrations(scratch_conn) == []
+
+    # A copy of the directory with one edited file and one new file
+    for f in files:
+        (tmp_path / f).write_text(open(os.path.join(migrations_dir(), f), encoding="utf-8").read(), encoding="utf-8")
+    (tmp_path / files[0]).write_text((tmp_path / files[0]).read_text(encoding="utf-8") + "\n-- edited\n", encoding="utf-8")
+    (tmp_path / "999_extra.sql").write_text("CREATE TABLE IF NOT EXISTS extra_t (id INT);", encoding="utf-8")
+    with patch("database.migrations_dir", return_value=str(tmp_path)):
+        assert await apply_migrations(scratch_conn) == [files[0], "999_extra.sql"]
+        assert await apply_migrations(scratch_conn) == []
+        assert len(await apply_migrations(scratch_conn, reapply=True)) == len(files) + 1
+
+
+async def test_failed_migration_is_not_recorded(scratch_conn, tmp_path):
+    (tmp_path / "001_ok.sql").write_text("CREATE TABLE ok_t (id INT);", encoding="utf-8")
+    (tmp_path / "002_bad.sql").write_text("CREATE TABLE bad_t (id INT); SELECT no_such_column FROM ok_t;", encoding="utf-8")
+    with patch("database.migrations_dir", return_value=str(tmp_path)):
+        with pytest.raises(Exception):
+            await apply_migrations(scratch_conn)
+    versions = [r["version"] for r in await scratch_conn.fetch("SELECT version FROM schema_migrations")]
+    assert versions == ["001_ok.sql"]
+    assert await scratch_conn.fetchval("SELECT to_regclass('bad_t')") is None
+    # the advisory lock was released despite the failure
+    assert await scratch_conn.fetchval("SELECT COUNT(*) FROM pg_locks WHERE locktype = 'advisory'") == 0
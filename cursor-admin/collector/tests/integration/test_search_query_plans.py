@@ -0,0 +1,65 @@
+"""
+Search filters must hit their dedicated indexes: trigram GIN for session workspace substrings
+and the full-text GIN index for AI commit messages.
+"""
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from pg_helpers import RecordingPool, api_get, explain, plan_nodes
+
+_NO_SEQSCAN = "SET enable_seqscan = off"
+
+
+async def _index_names(pool, path: str, table: str, **params) -> tuple[list[str], dict]:
+    recording = RecordingPool(pool)
+    with patch("main.get_read_pool", AsyncMock(return_value=recording)):
+        result = await api_get(path, **params)
+    sql, args = next((s, a) for s, a in recording.queries if table in s and "ORDER BY" in s)
+    async with pool.acquire() as conn:
+        plan = await explain(conn, sql, args, setup_sql=_NO_SEQSCAN)
+    return [n["Index Name"] for n in plan_nodes(plan) if "Index Name" in n], result
+
+
+async def test_ai_commits_message_search_uses_fulltext_index(db_pool):
+    async with db_pool.acquire() as conn:
+        await conn.execute("TRUNCATE ai_code_commits RESTART IDENTITY")
+        await conn.execute(
+            """
+            INSERT INTO ai_code_commits (commit_hash, user_email, repo_name, commit_message, commit_ts)
+            SELECT 'h' || g, 'user' || (g % 50) || '@example.com', 'repo',
+                   CASE WHEN g % 1000 = 0 THEN 'Fix login redirect loop' ELSE 'chore: bump deps #' || g END,
+                   TIMESTAMPTZ '2025-01-01 00:00+08' + (g || ' minutes')::interval
+            FROM generate_series(1, 20000) AS g
+            """
+        )
+        await conn.execute("ANALYZE ai_code_commits")
+
+    indexes, result = await _index_names(
+        db_pool, "/api/ai-commits", "ai_code_commits", q="login -chore", count="exact"
+    )
+    assert "idx_ai_code_commits_msg_fts" in indexes
+    assert result["total"] == 20
+    assert all("login" in item["commit_message"].lower() for item in result["items"])
+
+
+async def test_sessions_workspace_search_uses_trigram_index(db_pool):
+    async with db_pool.acquire() as conn:
+        if not await conn.fetchval("SELECT to_regclass('idx_agent_sessions_ws_trgm') IS NOT NULL"):
+            pytest.skip("pg_trgm not available on this server")
+        await conn.execute("TRUNCATE agent_sessions RESTART IDENTITY")
+        await conn.execute(
+            """
+            INSERT INTO agent_sessions (conversation_id, user_email, workspace_roots, ended_at, duration_seconds)
+            SELECT 'c' || g, 'user' || (g % 50) || '@example.com', ARRAY['/repos/project-' || (g % 500)],
+                   TIMESTAMPTZ '2025-01-01 00:00+08' + (g || ' minutes')::interval, 60
+            FROM generate_series(1, 20000) AS g
+            """
+        )
+        await conn.execute("ANALYZE agent_sessions")
+
+    indexes, result = await _index_names(
+        db_pool, "/api/sessions", "agent_sessions", workspace="PROJECT-123", start="2025-01-01",
+        end="2025-01-31", count="exact",
+    )
+    assert "idx_agent_sessions_ws_trgm" in indexes
+    assert result["total"] == 40
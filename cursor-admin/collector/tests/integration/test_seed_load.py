@@ -0,0 +1,56 @@
+"""seed.py loads every table by COPY, rebuilds the indexes it dropped (or keeps them if the COPY fails) and keeps foreign keys valid."""
+from datetime import date
+from itertools import islice
+
+import pytest
+
+import seed
+
+_V = seed.Volumes(seed=3, members=20, projects=5, sessions=1500, commits=2500, days=40, end=date(2026, 3, 31))
+
+
+async def _index_names(conn, table):
+    return await conn.fetch("SELECT indexname FROM pg_indexes WHERE tablename = $1 ORDER BY 1", table)
+
+
+async def test_seed_loads_all_tables(db_pool):
+    async with db_pool.acquire() as conn:
+        before = {t: await _index_names(conn, t) for t in ("agent_sessions", "ai_code_commits", "projects")}
+        try:
+            loaded = await seed.seed(conn, _V, truncate=True)
+            assert loaded == {
+                "members": 20,
+                "projects": 5,
+                "agent_sessions": 1500,
+                "ai_code_commits": 2500,
+                "daily_usage": 20 * 40,
+                "spend_snapshots": 20 * 2,
+            }
+            for t, n in loaded.items():
+                assert await conn.fetchval(f"SELECT COUNT(*) FROM {t}") == n
+            assert {t: await _index_names(conn, t) for t in before} == before
+            # serial sequences continue after the explicit ids
+            assert await conn.fetchval("SELECT nextval(pg_get_serial_sequence('projects', 'id'))") == 6
+            assert await conn.fetchval(
+                "SELECT COUNT(*) FROM agent_sessions s JOIN members m ON m.email = s.user_email"
+            ) == 1500
+
+            with pytest.raises(RuntimeError, match="not empty"):
+                await seed.seed(conn, _V)
+        finally:
+            await conn.execute(f"TRUNCATE {', '.join(seed.TABLES)} RESTART IDENTITY CASCADE")
+
+
+async def test_failed_copy_keeps_the_table_indexes(db_pool):
+    def broken_rows():
+        yield from islice(seed.World(_V).session_rows(), 10)
+        raise ValueError("generator failed")
+
+    async with db_pool.acquire() as conn:
+        before = await _index_names(conn, "agent_sessions")
+        assert len(before) > 2  # secondary indexes for _copy to drop
+        rows = await conn.fetchval("SELECT COUNT(*) FROM agent_sessions")
+        with pytest.raises(ValueError):
+            await seed._copy(conn, "agent_sessions", seed.SESSION_COLUMNS, broken_rows())
+        assert await _index_names(conn, "agent_sessions") == before
+        assert await conn.fetchval("SELECT COUNT(*) FROM agent_sessions") == rows
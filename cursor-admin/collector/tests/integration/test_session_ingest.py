@@ -0,0 +1,103 @@
+"""Session ingest: /api/sessions/batch and the buffered COPY + merge writer."""
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from pg_helpers import api_request
+
+from session_buffer import SessionBuffer
+
+
+@pytest.fixture
+async def clean_pool(db_pool):
+    async with db_pool.acquire() as conn:
+        await conn.execute("TRUNCATE agent_sessions, projects RESTART IDENTITY CASCADE")
+        await conn.execute(
+            """
+            INSERT INTO projects (name, workspace_rules, status, created_by)
+            VALUES ('p', ARRAY['D:\\Work\\Repo'], 'active', 'admin@x.com')
+            """
+        )
+        await conn.execute(
+            "INSERT INTO agent_sessions (conversation_id, user_email, ended_at) VALUES ('stored', 'u@x.com', NOW())"
+        )
+    return db_pool
+
+
+def _body(conv: str, ended_at: int = 1767225600, **extra) -> dict:
+    return {"event": "stop", "conversation_id": conv, "user_email": "u@x.com", "ended_at": ended_at, **extra}
+
+
+async def _sessions(pool) -> dict:
+    async with pool.acquire() as conn:
+        rows = await conn.fetch("SELECT conversation_id, ended_at, started_at, project_id FROM agent_sessions")
+    return {r["conversation_id"]: r for r in rows}
+
+
+async def test_batch_without_buffer_writes_and_dedupes(clean_pool):
+    batch = [
+        _body("a", duration_seconds=30, workspace_roots=["d:/work/repo/src"]),
+        _body("a", ended_at=1767225700),  # same conversation again: first (earliest) kept
+        _body("stored"),
+        _body("b", project_id=None),
+    ]
+    with patch("main.get_pool", AsyncMock(return_value=clean_pool)):
+        r = await api_request("/api/sessions/batch", method="POST", json=batch)
+    assert r.status_code == 202
+    assert r.json() == {"accepted": 4}
+    rows = await _sessions(clean_pool)
+    assert set(rows) == {"stored", "a", "b"}
+    assert rows["a"]["ended_at"].timestamp() == 1767225600
+    assert rows["a"]["started_at"].timestamp() == 1767225570
+    assert rows["a"]["project_id"] == 1
+
+
+async def test_buffered_ingest_flushes_on_threshold_and_on_stop(clean_pool):
+    buf = SessionBuffer()
+    with (
+        patch("main.get_pool", AsyncMock(return_value=clean_pool)),
+        patch("session_buffer.get_pool", AsyncMock(return_value=clean_pool)),
+        patch("main.session_buffer", buf),
+        patch("session_buffer.settings.session_buffer_flush_rows", 50),
+        patch("session_buffer.settings.session_buffer_flush_seconds", 60),
+    ):
+        await buf.start()
+        await api_request("/api/sessions/batch", method="POST", json=[_body(f"c{i}") for i in range(120)])
+        await api_request("/api/sessions", method="POST", json=_body("single"))
+        # 121 queued >= 50: flushed in COPY chunks of 50 (by the loop or here, serialised by the lock)
+        for _ in range(50):
+            if not len(buf):
+                break
+            await buf.flush()
+        assert len(await _sessions(clean_pool)) == 1 + 121
+
+        await api_request("/api/sessions", method="POST", json=_body("late"))
+        assert "late" not in await _sessions(clean_pool)
+        await buf.stop()
+    assert "late" in await _sessions(clean_pool)
+    stats = buf.stats()
+    assert stats["accepted"] == 122
+    assert stats["inserted"] == 122
+
+
+async def test_unknown_project_id_falls_back_and_bad_row_does_not_block_the_buffer(clean_pool):
+    buf = SessionBuffer()
+    with (
+        patch("main.get_pool", AsyncMock(return_value=clean_pool)),
+        patch("session_buffer.get_pool", AsyncMock(return_value=clean_pool)),
+        patch("main.session_buffer", buf),
+    ):
+        await buf.start()
+        batch = [_body("unknown", project_id=99, workspace_roots=["D:/Work/Repo"]), _body("known", project_id=1)]
+        await api_request("/api/sessions/batch", method="POST", json=batch)
+        # a row that slipped past validation (project deleted after queueing) fails the FK on merge
+        ended = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        buf.offer([("bad", "u@x.com", None, [], None, ended, None, 98)])
+        await api_request("/api/sessions", method="POST", json=_body("after"))
+        await buf.flush()
+        await buf.stop()
+    rows = await _sessions(clean_pool)
+    assert rows["unknown"]["project_id"] == 1
+    assert rows["known"]["project_id"] == 1
+    assert "after" in rows and "bad" not in rows
+    assert buf.stats()["dropped"] == 1
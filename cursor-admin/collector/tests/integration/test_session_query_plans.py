@@ -0,0 +1,70 @@
+"""
+Session date-filter queries must be index-driven: the SQL each endpoint actually issues is
+EXPLAINed against a seeded agent_sessions table and must not sequentially scan it.
+"""
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from pg_helpers import RecordingPool, api_get, explain, plan_nodes
+
+_NO_SEQSCAN = "SET enable_seqscan = off"
+
+
+@pytest.fixture
+async def seeded_pool(db_pool):
+    async with db_pool.acquire() as conn:
+        await conn.execute("TRUNCATE agent_sessions RESTART IDENTITY")
+        # No recorded view refresh: summaries take the live path under test here
+        await conn.execute("TRUNCATE summary_view_refreshes")
+        await conn.execute(
+            """
+            INSERT INTO agent_sessions (conversation_id, user_email, workspace_roots, ended_at, duration_seconds)
+            SELECT 'c' || g,
+                   'user' || (g % 50) || '@example.com',
+                   ARRAY['/repos/project-' || (g % 20)],
+                   TIMESTAMPTZ '2025-01-01 00:00+08' + (g || ' minutes')::interval,
+                   g % 3600
+            FROM generate_series(1, 20000) AS g
+            """
+        )
+        await conn.execute("ANALYZE agent_sessions")
+    return db_pool
+
+
+async def _assert_no_seqscan(pool, path, **params):
+    recording = RecordingPool(pool)
+    with patch("main.get_read_pool", AsyncMock(return_value=recording)):
+        await api_get(path, **params)
+    session_queries = [(sql, args) for sql, args in recording.queries if "agent_sessions" in sql]
+    assert session_queries
+    async with pool.acquire() as conn:
+        for sql, args in session_queries:
+            plan = await explain(conn, sql, args, setup_sql=_NO_SEQSCAN)
+            nodes = list(plan_nodes(plan))
+            scans = [n["Node Type"] for n in nodes if n.get("Relation Name") == "agent_sessions"]
+            assert scans, sql
+            assert "Seq Scan" not in scans, f"{scans}\n{sql}"
+            # The time range must be an index condition, not a filter over a full index walk
+            conds = [n.get("Index Cond", "") for n in nodes if n.get("Index Name", "").startswith("idx_agent_sessions")]
+            assert any("ended_at" in c for c in conds), f"{conds}\n{sql}"
+
+
+async def test_list_sessions_uses_index(seeded_pool):
+    await _assert_no_seqscan(seeded_pool, "/api/sessions", start="2025-01-03", end="2025-01-05", count="exact")
+
+
+async def test_list_sessions_by_email_uses_index(seeded_pool):
+    await _assert_no_seqscan(
+        seeded_pool, "/api/sessions", email="user7@example.com", start="2025-01-03", end="2025-01-05",
+        count="exact",
+    )
+
+
+async def test_sessions_summary_uses_index(seeded_pool):
+    await _assert_no_seqscan(seeded_pool, "/api/sessions/summary", start="2025-01-03", end="2025-01-05")
+
+
+async def test_sessions_summary_by_project_uses_index(seeded_pool):
+    await _assert_no_seqscan(
+        seeded_pool, "/api/sessions/summary-by-project", start="2025-01-03", end="2025-01-05"
+    )
@@ -0,0 +1,119 @@
+"""
+Summary endpoints served from the daily materialised views must match the live aggregation,
+including days after the last refresh (read live), late rows for days already in the view,
+and ranges straddling the refresh day.
+"""
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from pg_helpers import api_get
+
+
+@pytest.fixture
+async def seeded_pool(db_pool):
+    async with db_pool.acquire() as conn:
+        await conn.execute("TRUNCATE agent_sessions, ai_code_commits RESTART IDENTITY")
+        await conn.execute("TRUNCATE summary_view_refreshes")
+        # 2025-01-01 .. ~2025-01-15 (+08), spread over users/workspaces; some without workspace
+        await conn.execute(
+            """
+            INSERT INTO agent_sessions (conversation_id, user_email, workspace_roots, ended_at, duration_seconds)
+            SELECT 'c' || g, 'user' || (g % 7) || '@example.com',
+                   CASE WHEN g % 11 = 0 THEN NULL ELSE ARRAY['/repos/p' || (g % 3)] END,
+                   TIMESTAMPTZ '2025-01-01 00:00+08' + (g * 37 || ' minutes')::interval,
+                   CASE WHEN g % 13 = 0 THEN NULL ELSE g % 900 END
+            FROM generate_series(1, 600) AS g
+            """
+        )
+        await conn.execute(
+            """
+            INSERT INTO ai_code_commits (commit_hash, user_email, repo_name, tab_lines_added,
+                                         composer_lines_added, total_lines_added, commit_ts)
+            SELECT 'h' || g, 'user' || (g % 5) || '@example.com', 'repo', g % 10, g % 7, 20 + g % 30,
+                   TIMESTAMPTZ '2025-01-01 00:00+08' + (g * 41 || ' minutes')::interval
+            FROM generate_series(1, 500) AS g
+            """
+        )
+    with patch("summaries.get_pool", AsyncMock(return_value=db_pool)), patch("main.get_read_pool", AsyncMock(return_value=db_pool)):
+        yield db_pool
+
+
+async def _refresh_as_of(pool, refreshed_at: str):
+    """Refresh both views, then pretend the refresh started at refreshed_at."""
+    from summaries import AI_COMMIT_VIEW, SESSION_VIEW, refresh_views
+
+    await refresh_views(SESSION_VIEW, AI_COMMIT_VIEW)
+    async with pool.acquire() as conn:
+        assert await conn.fetchval("SELECT COUNT(*) FROM summary_view_refreshes") == 2
+        await conn.execute("UPDATE summary_view_refreshes SET refreshed_at = $1::text::timestamptz", refreshed_at)
+
+
+async def _live(path: str, **params):
+    import cache
+
+    cache.response_cache.clear()
+    with patch("summaries.settings") as s:
+        s.summary_views_enabled = False
+        return await api_get(path, **params)
+
+
+async def _served(path: str, **params):
+    import cache
+
+    cache.response_cache.clear()
+    return await api_get(path, **params)
+
+
+@pytest.mark.parametrize("start,end", [("2025-01-02", "2025-01-06"), ("2025-01-03", "2025-01-12"), ("2025-01-09", "2025-01-14")])
+async def test_session_summaries_from_views_match_live(seeded_pool, start, end):
+    await _refresh_as_of(seeded_pool, "2025-01-08 10:00+08")
+    for path in ("/api/sessions/summary", "/api/sessions/summary-by-project"):
+        assert await _served(path, start=start, end=end) == await _live(path, start=start, end=end)
+
+
+async def test_session_summary_includes_rows_written_after_refresh(seeded_pool):
+    await _refresh_as_of(seeded_pool, "2025-01-08 10:00+08")
+    async with seeded_pool.acquire() as conn:
+        await conn.execute(
+            """
+            INSERT INTO agent_sessions (conversation_id, user_email, workspace_roots, ended_at, duration_seconds)
+            VALUES ('late', 'late@example.com', ARRAY['/repos/late'], '2025-01-08 23:59+08', 5)
+            """
+        )
+    rows = await _served("/api/sessions/summary", start="2025-01-01", end="2025-01-08")
+    assert {"user_email": "late@example.com", "primary_workspace": "/repos/late"}.items() <= next(
+        r for r in rows if r["user_email"] == "late@example.com"
+    ).items()
+    assert rows == await _live("/api/sessions/summary", start="2025-01-01", end="2025-01-08")
+
+
+async def test_late_rows_for_viewed_days_are_read_live_until_the_next_refresh(seeded_pool):
+    from session_buffer import write_rows
+    from summaries import SESSION_VIEW, refresh_views
+
+    await _refresh_as_of(seeded_pool, "2025-01-08 10:00+08")
+    replayed = ("spooled", "late@example.com", None, ["/repos/late"], None, datetime(2025, 1, 3, tzinfo=timezone.utc), 5, None)
+    async with seeded_pool.acquire() as conn:
+        assert await write_rows(conn, [replayed]) == 1
+        assert await conn.fetchval("SELECT stale_from::text FROM summary_view_refreshes WHERE view_name = $1", SESSION_VIEW) == "2025-01-03"
+    served = await _served("/api/sessions/summary", start="2025-01-01", end="2025-01-07")
+    assert any(r["user_email"] == "late@example.com" for r in served)
+    assert served == await _live("/api/sessions/summary", start="2025-01-01", end="2025-01-07")
+
+    await refresh_views(SESSION_VIEW)  # started after the mark: the row is in the view now
+    async with seeded_pool.acquire() as conn:
+        assert await conn.fetchval("SELECT stale_from FROM summary_view_refreshes WHERE view_name = $1", SESSION_VIEW) is None
+    assert await _served("/api/sessions/summary", start="2025-01-01", end="2025-01-07") == served
+
+
+@pytest.mark.parametrize(
+    "params",
+    [{}, {"start": "2025-01-03"}, {"end": "2025-01-06"}, {"start": "2025-01-02", "end": "2025-01-13"}],
+)
+async def test_ai_commit_summary_from_view_matches_live(seeded_pool, params):
+    await _refresh_as_of(seeded_pool, "2025-01-07 18:00+08")
+    assert await _served("/api/ai-commits/summary", **params) == await _live("/api/ai-commits/summary", **params)
+    served = await _served("/api/ai-commits/summary", **params)
+    if not params:
+        assert served["projects"][0]["totals"]["commit_count"] == 500
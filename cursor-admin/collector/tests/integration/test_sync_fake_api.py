@@ -0,0 +1,54 @@
+"""The sync path against fake_cursor_api writes every row the fake API serves, with throttling injected."""
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import AsyncMock, patch
+
+import httpx
+
+import ai_code_sync
+import sync
+from config import settings
+from fake_cursor_api import FakeApiConfig, create_app
+
+
+async def test_full_sync_against_fake_api(db_pool):
+    app = create_app(
+        FakeApiConfig(seed=5, members=40, projects=6, sessions=0, commits=1500, days=20, rate_limit_every=4, retry_after=0)
+    )
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+    async with db_pool.acquire() as conn:
+        await conn.execute("TRUNCATE members, daily_usage, spend_snapshots, ai_code_commits, projects RESTART IDENTITY CASCADE")
+        await conn.execute(
+            "INSERT INTO projects (id, name, workspace_rules, git_repos, created_by) VALUES ($1, 'p', '{/w}', $2, 'a@x.com')",
+            1,
+            [f"git@git.example.com:{app.state.fake_data.commits[0][3]}.git"],
+        )
+    try:
+        with (
+            patch.object(settings, "cursor_api_url", "http://fake"),
+            patch.object(settings, "cursor_api_token", "key"),
+            patch("cursor_api.get_client", return_value=client),
+            patch("sync.get_pool", AsyncMock(return_value=db_pool)),
+            patch("ai_code_sync.get_pool", AsyncMock(return_value=db_pool)),
+        ):
+            await sync.sync_members()
+            await sync.sync_daily_usage(days_back=4)
+            await sync.sync_spend()
+            await ai_code_sync.sync_ai_code_commits()
+
+        now = datetime.now(timezone.utc)
+        expected_commits = app.state.fake_data.commits_between(
+            (now - timedelta(days=30)).date(), now.date(), None
+        )
+        async with db_pool.acquire() as conn:
+            assert await conn.fetchval("SELECT COUNT(*) FROM members") == 40
+            assert await conn.fetchval("SELECT COUNT(*) FROM daily_usage") == 40 * 5
+            assert await conn.fetchval("SELECT COUNT(*) FROM spend_snapshots") == 40
+            assert await conn.fetchval("SELECT COUNT(*) FROM ai_code_commits") == len(expected_commits) > 0
+            matched = await conn.fetchval("SELECT COUNT(*) FROM ai_code_commits WHERE project_id = 1")
+            assert matched == sum(r[3] == app.state.fake_data.commits[0][3] for r in expected_commits)
+            assert await conn.fetchval("SELECT MAX(day) FROM daily_usage") == date.today()
+        assert app.state.fake_stats["rate_limited"] > 0
+    finally:
+        await client.aclose()
+        async with db_pool.acquire() as conn:
+            await conn.execute("TRUNCATE members, daily_usage, spend_snapshots, ai_code_commits, projects RESTART IDENTITY CASCADE")
@@ -0,0 +1,54 @@
+"""Server-side aggregation of /api/usage/daily (group_by / top_n)."""
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from pg_helpers import api_get
+
+
+@pytest.fixture
+async def seeded_pool(db_pool):
+    async with db_pool.acquire() as conn:
+        await conn.execute("TRUNCATE daily_usage RESTART IDENTITY")
+        # 2026-03-02 is a Monday; three members over 14 days, member i makes (i + 1) agent requests a day
+        await conn.execute(
+            """
+            INSERT INTO daily_usage (email, day, agent_requests, chat_requests, is_active)
+            SELECT 'u' || i || '@x.com', DATE '2026-03-02' + d, i + 1, 1, d % 2 = 0
+            FROM generate_series(0, 2) AS i, generate_series(0, 13) AS d
+            """
+        )
+    return db_pool
+
+
+async def _get(pool, **params):
+    with patch("main.get_read_pool", AsyncMock(return_value=pool)):
+        return await api_get("/api/usage/daily", start="2026-03-02", end="2026-03-15", **params)
+
+
+async def test_day_team_series_has_one_point_per_day(seeded_pool):
+    data = await _get(seeded_pool, group_by="day,team")
+    assert len(data) == 14
+    assert data[0]["bucket"] == "2026-03-02"
+    assert "email" not in data[0]
+    assert data[0]["agent_requests"] == 1 + 2 + 3
+    assert data[0]["chat_requests"] == 3
+    assert data[0]["active_days"] == 3
+
+
+async def test_week_member_series_with_top_n(seeded_pool):
+    data = await _get(seeded_pool, group_by="week,member", top_n=2)
+    assert [(r["bucket"], r["email"], r["agent_requests"]) for r in data] == [
+        ("2026-03-02", "u2@x.com", 21),
+        ("2026-03-02", "u1@x.com", 14),
+        ("2026-03-09", "u2@x.com", 21),
+        ("2026-03-09", "u1@x.com", 14),
+    ]
+
+
+async def test_member_totals_and_team_total(seeded_pool):
+    members = await _get(seeded_pool, group_by="member", rank_by="agent_requests")
+    assert [(r["email"], r["agent_requests"]) for r in members] == [
+        ("u2@x.com", 42), ("u1@x.com", 28), ("u0@x.com", 14),
+    ]
+    (team,) = await _get(seeded_pool, group_by="team", email="u1@x.com")
+    assert team["agent_requests"] == 28 and team["active_days"] == 7
@@ -2,6 +2,7 @@
 API tests for main module: health, /api/sessions, and protected GET /api/* routes.
 Uses mocked get_pool and skipped init_db/run_full_sync in lifespan.
 """
+import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -108,6 +109,22 @@ def test_api_projects_whitelist_no_auth(app_with_mocked_db):
     assert isinstance(data["rules"], list)
 
 
+def test_api_projects_whitelist_etag_304(app_with_mocked_db, mock_pool):
+    _, conn = mock_pool
+    conn.fetch = AsyncMock(
+        return_value=[{"id": 3, "workspace_rules": [r"D:\Work\Repo"], "member_emails": ["A@x.com"]}]
+    )
+    c = TestClient(app_with_mocked_db)
+    r = c.get("/api/projects/whitelist")
+    assert r.json()["rules"] == [{"project_id": 3, "workspace_rules": ["d:/work/repo"], "member_emails": ["a@x.com"]}]
+    etag = r.headers["etag"]
+    assert etag == f'"{r.json()["version"]}"'
+    r2 = c.get("/api/projects/whitelist", headers={"If-None-Match": etag})
+    assert r2.status_code == 304
+    assert r2.content == b""
+    assert conn.fetch.await_count == 1  # served from the in-process snapshot
+
+
 def test_api_projects_reinject_hook_404_when_project_missing(client):
     """POST /api/projects/{id}/reinject-hook returns 404 when project not found."""
     r = client.post("/api/projects/999/reinject-hook")
@@ -131,3 +148,179 @@ def test_api_contributions_my_returns_list(client):
     r = client.get("/api/contributions/my?email=user%40company.com")
     assert r.status_code == 200
     assert isinstance(r.json(), list)
+
+
+def test_api_trigger_git_collect_returns_job_id(client):
+    """POST /api/admin/trigger-git-collect queues a job and returns immediately."""
+    r = client.post("/api/admin/trigger-git-collect")
+    assert r.status_code == 202
+    data = r.json()
+    assert data["ok"] is True
+    assert "job_id" in data
+
+
+def test_api_jobs_get_404_when_missing(client):
+    """GET /api/jobs/{id} returns 404 for unknown job."""
+    r = client.get("/api/jobs/999")
+    assert r.status_code == 404
+
+
+def test_api_sessions_list_cursor_page(client):
+    """GET /api/sessions with a cursor and count=none returns keyset page shape."""
+    from pagination import encode_cursor
+    from datetime import datetime, timezone
+
+    token = encode_cursor(datetime(2026, 3, 1, tzinfo=timezone.utc), 10)
+    r = client.get(f"/api/sessions?cursor={token}&count=none")
+    assert r.status_code == 200
+    data = r.json()
+    assert data["total"] is None
+    assert data["next_cursor"] is None
+    assert data["data"] == []
+
+
+def test_api_sessions_list_rejects_bad_cursor(client):
+    r = client.get("/api/sessions?cursor=garbage&count=none")
+    assert r.status_code == 400
+
+
+def test_api_sessions_workspace_filter_is_literal_substring(client, mock_pool):
+    """workspace= is matched as a literal substring: LIKE wildcards and backslashes are escaped."""
+    _, conn = mock_pool
+    r = client.get("/api/sessions", params={"workspace": "D:\\AI\\my_repo%", "count": "none"})
+    assert r.status_code == 200
+    sql, *args = conn.fetch.call_args.args
+    assert "primary_workspace ILIKE $3" in sql
+    assert args[2] == "%D:\\\\AI\\\\my\\_repo\\%%"
+
+
+def test_api_ai_commits_q_uses_fulltext_predicate(client, mock_pool):
+    """q= adds the indexed to_tsvector(...) @@ websearch_to_tsquery(...) predicate."""
+    _, conn = mock_pool
+    r = client.get("/api/ai-commits", params={"q": " fix login ", "count": "none"})
+    assert r.status_code == 200
+    sql, *args = conn.fetch.call_args.args
+    assert "to_tsvector('simple', COALESCE(c.commit_message, '')) @@ websearch_to_tsquery('simple', $1)" in sql
+    assert args[0] == "fix login"
+
+
+def test_api_project_summaries_rejects_bad_ids(client):
+    assert client.get("/api/projects/summaries?ids=1,x").status_code == 400
+    assert client.get("/api/projects/summaries?ids=").status_code == 400
+
+
+def test_api_project_summaries_reports_missing(client, mock_pool):
+    """Batch summary issues one query and lists ids it did not find."""
+    _, conn = mock_pool
+    r = client.get("/api/projects/summaries?ids=3,1,3")
+    assert r.status_code == 200
+    assert r.json() == {"items": [], "missing": [1, 3]}
+    assert conn.fetch.await_count == 1
+    assert conn.fetch.call_args.args[1] == [1, 3]
+
+
+def test_api_export_validates_table_format_and_dates(client):
+    assert client.get("/api/export/projects").status_code == 404
+    assert client.get("/api/export/agent_sessions?format=xml").status_code == 400
+    assert client.get("/api/export/agent_sessions?start=2026-13-01").status_code == 400
+    assert client.get("/api/export/agent_sessions?start=2026-02-01&end=2026-01-01").status_code == 400
+
+
+def test_api_export_returns_429_when_slots_taken(client):
+    with patch("exports.slots") as slots:
+        slots.return_value.locked.return_value = True
+        r = client.get("/api/export/daily_usage")
+    assert r.status_code == 429
+    assert r.headers["retry-after"] == "30"
+
+
+@pytest.mark.asyncio
+async def test_export_slot_is_taken_without_waiting():
+    import exports
+
+    with patch.object(exports, "_slots", asyncio.Semaphore(1)):
+        assert await asyncio.gather(exports.try_acquire_slot(), exports.try_acquire_slot()) == [True, False]
+
+
+def test_api_export_holds_slot_while_streaming_and_releases_it(client):
+    import exports
+
+    seen = []
+
+    async def fake_stream(*args):
+        seen.append(exports.slots().locked())
+        yield b"{}\n"
+
+    with patch.object(exports, "_slots", asyncio.Semaphore(1)), patch("exports.stream", fake_stream):
+        assert client.get("/api/export/daily_usage").status_code == 200
+        assert not exports.slots().locked()
+        assert client.get("/api/export/daily_usage").status_code == 200
+    assert seen == [True, True]
+
+
+def test_api_usage_daily_rejects_bad_grouping(client):
+    assert client.get("/api/usage/daily?group_by=hour").status_code == 400
+    assert client.get("/api/usage/daily?group_by=day,week").status_code == 400
+    assert client.get("/api/usage/daily?group_by=day,team&top_n=5").status_code == 400
+    assert client.get("/api/usage/daily?group_by=member&rank_by=email").status_code == 400
+
+
+def _session_body(i: int) -> dict:
+    return {
+        "event": "session_end",
+        "conversation_id": f"conv-{i}",
+        "user_email": "u@x.com",
+        "workspace_roots": ["/path/to/proj"],
+        "ended_at": 1709308800 + i,
+        "duration_seconds": 60,
+    }
+
+
+def test_api_sessions_batch_writes_directly_without_buffer(app_with_mocked_db):
+    with patch("main.write_session_rows", AsyncMock(return_value=2)) as write:
+        r = TestClient(app_with_mocked_db).post("/api/sessions/batch", json=[_session_body(1), _session_body(2)])
+    assert r.status_code == 202
+    assert r.json() == {"accepted": 2}
+    rows = write.await_args.args[1]
+    assert [row[0] for row in rows] == ["conv-1", "conv-2"]
+
+
+def test_api_sessions_batch_rejects_oversized_batch(app_with_mocked_db):
+    with patch("main.settings.session_batch_max_items", 1):
+        r = TestClient(app_with_mocked_db).post("/api/sessions/batch", json=[_session_body(1), _session_body(2)])
+    assert r.status_code == 413
+
+
+def test_api_sessions_returns_429_when_buffer_full(app_with_mocked_db):
+    from session_buffer import SessionBuffer
+
+    buf = SessionBuffer()
+    buf._task = MagicMock()  # treat as started without a flush loop
+    with patch("main.session_buffer", buf), patch("main.settings.session_buffer_max_rows", 1):
+        client = TestClient(app_with_mocked_db)
+        assert client.post("/api/sessions", json=_session_body(1)).status_code == 204
+        r = client.post("/api/sessions", json=_session_body(2))
+        assert r.status_code == 429
+        assert "Retry-After" in r.headers
+        assert client.post("/api/sessions/batch", json=[_session_body(3)]).status_code == 429
+    assert len(buf) == 1
+
+
+def test_ready_is_503_until_startup_finished(app_with_mocked_db):
+    r = TestClient(app_with_mocked_db).get("/ready")
+    assert r.status_code == 503
+    assert r.json()["checks"] == {"startup": False, "database": "ok"}
+
+
+def test_ready_checks_database(app_with_mocked_db, mock_pool):
+    c = TestClient(app_with_mocked_db)
+    with patch.dict("main._startup", {"ready": True, "migrations": ["015_x.sql"]}):
+        r = c.get("/ready")
+        assert r.status_code == 200
+        assert r.json()["status"] == "ready"
+        assert r.json()["migrations_applied"] == ["015_x.sql"]
+        _, conn = mock_pool
+        conn.fetchval = AsyncMock(side_effect=TimeoutError())
+        r = c.get("/ready")
+    assert r.status_code == 503
+    assert r.json()["checks"]["database"] == "error: TimeoutError"
@@ -0,0 +1,96 @@
+"""Unit tests for cache (response cache, generation invalidation, ETag revalidation)."""
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+import cache
+from cache import ResponseCache
+
+
+def _request(if_none_match: str | None = None):
+    req = MagicMock()
+    req.headers = {"if-none-match": if_none_match} if if_none_match else {}
+    return req
+
+
+def test_response_cache_evicts_least_recently_used():
+    c = ResponseCache(max_entries=2, ttl_seconds=60)
+    c.set(("a",), '"1"', b"a")
+    c.set(("b",), '"2"', b"b")
+    assert c.get(("a",)) == ('"1"', b"a")  # a is now most recent
+    c.set(("c",), '"3"', b"c")
+    assert c.get(("b",)) is None
+    assert c.get(("a",)) is not None
+    assert c.stats()["evictions"] == 1
+
+
+def test_response_cache_expires_after_ttl():
+    c = ResponseCache(max_entries=10, ttl_seconds=5)
+    with patch("cache.time.monotonic", return_value=100.0):
+        c.set(("k",), '"e"', b"x")
+    with patch("cache.time.monotonic", return_value=104.0):
+        assert c.get(("k",)) is not None
+    with patch("cache.time.monotonic", return_value=105.0):
+        assert c.get(("k",)) is None
+    assert c.stats()["entries"] == 0
+
+
+async def test_respond_serves_from_cache_until_domain_bumped():
+    cache.response_cache.clear()
+    producer = AsyncMock(side_effect=[{"n": 1}, {"n": 2}])
+    r1 = await cache.respond(_request(), "ep", {"x": 1}, (cache.SESSIONS,), producer)
+    r2 = await cache.respond(_request(), "ep", {"x": 1}, (cache.SESSIONS,), producer)
+    assert r1.body == r2.body == b'{"n":1}'
+    assert producer.await_count == 1
+
+    cache.bump(cache.PROJECTS)  # unrelated domain
+    await cache.respond(_request(), "ep", {"x": 1}, (cache.SESSIONS,), producer)
+    assert producer.await_count == 1
+
+    cache.bump(cache.SESSIONS)
+    r3 = await cache.respond(_request(), "ep", {"x": 1}, (cache.SESSIONS,), producer)
+    assert r3.body == b'{"n":2}'
+    assert r3.headers["etag"] != r1.headers["etag"]
+
+
+async def test_respond_returns_304_for_matching_etag_even_when_disabled():
+    producer = AsyncMock(return_value=[1, 2])
+    with patch("cache.settings") as s:
+        s.response_cache_enabled = False
+        first = await cache.respond(_request(), "ep", {}, (), producer)
+        etag = first.headers["etag"]
+        again = await cache.respond(_request(f'W/{etag}, "other"'), "ep", {}, (), producer)
+    assert again.status_code == 304
+    assert again.body == b""
+    assert producer.await_count == 2
+
+
+async def test_respond_does_not_cache_errors():
+    from fastapi import HTTPException
+
+    cache.response_cache.clear()
+    producer = AsyncMock(side_effect=[HTTPException(status_code=404), {"ok": True}])
+    with pytest.raises(HTTPException):
+        await cache.respond(_request(), "ep", {}, (), producer)
+    r = await cache.respond(_request(), "ep", {}, (), producer)
+    assert r.status_code == 200
+
+
+def test_api_leaderboard_revalidates_with_etag(app_with_mocked_db, api_key, mock_pool):
+    _, conn = mock_pool
+    client = TestClient(app_with_mocked_db, headers={"x-api-key": api_key})
+    url = "/api/contributions/leaderboard?period_type=weekly&period_key=2026-W08"
+    r = client.get(url)
+    assert r.status_code == 200
+    etag = r.headers["etag"]
+    calls = conn.fetch.await_count
+
+    r2 = client.get(url, headers={"If-None-Match": etag})
+    assert r2.status_code == 304
+    assert conn.fetch.await_count == calls  # served from cache
+
+    cache.bump(cache.CONTRIBUTIONS)
+    r3 = client.get(url, headers={"If-None-Match": etag})
+    assert r3.status_code == 304  # recomputed, same content
+    assert conn.fetch.await_count == calls + 1
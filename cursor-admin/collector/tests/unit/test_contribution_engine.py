@@ -129,3 +129,56 @@ async def test_calculate_period_with_git_only():
 
     # Per-project upsert + aggregate upsert + rank updates + snapshot
     assert mock_conn.execute.await_count >= 2
+
+
+def test_enumerate_period_keys_covers_partial_periods():
+    from contribution_engine import enumerate_period_keys
+
+    assert enumerate_period_keys("monthly", date(2025, 11, 15), date(2026, 2, 3)) == [
+        "2025-11", "2025-12", "2026-01", "2026-02",
+    ]
+    # 2026-02-18 is Wednesday of W08; range ends inside W09
+    assert enumerate_period_keys("weekly", date(2026, 2, 18), date(2026, 2, 24)) == ["2026-W08", "2026-W09"]
+    assert len(enumerate_period_keys("weekly", date(2025, 1, 1), date(2025, 12, 31))) == 53
+    assert enumerate_period_keys("daily", date(2026, 2, 27), date(2026, 3, 1)) == [
+        "2026-02-27", "2026-02-28", "2026-03-01",
+    ]
+    assert enumerate_period_keys("yearly", date(2026, 1, 1), date(2026, 2, 1)) == []
+
+
+@pytest.mark.asyncio
+async def test_run_recalculate_range_scans_commits_once_and_reports_timings():
+    """Range rebuild: one daily-rollup query, then every period computed from it."""
+    from contribution_engine import run_recalculate_range
+
+    mock_pool = MagicMock()
+    mock_conn = AsyncMock()
+    mock_conn.fetch = AsyncMock(
+        return_value=[
+            {"day": date(2026, 2, 2), "user_email": "a@x.com", "project_id": 1,
+             "ai_lines_added": 10, "total_lines_added": 20, "commit_count": 1},
+            {"day": date(2026, 2, 10), "user_email": "a@x.com", "project_id": 1,
+             "ai_lines_added": 5, "total_lines_added": 5, "commit_count": 2},
+        ]
+    )
+    mock_ctx = MagicMock()
+    mock_ctx.__aenter__ = AsyncMock(return_value=mock_conn)
+    mock_ctx.__aexit__ = AsyncMock(return_value=None)
+    mock_pool.acquire = MagicMock(return_value=mock_ctx)
+    calc = AsyncMock(return_value=1)
+
+    with (
+        patch("contribution_engine.get_pool", AsyncMock(return_value=mock_pool)),
+        patch("contribution_engine.calculate_period", calc),
+    ):
+        result = await run_recalculate_range(date(2026, 2, 1), date(2026, 2, 28), ["weekly", "monthly"])
+
+    assert mock_conn.fetch.await_count == 1
+    keys = [(p["period_type"], p["period_key"]) for p in result["periods"]]
+    assert ("monthly", "2026-02") in keys
+    assert ("weekly", "2026-W05") in keys and ("weekly", "2026-W09") in keys
+    assert all("seconds" in p for p in result["periods"])
+    monthly_call = next(c for c in calc.await_args_list if c.args[0] == "monthly")
+    assert monthly_call.kwargs["data"] == {
+        ("a@x.com", 1): {"ai_lines_added": 15, "total_lines_added": 25, "commit_count": 3}
+    }
@@ -0,0 +1,120 @@
+"""
+Unit tests for database read routing: replica selection by lag, fallback to the primary,
+round-robin, per-pool settings, primary reads for cached responses. Mocks asyncpg.create_pool; no PostgreSQL needed.
+"""
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+import database
+from config import settings
+from request_timing import TimedConnection
+
+
+def _pool(lag=0.0):
+    conn = MagicMock()
+    conn.fetchval = AsyncMock(return_value=lag)
+
+    class AsyncCtx:
+        async def __aenter__(self):
+            return conn
+
+        async def __aexit__(self, *args):
+            pass
+
+    pool = MagicMock()
+    pool.acquire = MagicMock(return_value=AsyncCtx())
+    pool.close = AsyncMock()
+    pool.conn = conn
+    return pool
+
+
+@pytest.fixture
+def primary():
+    pool = _pool()
+    with patch.object(database, "_pool", pool), patch.object(database, "_replicas", None):
+        database._read_stats["primary_fallbacks"] = 0
+        yield pool
+
+
+def _replica_urls(n):
+    return patch.object(settings, "database_read_urls", ",".join(f"postgresql+asyncpg://r{i}/db" for i in range(n)))
+
+
+@pytest.mark.asyncio
+async def test_no_replicas_reads_use_primary(primary):
+    with patch("database.asyncpg.create_pool", AsyncMock()) as create:
+        assert await database.get_read_pool() is primary
+    create.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_fresh_replica_is_used_with_read_pool_settings(primary):
+    replica = _pool(lag=0.5)
+    with (
+        _replica_urls(1),
+        patch.object(settings, "read_statement_timeout_ms", 1500),
+        patch.object(settings, "read_statement_cache_size", 0),
+        patch("database.asyncpg.create_pool", AsyncMock(return_value=replica)) as create,
+    ):
+        assert (await database.get_read_pool())._pool is replica
+        assert (await database.get_read_pool())._pool is replica  # probed once per replica_check_seconds
+    assert create.await_args.args == ("postgresql://r0/db",)
+    assert create.await_args.kwargs["statement_cache_size"] == 0
+    assert create.await_args.kwargs["server_settings"] == {"statement_timeout": "1500"}
+    assert replica.conn.fetchval.await_count == 1
+    assert database.read_pool_stats()["replicas"][0]["routed"] == 2
+
+
+@pytest.mark.asyncio
+async def test_replica_lag_is_measured_against_the_primary_wal_position(primary):
+    primary.conn.fetchval = AsyncMock(return_value="0/3000148")
+    replica = _pool(lag=0.0)
+    with _replica_urls(1), patch("database.asyncpg.create_pool", AsyncMock(return_value=replica)):
+        await database.get_read_pool()
+    assert primary.conn.fetchval.await_args.args == (database._PRIMARY_LSN_SQL,)
+    assert replica.conn.fetchval.await_args.args == (database._REPLICA_LAG_SQL, "0/3000148")
+    assert "pg_last_wal_receive_lsn" not in database._REPLICA_LAG_SQL
+
+
+@pytest.mark.asyncio
+async def test_primary_reads_bypass_fresh_replicas(primary):
+    replica = _pool()
+    with _replica_urls(1), patch("database.asyncpg.create_pool", AsyncMock(return_value=replica)):
+        with database.primary_reads():
+            assert await database.get_read_pool() is primary
+        assert (await database.get_read_pool())._pool is replica
+    assert database.read_pool_stats()["primary_fallbacks"] == 0
+
+
+@pytest.mark.asyncio
+async def test_lagging_or_unreachable_replica_falls_back_to_primary(primary):
+    lagging = _pool(lag=settings.replica_max_lag_seconds + 1)
+    with _replica_urls(2), patch("database.asyncpg.create_pool", AsyncMock(side_effect=[lagging, OSError("refused")])):
+        assert await database.get_read_pool() is primary
+    stats = database.read_pool_stats()
+    assert stats["primary_fallbacks"] == 1
+    assert [r["usable"] for r in stats["replicas"]] == [False, False]
+    assert stats["replicas"][1]["error"] == "OSError: refused"
+
+
+@pytest.mark.asyncio
+async def test_replicas_round_robin(primary):
+    a, b = _pool(), _pool()
+    with _replica_urls(2), patch("database.asyncpg.create_pool", AsyncMock(side_effect=[a, b])):
+        picked = [(await database.get_read_pool())._pool for _ in range(4)]
+    assert picked == [a, b, a, b]
+
+
+@pytest.mark.asyncio
+async def test_primary_pool_settings():
+    with (
+        patch.object(database, "_pool", None),
+        patch.object(settings, "db_pool_max_size", 25),
+        patch.object(settings, "db_statement_timeout_ms", 0),
+        patch("database.asyncpg.create_pool", AsyncMock(return_value=_pool())) as create,
+    ):
+        await database.get_pool()
+    assert create.await_args.kwargs["max_size"] == 25
+    assert create.await_args.kwargs["connection_class"] is TimedConnection
+    assert "server_settings" not in create.await_args.kwargs  # 0 = no statement_timeout
@@ -0,0 +1,155 @@
+"""
+Unit tests for fake_cursor_api and the cursor_api client against it: deterministic data,
+pagination, ETag / 304, injected 429s retried with asyncio.sleep, Basic auth. The fake app is
+mounted in-process with httpx.ASGITransport; the database is mocked.
+"""
+from dataclasses import replace
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import cursor_api
+from config import settings
+from fake_cursor_api import FakeApiConfig, create_app
+from sync import sync_spend
+
+_CFG = FakeApiConfig(seed=1, members=30, projects=5, sessions=600, commits=900, days=10, end=date(2026, 3, 31))
+
+
+def _client(app) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://fake")
+
+
+@pytest.fixture
+def fake_api():
+    """Point cursor_api at a fake app; yields a factory taking config overrides."""
+    current = {}
+
+    def mount(**overrides):
+        app = create_app(replace(_CFG, **overrides))
+        current["client"] = _client(app)
+        return app
+
+    with (
+        patch.object(settings, "cursor_api_url", "http://fake"),
+        patch.object(settings, "cursor_api_token", "key"),
+        patch("cursor_api.get_client", side_effect=lambda: current["client"]),
+    ):
+        yield mount
+
+
+async def test_members_are_deterministic(fake_api):
+    fake_api()
+    first = await cursor_api.get_members()
+    fake_api()
+    assert await cursor_api.get_members() == first
+    assert len(first) == 30
+    assert {"id", "email", "name", "role", "isRemoved"} <= first[0].keys()
+
+
+async def test_daily_usage_pages_cover_the_range_once(fake_api):
+    fake_api()
+    seen, page = [], 1
+    while True:
+        data = await cursor_api.get_daily_usage(date(2026, 3, 29), date(2026, 3, 31), page=page, page_size=7)
+        seen += [(r["email"], r["day"]) for r in data["data"]]
+        if not data["pagination"]["hasNextPage"]:
+            break
+        page += 1
+    assert len(seen) == len(set(seen)) == 30 * 3
+    assert {d for _, d in seen} == {"2026-03-29", "2026-03-30", "2026-03-31"}
+
+
+async def test_commits_filter_by_day_and_answer_etag_with_304(fake_api):
+    app = fake_api()
+    data = await cursor_api.get_ai_code_commits("2026-03-30", "2026-03-31", page_size=5000)
+    assert data["pagination"]["totalCount"] == len(data["commits"]) > 0
+    days = {c["commitTs"][:10] for c in data["commits"]}
+    assert days <= {"2026-03-29", "2026-03-30", "2026-03-31"}  # UTC date of Asia/Shanghai times
+    ts = [c["commitTs"] for c in data["commits"]]
+    assert ts == sorted(ts)
+
+    async with _client(app) as raw:
+        params = {"startDate": "2026-03-30", "endDate": "2026-03-31", "pageSize": 5000}
+        r = await raw.get("/analytics/ai-code/commits", params=params, auth=("key", ""))
+        etag = r.headers["ETag"]
+    cached = await cursor_api.get_ai_code_commits("2026-03-30", "2026-03-31", page_size=5000, etag=etag)
+    assert cached["cached"] is True
+    assert app.state.fake_stats["not_modified"] == 1
+
+
+async def test_injected_429_is_retried_with_asyncio_sleep(fake_api):
+    app = fake_api(rate_limit_every=2, retry_after=0.25)
+    with patch("cursor_api.asyncio.sleep", AsyncMock()) as sleep:
+        await cursor_api.get_members()  # request 1
+        members = await cursor_api.get_members()  # request 2 -> 429, request 3 -> 200
+    assert len(members) == 30
+    sleep.assert_awaited_once_with(0.25)
+    assert app.state.fake_stats == {"requests": 3, "rate_limited": 1, "not_modified": 0}
+
+
+async def test_persistent_429_gives_up_after_max_retries(fake_api):
+    fake_api(rate_limit_every=1)
+    with patch("cursor_api.asyncio.sleep", AsyncMock()) as sleep, pytest.raises(httpx.HTTPStatusError):
+        await cursor_api.get_members()
+    assert sleep.await_count == cursor_api.RATE_LIMIT_MAX_RETRIES
+
+
+def test_retry_delay_backs_off_without_retry_after():
+    r = httpx.Response(429)
+    assert [cursor_api._retry_delay(r, a) for a in (1, 2, 3)] == [1.0, 2.0, 4.0]
+    assert cursor_api._retry_delay(httpx.Response(429, headers={"Retry-After": "9999"}), 1) == 60.0
+
+
+async def test_requests_without_auth_are_rejected():
+    async with _client(create_app(_CFG)) as raw:
+        assert (await raw.get("/teams/members")).status_code == 401
+
+
+async def test_sync_spend_reads_every_page(fake_api):
+    fake_api()
+    conn = MagicMock()
+    conn.execute = AsyncMock()
+
+    class AsyncCtx:
+        async def __aenter__(self):
+            return conn
+
+        async def __aexit__(self, *args):
+            pass
+
+    pool = MagicMock()
+    pool.acquire = MagicMock(return_value=AsyncCtx())
+    with patch("sync.get_pool", AsyncMock(return_value=pool)):
+        await sync_spend(page_size=8)
+    emails = [c.args[1] for c in conn.execute.await_args_list]
+    assert len(emails) == len(set(emails)) == 30
+    assert {c.args[2] for c in conn.execute.await_args_list} == {date(2026, 3, 1)}
+
+
+async def test_shared_client_is_reused_within_a_loop():
+    a = cursor_api.get_client()
+    try:
+        assert cursor_api.get_client() is a
+    finally:
+        await cursor_api.close_client()
+    assert a.is_closed
+
+
+def test_usage_events_filtered_by_email_and_time():
+    app = create_app(_CFG)
+    email = app.state.fake_data.members[0]["email"]
+    start = int(datetime(2026, 3, 25, tzinfo=timezone.utc).timestamp() * 1000)
+    end = int((datetime(2026, 3, 25, tzinfo=timezone.utc) + timedelta(days=7)).timestamp() * 1000)
+    events = [ts for ts, _ in app.state.fake_data.events[email] if start <= ts <= end]
+    r = TestClient(app).post(
+        "/teams/filtered-usage-events",
+        json={"email": email, "startDate": start, "endDate": end, "page": 1, "pageSize": 1000},
+        auth=("key", ""),
+    )
+    body = r.json()
+    assert body["totalUsageEventsCount"] == len(events) > 0
+    assert [int(e["timestamp"]) for e in body["usageEvents"]] == events
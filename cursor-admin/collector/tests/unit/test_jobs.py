@@ -0,0 +1,118 @@
+"""
+Unit tests for jobs module: submit coalescing, runner execution and failure recording.
+Mocks database.get_pool; handlers are replaced with in-test coroutines.
+"""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+import jobs
+from jobs import JobRunner, JobType, submit
+
+
+def _pool_with(conn):
+    class AsyncCtx:
+        async def __aenter__(self):
+            return conn
+
+        async def __aexit__(self, *args):
+            pass
+
+    pool = MagicMock()
+    pool.acquire = MagicMock(side_effect=lambda: AsyncCtx())
+    return pool
+
+
+@pytest.mark.asyncio
+async def test_submit_new_job_returns_id_not_coalesced():
+    conn = MagicMock()
+    conn.fetchval = AsyncMock(return_value=42)
+    conn.execute = AsyncMock()
+    with patch("jobs.get_pool", AsyncMock(return_value=_pool_with(conn))):
+        job_id, coalesced = await submit("git_collect")
+    assert job_id == 42
+    assert coalesced is False
+    sql = conn.fetchval.await_args_list[0][0][0]
+    assert "ON CONFLICT (dedupe_key)" in sql
+    assert conn.execute.await_args.args[1:] == (jobs.JOBS_CHANNEL, "git_collect")
+
+
+@pytest.mark.asyncio
+async def test_submit_duplicate_returns_active_job_coalesced():
+    conn = MagicMock()
+    # INSERT hits the partial unique index (no row), SELECT finds the active job
+    conn.fetchval = AsyncMock(side_effect=[None, 7])
+    with patch("jobs.get_pool", AsyncMock(return_value=_pool_with(conn))):
+        job_id, coalesced = await submit("contribution_recalculate", {"period_type": "weekly", "rule_id": 1})
+    assert job_id == 7
+    assert coalesced is True
+
+
+@pytest.mark.asyncio
+async def test_submit_unknown_job_type_raises():
+    with pytest.raises(ValueError):
+        await submit("no_such_job")
+
+
+@pytest.mark.asyncio
+async def test_runner_executes_claimed_job_and_records_success():
+    handler = AsyncMock(return_value={"n": 1})
+    conn = MagicMock()
+    conn.fetchrow = AsyncMock(side_effect=[{"id": 5, "params": '{"x": 1}'}, None])
+    conn.execute = AsyncMock(return_value="UPDATE 0")
+    pool = _pool_with(conn)
+    runner = JobRunner()
+
+    with patch.dict(jobs.JOB_TYPES, {"t": JobType(handler, 1)}, clear=True):
+        await runner._claim_available(pool)
+        await asyncio.gather(*list(runner._tasks))
+
+    handler.assert_awaited_once()
+    assert handler.await_args.kwargs == {"x": 1}
+    final = conn.execute.await_args_list[-1][0]
+    assert "finished_at = NOW()" in final[0]
+    assert final[1:3] == (5, "succeeded")
+
+
+@pytest.mark.asyncio
+async def test_runner_records_failure_with_error_message():
+    handler = AsyncMock(side_effect=RuntimeError("boom"))
+    conn = MagicMock()
+    conn.fetchrow = AsyncMock(side_effect=[{"id": 9, "params": "{}"}, None])
+    conn.execute = AsyncMock(return_value="UPDATE 0")
+    pool = _pool_with(conn)
+    runner = JobRunner()
+
+    with patch.dict(jobs.JOB_TYPES, {"t": JobType(handler, 1)}, clear=True):
+        await runner._claim_available(pool)
+        await asyncio.gather(*list(runner._tasks))
+
+    final = conn.execute.await_args_list[-1][0]
+    assert final[1:3] == (9, "failed")
+    assert "boom" in final[4]
+
+
+@pytest.mark.asyncio
+async def test_runner_respects_per_type_concurrency():
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow(ctx):
+        started.set()
+        await release.wait()
+
+    conn = MagicMock()
+    conn.fetchrow = AsyncMock(side_effect=[{"id": 1, "params": "{}"}, {"id": 2, "params": "{}"}])
+    conn.execute = AsyncMock(return_value="UPDATE 0")
+    pool = _pool_with(conn)
+    runner = JobRunner()
+
+    with patch.dict(jobs.JOB_TYPES, {"t": JobType(slow, 1)}, clear=True):
+        await runner._claim_available(pool)
+        await started.wait()
+        # Limit reached: a second pass must not claim another row
+        await runner._claim_available(pool)
+        assert conn.fetchrow.await_count == 1
+        release.set()
+        await asyncio.gather(*list(runner._tasks))
@@ -0,0 +1,68 @@
+"""
+Unit tests for leader: advisory-lock election rounds, step-down, leader_only job wrapper.
+Mocks database.connect; no PostgreSQL needed.
+"""
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from leader import LeaderElection, leader_only
+
+
+def _conn(lock_result=True):
+    conn = MagicMock()
+    conn.fetchval = AsyncMock(return_value=lock_result)
+    conn.close = AsyncMock()
+    conn.is_closed = MagicMock(return_value=False)
+    return conn
+
+
+@pytest.mark.asyncio
+async def test_follower_closes_connection_when_lock_taken():
+    conn = _conn(lock_result=False)
+    election = LeaderElection()
+    with patch("leader.connect", AsyncMock(return_value=conn)):
+        assert await election.check() is False
+    conn.close.assert_awaited_once()
+    assert "pg_try_advisory_lock" in conn.fetchval.await_args.args[0]
+    assert not election.is_leader
+
+
+@pytest.mark.asyncio
+async def test_leader_keeps_connection_and_steps_down_when_it_breaks():
+    conn = _conn(lock_result=True)
+    election = LeaderElection()
+    with patch("leader.connect", AsyncMock(return_value=conn)) as connect:
+        assert await election.check() is True
+        conn.fetchval.return_value = 1
+        assert await election.check() is True  # ping only, no new connection
+        assert connect.await_count == 1
+        conn.fetchval.side_effect = ConnectionResetError("gone")
+        assert await election.check() is False
+    conn.terminate.assert_called_once()
+    assert election.stats()["elections"] == 1
+
+
+@pytest.mark.asyncio
+async def test_connect_failure_leaves_follower():
+    election = LeaderElection()
+    with patch("leader.connect", AsyncMock(side_effect=OSError("db down"))):
+        assert await election.check() is False
+
+
+@pytest.mark.asyncio
+async def test_leader_only_skips_unless_leader():
+    job = AsyncMock()
+    job.__name__ = "job"
+    wrapped = leader_only(job)
+    election = LeaderElection()
+    with patch("leader.leader", election):
+        await wrapped()
+        job.assert_not_awaited()
+        election._is_leader = True
+        await wrapped()
+        job.assert_awaited_once()
+        election._is_leader = False
+        with patch("leader.settings.leader_election_enabled", False):
+            await wrapped()
+        assert job.await_count == 2
@@ -0,0 +1,45 @@
+"""Unit tests for pagination module: cursor tokens and count modes with a mocked connection."""
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from pagination import count_rows, decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip_preserves_timestamp_and_id():
+    ts = datetime(2026, 3, 1, 8, 30, 15, 123456, tzinfo=timezone.utc)
+    token = encode_cursor(ts, 12345)
+    assert "=" not in token
+    assert decode_cursor(token) == (ts, 12345)
+
+
+@pytest.mark.parametrize("token", ["", "not-base64!!", "WzFd", "eyJhIjoxfQ"])
+def test_decode_cursor_rejects_malformed_token(token):
+    with pytest.raises(ValueError):
+        decode_cursor(token)
+
+
+@pytest.mark.asyncio
+async def test_count_rows_none_skips_queries():
+    conn = MagicMock()
+    conn.fetchval = AsyncMock()
+    assert await count_rows(conn, "FROM t", [], "none") == (None, False)
+    conn.fetchval.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_count_rows_auto_uses_exact_count_when_estimate_small():
+    conn = MagicMock()
+    conn.fetchval = AsyncMock(side_effect=['[{"Plan": {"Plan Rows": 120}}]', 118])
+    assert await count_rows(conn, "FROM t WHERE a = $1", [1], "auto") == (118, False)
+    assert conn.fetchval.await_args_list[0][0][0].startswith("EXPLAIN (FORMAT JSON) SELECT 1 FROM t")
+    assert conn.fetchval.await_args_list[1][0][0] == "SELECT COUNT(*) FROM t WHERE a = $1"
+
+
+@pytest.mark.asyncio
+async def test_count_rows_auto_returns_estimate_when_large():
+    conn = MagicMock()
+    conn.fetchval = AsyncMock(return_value='[{"Plan": {"Plan Rows": 5000000}}]')
+    assert await count_rows(conn, "FROM t", [], "auto") == (5000000, True)
+    assert conn.fetchval.await_count == 1
@@ -0,0 +1,26 @@
+"""Unit tests for parquet_export month planning (which table-months get (re)written)."""
+from datetime import date
+
+from parquet_export import months_between, months_to_write, next_month
+
+
+def test_months_between_spans_year_boundary():
+    assert months_between(date(2025, 11, 17), date(2026, 2, 1)) == [
+        date(2025, 11, 1), date(2025, 12, 1), date(2026, 1, 1), date(2026, 2, 1),
+    ]
+    assert next_month(date(2026, 1, 31)) == date(2026, 2, 1)
+
+
+def test_months_to_write_skips_final_months_with_files(tmp_path):
+    for key in ("2026-01", "2026-02"):
+        (tmp_path / f"month={key}").mkdir()
+        (tmp_path / f"month={key}" / "part-0.parquet").write_bytes(b"x")
+    manifest = {
+        "2026-01": {"rows": 3, "final": True},
+        "2026-02": {"rows": 5, "final": False},  # exported within the grace window
+        "2026-03": {"rows": 1, "final": True},  # file deleted since
+    }
+    months = [date(2026, m, 1) for m in (1, 2, 3, 4, 5)]
+    assert months_to_write(months, manifest, str(tmp_path), current=date(2026, 5, 1)) == [
+        date(2026, 2, 1), date(2026, 3, 1), date(2026, 4, 1), date(2026, 5, 1),
+    ]
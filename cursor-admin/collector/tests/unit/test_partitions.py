@@ -0,0 +1,16 @@
+"""Unit tests for partitions naming and month arithmetic."""
+from datetime import date
+
+from partitions import add_months, partition_month, partition_name
+
+
+def test_add_months_crosses_year_both_ways():
+    assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+
+
+def test_partition_name_round_trip():
+    name = partition_name("ai_code_commits", date(2026, 3, 1))
+    assert name == "ai_code_commits_p202603"
+    assert partition_month(name) == date(2026, 3, 1)
+    assert partition_month("agent_sessions_default") is None
@@ -0,0 +1,85 @@
+"""
+Unit tests for profiler: loop and task stacks in folded format, one profile at a time, and the
+admin endpoint's guards.
+"""
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+import profiler
+from config import settings
+
+
+def _spin(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+async def _busy_handler():
+    for _ in range(20):
+        _spin(0.01)
+        await asyncio.sleep(0)
+
+
+async def _waiting_job(event: asyncio.Event):
+    await event.wait()
+
+
+def _lines(body: str) -> dict[str, int]:
+    return {line.rsplit(" ", 1)[0]: int(line.rsplit(" ", 1)[1]) for line in body.splitlines()}
+
+
+@pytest.mark.asyncio
+async def test_profile_records_loop_cpu_and_task_waits():
+    event = asyncio.Event()
+    busy = asyncio.create_task(_busy_handler(), name="handler")
+    waiting = asyncio.create_task(_waiting_job(event), name="git-collect")
+    body, samples = await profiler.profile(0.3, 2)
+    event.set()
+    await asyncio.gather(busy, waiting)
+
+    stacks = _lines(body)
+    assert samples > 10
+    assert any(s.startswith("loop;") and "_spin (test_profiler.py" in s for s in stacks)
+    assert any(s.startswith("task:git-collect;_waiting_job (test_profiler.py") and "wait (locks.py" in s for s in stacks)
+    assert not any("admin_profile" in s or "profile (profiler.py" in s for s in stacks if s.startswith("task:"))
+
+
+@pytest.mark.asyncio
+async def test_loop_mode_skips_tasks_and_idle_is_folded():
+    body, _ = await profiler.profile(0.1, 5, mode="loop")
+    stacks = _lines(body)
+    assert stacks and all(s.startswith("loop;") for s in stacks)
+    assert "loop;<idle>" in stacks
+
+
+@pytest.mark.asyncio
+async def test_one_profile_at_a_time():
+    first = asyncio.create_task(profiler.profile(0.2, 10))
+    await asyncio.sleep(0.05)
+    with pytest.raises(profiler.ProfilerBusy):
+        await profiler.profile(0.1, 10)
+    await first
+    await profiler.profile(0.01, 5)  # lock released
+
+
+def test_endpoint_is_off_by_default(app_with_mocked_db, api_key):
+    r = TestClient(app_with_mocked_db).post("/api/admin/profile", headers={"x-api-key": api_key})
+    assert r.status_code == 403
+
+
+def test_endpoint_bounds_and_returns_folded_text(app_with_mocked_db, api_key):
+    client = TestClient(app_with_mocked_db)
+    headers = {"x-api-key": api_key}
+    with patch.object(settings, "profiler_enabled", True), patch.object(settings, "profiler_max_seconds", 1):
+        assert client.post("/api/admin/profile?seconds=5", headers=headers).status_code == 400
+        assert client.post("/api/admin/profile?seconds=0.1&mode=heap", headers=headers).status_code == 400
+        r = client.post("/api/admin/profile?seconds=0.1&interval_ms=5", headers=headers)
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    assert int(r.headers["x-profile-samples"]) > 0
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in r.text.splitlines())
@@ -0,0 +1,93 @@
+"""
+Unit tests for request_timing: SQL fingerprints, per-endpoint aggregation through the ASGI
+middleware, slow-request log. No PostgreSQL needed.
+"""
+import logging
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import request_timing
+from config import settings
+from serialization import ORJSONResponse, TimedJSONResponse
+
+
+def test_fingerprint_collapses_whitespace_and_literals():
+    sql = """
+        SELECT * FROM agent_sessions
+        WHERE user_email = 'a@x.com' AND duration_seconds > 30 AND id = $1
+        LIMIT 500
+    """
+    assert request_timing.fingerprint(sql) == (
+        "SELECT * FROM agent_sessions WHERE user_email = ? AND duration_seconds > ? AND id = $1 LIMIT ?"
+    )
+    assert request_timing.fingerprint("SELECT mv_2026 FROM t") == "SELECT mv_2026 FROM t"
+
+
+@pytest.fixture
+def timed_app():
+    app = FastAPI()
+    app.add_middleware(request_timing.RequestTimingMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        timing = request_timing.current()
+        timing.add_query("SELECT a FROM t WHERE id = $1", 0.004)
+        timing.add_query("SELECT a FROM t WHERE id = $1", 0.002)
+        timing.acquire_seconds += 0.001
+        return ORJSONResponse({"id": item_id})
+
+    request_timing.reset()
+    yield app
+    request_timing.reset()
+
+
+def test_requests_aggregate_by_route_template(timed_app):
+    client = TestClient(timed_app)
+    assert client.get("/items/1").status_code == 200
+    assert client.get("/items/2").status_code == 200
+    client.get("/nope")
+    endpoints = request_timing.stats()["endpoints"]
+    agg = endpoints["GET /items/{item_id}"]
+    assert agg["requests"] == 2
+    assert agg["queries"] == 4
+    assert agg["avg_db_ms"] == pytest.approx(6.0)
+    assert agg["avg_acquire_ms"] == pytest.approx(1.0)
+    assert agg["serialise_ms"] > 0
+    assert endpoints["GET <unmatched>"]["requests"] == 1
+    assert request_timing.current() is None
+
+
+def test_plain_dict_responses_count_render_as_serialisation():
+    app = FastAPI(default_response_class=TimedJSONResponse)
+    app.add_middleware(request_timing.RequestTimingMiddleware)
+
+    @app.get("/plain")
+    async def plain():
+        return {"rows": list(range(1000))}
+
+    request_timing.reset()
+    try:
+        assert TestClient(app).get("/plain").json() == {"rows": list(range(1000))}
+        assert request_timing.stats()["endpoints"]["GET /plain"]["serialise_ms"] > 0
+    finally:
+        request_timing.reset()
+
+
+def test_slow_request_logs_top_fingerprints(timed_app, caplog):
+    with patch.object(settings, "slow_request_ms", 0), caplog.at_level(logging.WARNING, logger="request_timing"):
+        TestClient(timed_app).get("/items/1")
+    assert request_timing.stats()["endpoints"]["GET /items/{item_id}"]["slow"] == 1
+    (record,) = caplog.records
+    assert "GET /items/{item_id} -> 200" in record.getMessage()
+    assert "x2    SELECT a FROM t WHERE id = $1" in record.getMessage()
+
+
+def test_disabled_records_nothing(timed_app):
+    with patch.object(settings, "request_timing_enabled", False):
+        client = TestClient(timed_app)
+        with pytest.raises(AttributeError):  # no timing in context
+            client.get("/items/1")
+    assert request_timing.stats()["endpoints"] == {}
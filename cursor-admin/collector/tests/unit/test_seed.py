@@ -0,0 +1,106 @@
+"""
+Unit tests for seed: rows are deterministic per seed, tables use independent random streams,
+project ids agree with workspace / repo matching, and usage is derived from the generated
+activity. Generators only; no PostgreSQL needed.
+"""
+from dataclasses import replace
+from datetime import date
+
+import seed
+from ai_code_sync import match_project
+from workspace_resolver import build_trie, normalise_root
+
+_SMALL = seed.Volumes(seed=7, members=30, projects=8, sessions=2000, commits=3000, days=45, end=date(2026, 3, 31))
+
+
+def _all_rows(v: seed.Volumes) -> dict[str, list]:
+    world = seed.World(v)
+    return {
+        "members": list(world.member_rows()),
+        "projects": list(world.project_rows()),
+        "agent_sessions": list(world.session_rows()),
+        "ai_code_commits": list(world.commit_rows()),
+        "daily_usage": list(world.usage_rows()),
+        "spend_snapshots": list(world.spend_rows()),
+    }
+
+
+def test_same_seed_same_rows():
+    a, b = _all_rows(_SMALL), _all_rows(_SMALL)
+    assert a == b
+    assert {t: len(rows) for t, rows in a.items()} == {
+        "members": 30,
+        "projects": 8,
+        "agent_sessions": 2000,
+        "ai_code_commits": 3000,
+        "daily_usage": 30 * 45,
+        "spend_snapshots": 30 * 2,  # February and March
+    }
+    other = _all_rows(replace(_SMALL, seed=8))
+    assert other["agent_sessions"] != a["agent_sessions"]
+
+
+def test_volume_change_leaves_other_tables_alone():
+    a = _all_rows(_SMALL)
+    b = _all_rows(replace(_SMALL, commits=500))
+    for table in ("members", "projects", "agent_sessions"):
+        assert a[table] == b[table]
+    assert b["ai_code_commits"] == a["ai_code_commits"][:500]
+
+
+def test_rows_fit_the_period_and_keys_are_unique():
+    rows = _all_rows(_SMALL)
+    start, end = date(2026, 2, 15), date(2026, 3, 31)
+    sessions = rows["agent_sessions"]
+    assert len({r[0] for r in sessions}) == len(sessions)
+    assert all(start <= r[5].astimezone(seed.zoneinfo.ZoneInfo(seed.MV_TIMEZONE)).date() <= end for r in sessions)
+    assert all(r[4] is None or r[4] <= r[5] for r in sessions)
+    commits = rows["ai_code_commits"]
+    assert len({r[0] for r in commits}) == len(commits)
+    for r in commits:
+        added, tab, composer, non_ai = r[6], r[8], r[10], r[12]
+        assert tab + composer + non_ai == added
+        assert min(tab, composer, non_ai) >= 0
+    assert len({(r[0], r[1]) for r in rows["daily_usage"]}) == len(rows["daily_usage"])
+
+
+def test_project_ids_match_workspace_rules_and_repos():
+    rows = _all_rows(_SMALL)
+    projects = [
+        {"id": p[0], "workspace_rules": p[4], "git_repos": p[3], "status": p[6]} for p in rows["projects"]
+    ]
+    trie = build_trie([p for p in projects if p["status"] == "active"])
+    sessions = rows["agent_sessions"]
+    for r in sessions:
+        assert trie.longest_prefix(normalise_root(r[3][0])) == r[7]
+    share = sum(r[7] is not None for r in sessions) / len(sessions)
+    assert 0.7 < share < 0.95
+    for r in rows["ai_code_commits"]:
+        assert match_project(r[3], projects) == r[5]
+    # member lists cover everyone working in the project
+    members = {p[0]: set(p[5]) for p in rows["projects"]}
+    assert all(r[1] in members[r[7]] for r in sessions if r[7] is not None)
+
+
+def test_activity_is_skewed_to_weekdays_and_heavy_users():
+    sessions = _all_rows(_SMALL)["agent_sessions"]
+    tz = seed.zoneinfo.ZoneInfo(seed.MV_TIMEZONE)
+    weekday = sum(r[5].astimezone(tz).weekday() < 5 for r in sessions)
+    assert weekday / len(sessions) > 0.8
+    per_member: dict[str, int] = {}
+    for r in sessions:
+        per_member[r[1]] = per_member.get(r[1], 0) + 1
+    counts = sorted(per_member.values(), reverse=True)
+    assert sum(counts[:3]) > sum(counts[-10:])
+
+
+def test_usage_and_spend_follow_generated_activity():
+    rows = _all_rows(_SMALL)
+    usage = rows["daily_usage"]
+    assert sum(r[7] for r in usage) == sum(r[6] for r in rows["ai_code_commits"])
+    assert sum(r[9] for r in usage) == sum(r[8] + r[10] for r in rows["ai_code_commits"])
+    active_days = {(r[0], r[1]) for r in usage if r[14]}
+    tz = seed.zoneinfo.ZoneInfo(seed.MV_TIMEZONE)
+    assert {(r[1], r[5].astimezone(tz).date()) for r in rows["agent_sessions"]} <= active_days
+    assert sum(r[11] for r in usage) * 4 == sum(r[2] for r in rows["spend_snapshots"])
+    assert sum(r[10] for r in usage) == sum(r[3] for r in rows["spend_snapshots"])
@@ -0,0 +1,73 @@
+"""Unit tests for serialization (orjson fast path vs FastAPI's JSONResponse)."""
+import json
+from collections.abc import Mapping
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+import serialization
+from serialization import ORJSONResponse, dumps
+
+
+class _Record(Mapping):
+    """Stands in for asyncpg.Record: a mapping that is not a dict, so orjson needs default=."""
+
+    def __init__(self, **values):
+        self._values = values
+
+    def __getitem__(self, key):
+        return self._values[key]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+
+def test_dumps_matches_fastapi_json_response():
+    rows = [
+        {
+            "id": 1,
+            "email": "张三@example.com",
+            "ended_at": datetime(2026, 3, 1, 8, 30, 15, 123456, tzinfo=timezone.utc),
+            "local_at": datetime(2026, 3, 1, 8, 30, tzinfo=timezone(timedelta(hours=8))),
+            "day": date(2026, 3, 1),
+            "spend": Decimal("12.50"),
+            "roots": ["/a", "/b"],
+            "project_id": None,
+            "active": True,
+        }
+    ]
+    expected = JSONResponse(content=jsonable_encoder(rows)).body
+    assert json.loads(dumps(rows)) == json.loads(expected)
+    assert b'"2026-03-01T08:30:15.123456+00:00"' in dumps(rows)
+
+
+def test_dumps_converts_records_via_default():
+    with (
+        patch("serialization.asyncpg.Record", _Record),
+        patch("serialization._default", wraps=serialization._default) as default,
+    ):
+        body = dumps({"data": [_Record(id=1, day=date(2026, 1, 2))]})
+    assert json.loads(body) == {"data": [{"id": 1, "day": "2026-01-02"}]}
+    assert type(default.call_args_list[0].args[0]) is _Record
+
+
+def test_dumps_non_str_keys_and_timedelta():
+    assert json.loads(dumps({1: timedelta(minutes=2)})) == {"1": 120.0}
+
+
+def test_dumps_rejects_unknown_types():
+    with pytest.raises(TypeError):
+        dumps({"x": object()})
+
+
+def test_orjson_response_renders_bytes_with_json_media_type():
+    resp = ORJSONResponse({"total": 0, "data": []})
+    assert resp.body == b'{"total":0,"data":[]}'
+    assert resp.media_type == "application/json"
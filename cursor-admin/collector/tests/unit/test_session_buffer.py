@@ -0,0 +1,188 @@
+"""
+Unit tests for session_buffer: bounded offer, COPY + merge flush, requeue on transient failure,
+row-by-row fallback that drops bad rows, drain on stop.
+Mocks database.get_pool; no PostgreSQL needed.
+"""
+import asyncio
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import asyncpg
+import pytest
+
+import cache
+from session_buffer import SessionBuffer, write_rows
+
+_T = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+
+def _row(i: int):
+    return (f"conv-{i}", "u@x.com", "m1", ["/repo"], None, _T, None, None)
+
+
+def _pool_with(conn):
+    class AsyncCtx:
+        async def __aenter__(self):
+            return conn
+
+        async def __aexit__(self, *args):
+            pass
+
+    pool = MagicMock()
+    pool.acquire = MagicMock(side_effect=lambda: AsyncCtx())
+    return pool
+
+
+def _conn(merge_status="INSERT 0 3"):
+    conn = MagicMock()
+    conn.transaction = MagicMock(return_value=MagicMock(__aenter__=AsyncMock(), __aexit__=AsyncMock(return_value=None)))
+    conn.execute = AsyncMock(side_effect=lambda sql, *a: merge_status if "INSERT" in sql else "CREATE TABLE")
+    conn.copy_records_to_table = AsyncMock()
+    return conn
+
+
+@pytest.mark.asyncio
+async def test_write_rows_copies_into_stage_and_merges():
+    conn = _conn("INSERT 0 2")
+    assert await write_rows(conn, [_row(1), _row(2)]) == 2
+    conn.copy_records_to_table.assert_awaited_once()
+    assert conn.copy_records_to_table.await_args.args[0] == "session_ingest_stage"
+    merge = next(c.args[0] for c in conn.execute.await_args_list if "INSERT INTO agent_sessions" in c.args[0])
+    assert "DISTINCT ON (s.conversation_id)" in merge
+    assert "NOT EXISTS" in merge
+    late = conn.execute.await_args_list[-1].args  # rows from 2026-03-01 are for a day before today
+    assert "summary_view_refreshes" in late[0]
+    assert late[1:] == ("mv_agent_session_daily", _T.date())
+
+
+def test_offer_is_bounded_and_all_or_nothing():
+    buf = SessionBuffer()
+    with patch("session_buffer.settings.session_buffer_max_rows", 3):
+        assert buf.offer([_row(1), _row(2)])
+        assert not buf.offer([_row(3), _row(4)])
+        assert buf.offer([_row(3)])
+        assert not buf.offer([_row(5)])
+    assert len(buf) == 3
+    assert buf.stats()["rejected"] == 3
+
+
+@pytest.mark.asyncio
+async def test_flush_chunks_by_flush_rows_and_bumps_sessions():
+    conn = _conn("INSERT 0 2")
+    buf = SessionBuffer()
+    buf.offer([_row(i) for i in range(5)])
+    before = cache.generation(cache.SESSIONS)
+    with (
+        patch("session_buffer.get_pool", AsyncMock(return_value=_pool_with(conn))),
+        patch("session_buffer.settings.session_buffer_flush_rows", 2),
+    ):
+        assert await buf.flush() == 6
+    assert conn.copy_records_to_table.await_count == 3
+    assert len(buf) == 0
+    assert cache.generation(cache.SESSIONS) == before + 1
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_requeues_rows_in_order():
+    conn = _conn()
+    conn.copy_records_to_table = AsyncMock(side_effect=OSError("connection lost"))
+    buf = SessionBuffer()
+    buf.offer([_row(i) for i in range(3)])
+    with patch("session_buffer.get_pool", AsyncMock(return_value=_pool_with(conn))):
+        with pytest.raises(OSError):
+            await buf.flush()
+    assert [r[0] for r in buf._rows] == ["conv-0", "conv-1", "conv-2"]
+    assert buf.stats()["flush_errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_bad_row_is_dropped_without_blocking_later_rows():
+    conn = _conn()
+
+    async def copy(table, records, columns):
+        if any(r[0] == "conv-1" for r in records):
+            raise asyncpg.ForeignKeyViolationError("project_id not present in projects")
+
+    conn.copy_records_to_table = AsyncMock(side_effect=copy)
+    conn.execute = AsyncMock(side_effect=lambda sql, *a: "INSERT 0 1" if "INSERT" in sql else "CREATE TABLE")
+    buf = SessionBuffer()
+    buf.offer([_row(i) for i in range(3)])
+    with patch("session_buffer.get_pool", AsyncMock(return_value=_pool_with(conn))):
+        assert await buf.flush() == 2
+        buf.offer([_row(3)])  # queued after the bad row: goes through on the next flush
+        assert await buf.flush() == 1
+    written = [c.kwargs["records"] for c in conn.copy_records_to_table.await_args_list]
+    assert [r[0][0] for r in written if len(r) == 1] == ["conv-0", "conv-1", "conv-2", "conv-3"]
+    assert len(buf) == 0
+    stats = buf.stats()
+    assert (stats["dropped"], stats["inserted"], stats["flush_errors"]) == (1, 3, 1)
+
+
+@pytest.mark.asyncio
+async def test_transient_error_during_row_by_row_requeues_the_rest():
+    conn = _conn("INSERT 0 1")
+    conn.copy_records_to_table = AsyncMock(
+        side_effect=[asyncpg.DataError("bad value"), None, asyncpg.ConnectionDoesNotExistError("closed")]
+    )
+    buf = SessionBuffer()
+    buf.offer([_row(i) for i in range(3)])
+    with patch("session_buffer.get_pool", AsyncMock(return_value=_pool_with(conn))):
+        with pytest.raises(asyncpg.ConnectionDoesNotExistError):
+            await buf.flush()
+    assert [r[0] for r in buf._rows] == ["conv-1", "conv-2"]
+    assert buf.stats()["inserted"] == 1
+    assert buf.stats()["dropped"] == 0
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        asyncpg.QueryCanceledError("statement timeout"),
+        asyncpg.DeadlockDetectedError("deadlock detected"),
+        asyncpg.ReadOnlySQLTransactionError("read-only transaction"),
+    ],
+)
+@pytest.mark.asyncio
+async def test_timeouts_and_conflicts_requeue_instead_of_dropping(error):
+    conn = _conn()
+    conn.copy_records_to_table = AsyncMock(side_effect=error)
+    buf = SessionBuffer()
+    buf.offer([_row(i) for i in range(3)])
+    with patch("session_buffer.get_pool", AsyncMock(return_value=_pool_with(conn))):
+        with pytest.raises(type(error)):
+            await buf.flush()
+    assert conn.copy_records_to_table.await_count == 1  # no row-by-row retry
+    assert [r[0] for r in buf._rows] == ["conv-0", "conv-1", "conv-2"]
+    assert buf.stats()["dropped"] == 0
+
+
+@pytest.mark.asyncio
+async def test_get_pool_failure_leaves_the_queue_untouched():
+    buf = SessionBuffer()
+    buf.offer([_row(i) for i in range(3)])
+    with patch("session_buffer.get_pool", AsyncMock(side_effect=asyncpg.InvalidPasswordError("bad password"))):
+        with pytest.raises(asyncpg.InvalidPasswordError):
+            await buf.flush()
+    assert [r[0] for r in buf._rows] == ["conv-0", "conv-1", "conv-2"]
+    assert buf.stats()["flush_errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_loop_flushes_when_threshold_reached_and_stop_drains():
+    conn = _conn("INSERT 0 1")
+    buf = SessionBuffer()
+    with (
+        patch("session_buffer.get_pool", AsyncMock(return_value=_pool_with(conn))),
+        patch("session_buffer.settings.session_buffer_flush_rows", 2),
+        patch("session_buffer.settings.session_buffer_flush_seconds", 60),
+    ):
+        await buf.start()
+        buf.offer([_row(1), _row(2)])
+        for _ in range(20):
+            await asyncio.sleep(0)
+        assert conn.copy_records_to_table.await_count == 1
+        buf.offer([_row(3)])  # below threshold: waits for the timer, drained by stop()
+        await buf.stop()
+    assert conn.copy_records_to_table.await_count == 2
+    assert len(buf) == 0
+    assert not buf.started
@@ -0,0 +1,116 @@
+"""Unit tests for singleflight (coalescing identical concurrent calls)."""
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import cache
+from singleflight import SingleFlight
+
+
+async def test_concurrent_calls_share_one_execution():
+    sf = SingleFlight()
+    started = 0
+    release = asyncio.Event()
+
+    async def work():
+        nonlocal started
+        started += 1
+        await release.wait()
+        return {"rows": [1, 2]}
+
+    waiters = [asyncio.create_task(sf.do("ep", ("k",), work)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters)
+    assert started == 1
+    assert all(r == {"rows": [1, 2]} for r in results)
+    assert sf.stats()["endpoints"]["ep"] == {"calls": 5, "executions": 1, "coalesced": 4}
+    assert sf.stats()["in_flight"] == 0
+
+
+async def test_different_keys_run_separately_and_finished_flight_is_not_reused():
+    sf = SingleFlight()
+    calls = []
+
+    async def work(k):
+        calls.append(k)
+        return k
+
+    assert await asyncio.gather(sf.do("ep", 1, lambda: work(1)), sf.do("ep", 2, lambda: work(2))) == [1, 2]
+    assert await sf.do("ep", 1, lambda: work(1)) == 1
+    assert calls == [1, 2, 1]
+
+
+async def test_error_propagates_to_all_waiters():
+    sf = SingleFlight()
+    release = asyncio.Event()
+
+    async def boom():
+        await release.wait()
+        raise RuntimeError("db down")
+
+    waiters = [asyncio.create_task(sf.do("ep", "k", boom)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+async def test_cancelled_leader_does_not_cancel_followers():
+    sf = SingleFlight()
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+        return "ok"
+
+    leader = asyncio.create_task(sf.do("ep", "k", work))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(sf.do("ep", "k", work))
+    await asyncio.sleep(0)
+    leader.cancel()
+    release.set()
+    assert await follower == "ok"
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+
+async def test_respond_coalesces_opted_in_endpoint_without_cache():
+    release = asyncio.Event()
+    calls = 0
+
+    async def producer():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return {"n": 1}
+
+    req = MagicMock()
+    req.headers = {}
+    with patch("cache.settings") as s:
+        s.response_cache_enabled = False
+        s.singleflight_endpoints = "leaderboard, project_summary"
+        tasks = [asyncio.create_task(cache.respond(req, "leaderboard", {"p": 1}, (), producer)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        responses = await asyncio.gather(*tasks)
+        assert calls == 1
+        assert {r.body for r in responses} == {b'{"n":1}'}
+
+        release.clear()
+        tasks = [asyncio.create_task(cache.respond(req, "spend_data", {}, (), producer)) for _ in range(2)]
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(*tasks)
+        assert calls == 3  # not opted in
+
+
+def test_api_admin_metrics_reports_cache_and_singleflight(app_with_mocked_db, api_key):
+    from fastapi.testclient import TestClient
+
+    r = TestClient(app_with_mocked_db, headers={"x-api-key": api_key}).get("/api/admin/metrics")
+    assert r.status_code == 200
+    data = r.json()
+    assert "hits" in data["response_cache"]
+    assert "endpoints" in data["singleflight"]
@@ -0,0 +1,23 @@
+"""Unit tests for timerange (date filters -> half-open timestamp ranges)."""
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import patch
+
+from timerange import day_bounds, parse_date_range
+
+
+def test_day_bounds_half_open_in_report_timezone():
+    with patch("timerange.settings") as s:
+        s.report_timezone = "Asia/Shanghai"
+        lo, hi = day_bounds(date(2025, 1, 3), date(2025, 1, 5))
+    assert lo == datetime(2025, 1, 2, 16, 0, tzinfo=timezone.utc)
+    assert hi == datetime(2025, 1, 5, 16, 0, tzinfo=timezone.utc)
+    # Last second of the end day is inside; hi (next local midnight) is the exclusive bound
+    last = datetime(2025, 1, 5, 15, 59, 59, tzinfo=timezone.utc)
+    assert lo <= last < hi
+
+
+def test_parse_date_range_defaults_to_last_days():
+    with patch("timerange.today", return_value=date(2025, 3, 31)):
+        assert parse_date_range(None, None, default_days=30) == (date(2025, 3, 1), date(2025, 3, 31))
+        assert parse_date_range("2025-01-01", None) == (date(2025, 1, 1), date(2025, 3, 31))
+    assert parse_date_range("2025-01-01", "2025-01-02") == (date(2025, 1, 1), date(2025, 1, 1) + timedelta(days=1))
@@ -0,0 +1,107 @@
+"""Unit tests for workspace_resolver (prefix trie, hook whitelist and generation-based rebuild)."""
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+import cache
+from workspace_resolver import PrefixTrie, WorkspaceResolver, build_trie, whitelist_rules
+
+
+def _rows(*pairs):
+    return [{"id": pid, "workspace_rules": rules, "member_emails": []} for pid, rules in pairs]
+
+
+def _pool(rows):
+    conn = MagicMock()
+    conn.fetch = AsyncMock(return_value=rows)
+    pool = MagicMock()
+    pool.acquire.return_value.__aenter__ = AsyncMock(return_value=conn)
+    pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+    return pool, conn
+
+
+def test_trie_longest_prefix():
+    t = PrefixTrie()
+    t.insert("d:/ai", 1)
+    t.insert("d:/ai/sierac-tm", 2)
+    assert t.longest_prefix("d:/ai/sierac-tm/web") == 2
+    assert t.longest_prefix("d:/ai/other") == 1
+    assert t.longest_prefix("d:/a") is None
+    assert t.longest_prefix("") is None
+
+
+def test_build_trie_normalises_rules_and_keeps_lowest_id():
+    t = build_trie(_rows((1, [r"D:\AI\Sierac-tm。", "", None]), (2, ["d:/ai/sierac-tm"]), (3, ["  /Home/X/ "])))
+    assert t.size == 2
+    assert t.longest_prefix("d:/ai/sierac-tm-2/src") == 1  # string prefix, as before
+    assert t.longest_prefix("/home/x/repo") == 3
+
+
+@pytest.mark.asyncio
+async def test_resolve_first_matching_root_wins():
+    pool, _ = _pool(_rows((1, ["/a"]), (2, ["/b"])))
+    r = WorkspaceResolver()
+    assert await r.resolve(pool, ["/zzz", r"\B\repo", "/a/repo"]) == 2
+    assert await r.resolve(pool, ["/zzz"]) is None
+    assert await r.resolve(pool, []) is None
+
+
+@pytest.mark.asyncio
+async def test_known_checks_active_project_ids_from_the_same_snapshot():
+    pool, conn = _pool(_rows((1, ["/a"]), (4, [])))
+    r = WorkspaceResolver()
+    assert await r.known(pool, 4)
+    assert not await r.known(pool, 2)
+    assert await r.resolve(pool, ["/a"]) == 1
+    assert conn.fetch.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_resolver_rebuilds_only_when_projects_change():
+    pool, conn = _pool(_rows((1, ["/a"])))
+    r = WorkspaceResolver()
+    await r.resolve(pool, ["/a/x"])
+    await r.resolve(pool, ["/a/y"])
+    assert conn.fetch.await_count == 1
+
+    conn.fetch.return_value = _rows((7, ["/a"]))
+    cache.bump(cache.PROJECTS)
+    assert await r.resolve(pool, ["/a/x"]) == 7
+    assert conn.fetch.await_count == 2
+
+    with patch("workspace_resolver.settings.workspace_resolver_ttl_seconds", 0):
+        await r.resolve(pool, ["/a/x"])
+    assert conn.fetch.await_count == 3
+    assert r.stats()["rebuilds"] == 3
+
+
+def test_whitelist_rules_normalised_and_projects_without_rules_omitted():
+    rows = [
+        {"id": 1, "workspace_rules": [r"D:\AI\Repo。", "d:/ai/repo", ""], "member_emails": [" B@x.com", "a@x.com", ""]},
+        {"id": 2, "workspace_rules": [], "member_emails": ["c@x.com"]},
+        {"id": 3, "workspace_rules": ["/srv/x"], "member_emails": None},
+    ]
+    assert whitelist_rules(rows) == [
+        {"project_id": 1, "workspace_rules": ["d:/ai/repo"], "member_emails": ["a@x.com", "b@x.com"]},
+        {"project_id": 3, "workspace_rules": ["/srv/x"], "member_emails": []},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_whitelist_version_is_content_hash_shared_with_resolver_rebuild():
+    pool, conn = _pool(_rows((1, ["/a"])))
+    r = WorkspaceResolver()
+    version, body = await r.whitelist(pool)
+    assert json.loads(body) == {
+        "version": version,
+        "rules": [{"project_id": 1, "workspace_rules": ["/a"], "member_emails": []}],
+    }
+    await r.resolve(pool, ["/a/x"])
+    assert conn.fetch.await_count == 1
+
+    cache.bump(cache.PROJECTS)  # rebuilt, same content: same version
+    assert (await r.whitelist(pool))[0] == version
+    conn.fetch.return_value = _rows((1, ["/a", "/b"]))
+    cache.bump(cache.PROJECTS)
+    assert (await r.whitelist(pool))[0] != version
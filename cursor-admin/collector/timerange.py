@@ -0,0 +1,38 @@
+"""
+Date-range helpers for timestamp filters.
+
+Endpoints take inclusive calendar dates (start/end); queries compare the raw TIMESTAMPTZ column
+against a half-open range [start 00:00, end+1 00:00) in settings.report_timezone, so the
+predicate stays sargable (no ::date cast on the column) and day boundaries do not depend on
+the DB session timezone.
+"""
+
+import zoneinfo
+from datetime import date, datetime, time, timedelta, tzinfo
+
+from config import settings
+
+
+def report_tz() -> tzinfo:
+    return zoneinfo.ZoneInfo(settings.report_timezone)
+
+
+def today() -> date:
+    """Current calendar date in the report timezone."""
+    return datetime.now(report_tz()).date()
+
+
+def parse_date_range(start: str | None, end: str | None, default_days: int = 30) -> tuple[date, date]:
+    """Parse ?start=&end= (YYYY-MM-DD); defaults to the last default_days days ending today."""
+    end_date = date.fromisoformat(end) if end else today()
+    start_date = date.fromisoformat(start) if start else today() - timedelta(days=default_days)
+    return start_date, end_date
+
+
+def day_bounds(start_date: date, end_date: date) -> tuple[datetime, datetime]:
+    """Inclusive dates -> half-open aware datetimes [start 00:00, end+1 00:00) in report timezone."""
+    tz = report_tz()
+    return (
+        datetime.combine(start_date, time.min, tzinfo=tz),
+        datetime.combine(end_date + timedelta(days=1), time.min, tzinfo=tz),
+    )
@@ -0,0 +1,218 @@
+"""
+Scheduled jobs and the background job runner, runnable apart from the HTTP API.
+
+settings.run_mode selects what a process runs (same modules, same database):
+
+- all:    uvicorn main:app serves HTTP and runs the scheduler and job runner (single process)
+- api:    uvicorn main:app serves HTTP only
+- worker: python worker.py runs the scheduler and job runner only, so git subprocesses,
+          SMTP sends and score computation never share an event loop with request handlers
+
+Several api processes may run side by side; any number of workers may too, as scheduled jobs
+only run on the elected leader (leader.py) and jobs are claimed with SKIP LOCKED. Cache
+invalidation and job wake-ups cross processes via pubsub.py.
+"""
+
+import asyncio
+import logging
+import signal
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+from ai_code_sync import sync_ai_code_commits
+from alerts import check_alerts
+from config import settings
+from contribution_engine import run_calculate_latest
+from cursor_api import close_client
+from database import close_pool, init_db
+from jobs import runner as job_runner, submit as submit_job
+from leader import leader, leader_only
+from partitions import run_partition_maintenance
+from pubsub import pubsub
+from summaries import AI_COMMIT_VIEW, SESSION_VIEW, refresh_views
+from sync import run_full_sync
+
+log = logging.getLogger("worker")
+
+scheduler = AsyncIOScheduler()
+
+
+def configure_scheduler() -> None:
+    # Git collect runs in scheduler (_sync_and_alert) and via POST /api/admin/trigger-git-collect; not on startup to avoid long clone blocking serve
+    scheduler.add_job(
+        leader_only(_sync_and_alert),
+        "interval",
+        minutes=settings.sync_interval_minutes,
+        id="sync",
+    )
+    scheduler.add_job(
+        leader_only(_job_ai_code_sync),
+        "interval",
+        hours=1,
+        id="ai_code_sync",
+    )
+    # Contribution score: daily 00:30, weekly Mon 01:00, monthly 1st 01:30 (Asia/Shanghai)
+    try:
+        import zoneinfo
+        tz = zoneinfo.ZoneInfo("Asia/Shanghai")
+    except ImportError:
+        tz = None
+    scheduler.add_job(
+        leader_only(_job_contribution_daily),
+        "cron",
+        hour=0,
+        minute=30,
+        id="contribution_daily",
+        timezone=tz,
+    )
+    scheduler.add_job(
+        leader_only(_job_contribution_weekly),
+        "cron",
+        day_of_week="mon",
+        hour=1,
+        minute=0,
+        id="contribution_weekly",
+        timezone=tz,
+    )
+    scheduler.add_job(
+        leader_only(_job_contribution_monthly),
+        "cron",
+        day=1,
+        hour=1,
+        minute=30,
+        id="contribution_monthly",
+        timezone=tz,
+    )
+    scheduler.add_job(
+        leader_only(_job_partition_maintenance),
+        "cron",
+        hour=3,
+        minute=0,
+        id="partition_maintenance",
+        timezone=tz,
+    )
+    if settings.parquet_export_enabled:
+        scheduler.add_job(
+            leader_only(_job_parquet_export),
+            "cron",
+            hour=settings.parquet_export_hour,
+            minute=15,
+            id="parquet_export",
+            timezone=tz,
+        )
+
+
+async def start() -> None:
+    """Elect, start the scheduler and job runner, then queue the initial sync on the leader.
+
+    The sync runs as a full_sync job in the background, so startup (and readiness) does not
+    wait on the Cursor API."""
+    await leader.start()
+    configure_scheduler()
+    scheduler.start()
+    log.info(
+        "Scheduler started, sync every %d min (jobs run only while this process is leader: %s)",
+        settings.sync_interval_minutes,
+        leader.is_leader,
+    )
+    await job_runner.start()
+    if leader.is_leader:
+        try:
+            await submit_job("full_sync")
+        except Exception as e:
+            log.exception("Initial sync submit failed: %s", e)
+
+
+async def stop() -> None:
+    scheduler.shutdown()
+    await leader.stop()
+    await job_runner.stop()
+
+
+async def _sync_and_alert():
+    await run_full_sync()
+    await check_alerts()
+    try:
+        # Via the job runner so it coalesces with manual POST /api/admin/trigger-git-collect
+        await submit_job("git_collect")
+    except Exception as e:
+        log.exception("Git collect submit failed: %s", e)
+    try:
+        await sync_ai_code_commits()
+    except Exception as e:
+        log.exception("AI code sync failed: %s", e)
+    await refresh_views(SESSION_VIEW, AI_COMMIT_VIEW)
+
+
+async def _job_ai_code_sync():
+    try:
+        await sync_ai_code_commits()
+    except Exception as e:
+        log.exception("AI code sync job failed: %s", e)
+    await refresh_views(AI_COMMIT_VIEW)
+
+
+async def _job_contribution_daily():
+    try:
+        await run_calculate_latest("daily")
+    except Exception as e:
+        log.exception("Contribution daily failed: %s", e)
+
+
+async def _job_contribution_weekly():
+    try:
+        await run_calculate_latest("weekly")
+    except Exception as e:
+        log.exception("Contribution weekly failed: %s", e)
+
+
+async def _job_contribution_monthly():
+    try:
+        await run_calculate_latest("monthly")
+    except Exception as e:
+        log.exception("Contribution monthly failed: %s", e)
+
+
+async def _job_partition_maintenance():
+    try:
+        result = await run_partition_maintenance()
+        if any(r["retired"] for r in result.values()):
+            await refresh_views(SESSION_VIEW, AI_COMMIT_VIEW)
+    except Exception as e:
+        log.exception("Partition maintenance failed: %s", e)
+
+
+async def _job_parquet_export():
+    try:
+        await submit_job("parquet_export")
+    except Exception as e:
+        log.exception("Parquet export submit failed: %s", e)
+
+
+async def run() -> None:
+    """Entry point for run_mode=worker: until SIGTERM / SIGINT."""
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stopping.set)
+        except NotImplementedError:  # Windows
+            pass
+    await init_db()
+    await pubsub.start()
+    await start()
+    log.info("Worker running (run_mode=%s)", settings.run_mode)
+    try:
+        await stopping.wait()
+    finally:
+        await stop()
+        await pubsub.stop()
+        await close_client()
+        await close_pool()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    if settings.run_mode != "worker":
+        log.warning("worker.py started with run_mode=%s; set RUN_MODE=worker and RUN_MODE=api for the HTTP tier", settings.run_mode)
+    asyncio.run(run())
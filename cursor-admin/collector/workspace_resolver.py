@@ -0,0 +1,168 @@
+"""
+Workspace root -> project resolution for hook ingest, and the hook whitelist.
+
+Active projects' workspace_rules are normalised once into a character prefix trie, so a root
+resolves in O(len(root)) with no DB round trip. From the same rows the whitelist served to
+hooks (GET /api/projects/whitelist) is serialised once, versioned by a hash of its content so
+the version is stable across processes and restarts. Both are rebuilt when the projects
+generation changes (cache.bump(cache.PROJECTS) on create/update/archive) or after
+workspace_resolver_ttl_seconds, to pick up edits made outside this process.
+
+Matching is a case-insensitive string prefix with / and \\ treated alike; trailing
+punctuation typed into the UI (e.g. "D:\\AI\\Sierac-tm。") is ignored. The first root that
+matches wins. For that root the longest matching rule wins, and if two projects share a
+rule the lower project id wins. A project_id a hook sends itself is only kept if it is one of
+the active projects in the same snapshot (see known()).
+"""
+
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass
+
+import cache
+from config import settings
+from serialization import dumps
+
+_RULE_TRAILING = "。，,; \t\n\r"
+_END = ""  # key holding the project id of a rule ending at this node (never a path character)
+
+
+def normalise_root(root: str) -> str:
+    return root.replace("\\", "/").strip().lower()
+
+
+def normalise_rule(rule: str) -> str:
+    return normalise_root(rule).rstrip(_RULE_TRAILING)
+
+
+class PrefixTrie:
+    """Character trie of nested dicts; nodes map a character to the next node."""
+
+    def __init__(self):
+        self._root: dict = {}
+        self.size = 0
+
+    def insert(self, prefix: str, value: int) -> None:
+        """Add prefix -> value; an existing value for the same prefix is kept."""
+        node = self._root
+        for ch in prefix:
+            node = node.setdefault(ch, {})
+        if _END not in node:
+            node[_END] = value
+            self.size += 1
+
+    def longest_prefix(self, text: str) -> int | None:
+        """Value of the longest inserted prefix of text, or None."""
+        node, found = self._root, None
+        for ch in text:
+            node = node.get(ch)
+            if node is None:
+                break
+            found = node.get(_END, found)
+        return found
+
+
+def build_trie(rows) -> PrefixTrie:
+    """rows: (id, workspace_rules) ordered by id."""
+    trie = PrefixTrie()
+    for r in rows:
+        for rule in r["workspace_rules"] or []:
+            rule_n = normalise_rule(rule) if rule else ""
+            if rule_n:
+                trie.insert(rule_n, r["id"])
+    return trie
+
+
+def whitelist_rules(rows) -> list[dict]:
+    """rows: (id, workspace_rules, member_emails) ordered by id; projects without rules are omitted."""
+    rules = []
+    for r in rows:
+        paths = list(dict.fromkeys(n for n in (normalise_rule(x) for x in r["workspace_rules"] or [] if x) if n))
+        if paths:
+            emails = sorted({e.strip().lower() for e in r["member_emails"] or [] if e and e.strip()})
+            rules.append({"project_id": r["id"], "workspace_rules": paths, "member_emails": emails})
+    return rules
+
+
+def serialise_whitelist(rules: list[dict]) -> tuple[str, bytes]:
+    """(version, body); the version is a content hash so every process agrees on it."""
+    version = hashlib.blake2b(dumps(rules), digest_size=8).hexdigest()
+    return version, dumps({"version": version, "rules": rules})
+
+
+@dataclass
+class _Snapshot:
+    trie: PrefixTrie
+    project_ids: frozenset[int]
+    whitelist_version: str
+    whitelist_body: bytes
+    generation: int
+    built_at: float
+
+
+class WorkspaceResolver:
+    def __init__(self):
+        self._snapshot: _Snapshot | None = None
+        self._lock = asyncio.Lock()
+        self.rebuilds = 0
+
+    def _fresh(self) -> bool:
+        s = self._snapshot
+        return (
+            s is not None
+            and s.generation == cache.generation(cache.PROJECTS)
+            and time.monotonic() - s.built_at < settings.workspace_resolver_ttl_seconds
+        )
+
+    async def _current(self, pool) -> _Snapshot:
+        if self._fresh():
+            return self._snapshot
+        async with self._lock:
+            if not self._fresh():
+                generation = cache.generation(cache.PROJECTS)
+                async with pool.acquire() as conn:
+                    rows = await conn.fetch(
+                        "SELECT id, workspace_rules, member_emails FROM projects WHERE status = 'active' ORDER BY id"
+                    )
+                version, body = serialise_whitelist(whitelist_rules(rows))
+                self._snapshot = _Snapshot(
+                    build_trie(rows), frozenset(r["id"] for r in rows), version, body, generation, time.monotonic()
+                )
+                self.rebuilds += 1
+        return self._snapshot
+
+    async def resolve(self, pool, workspace_roots: list[str]) -> int | None:
+        if not workspace_roots:
+            return None
+        trie = (await self._current(pool)).trie
+        for root in workspace_roots:
+            if root:
+                project_id = trie.longest_prefix(normalise_root(root))
+                if project_id is not None:
+                    return project_id
+        return None
+
+    async def known(self, pool, project_id: int) -> bool:
+        """Whether project_id is an active project, so rows naming it will not fail the projects FK."""
+        return project_id in (await self._current(pool)).project_ids
+
+    async def whitelist(self, pool) -> tuple[str, bytes]:
+        """(version, serialised {"version", "rules"}) for GET /api/projects/whitelist."""
+        s = await self._current(pool)
+        return s.whitelist_version, s.whitelist_body
+
+    def invalidate(self) -> None:
+        self._snapshot = None
+
+    def stats(self) -> dict:
+        s = self._snapshot
+        return {
+            "rules": s.trie.size if s else 0,
+            "generation": s.generation if s else -1,
+            "whitelist_version": s.whitelist_version if s else None,
+            "rebuilds": self.rebuilds,
+        }
+
+
+resolver = WorkspaceResolver()
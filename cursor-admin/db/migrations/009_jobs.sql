@@ -0,0 +1,25 @@
+-- ============================================================
+-- 009_jobs.sql — 后台任务表（Git 采集、贡献重算等长任务，接口立即返回 job_id）
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id                  BIGSERIAL   PRIMARY KEY,
+    job_type            TEXT        NOT NULL,               -- 'git_collect' | 'contribution_recalculate' | ...
+    dedupe_key          TEXT        NOT NULL,               -- 相同 key 在 queued/running 期间只保留一条
+    params              JSONB       NOT NULL DEFAULT '{}',
+    status              TEXT        NOT NULL DEFAULT 'queued',  -- 'queued' | 'running' | 'succeeded' | 'failed'
+    progress_done       INT         NOT NULL DEFAULT 0,
+    progress_total      INT,
+    progress_message    TEXT,
+    result              JSONB,
+    error               TEXT,
+    created_at          TIMESTAMPTZ DEFAULT NOW(),
+    started_at          TIMESTAMPTZ,
+    heartbeat_at        TIMESTAMPTZ,                        -- 执行中由 worker 定期刷新，超时视为 worker 丢失
+    finished_at         TIMESTAMPTZ
+);
+
+-- 合并重复请求：同一 dedupe_key 仅允许一条未完成任务
+CREATE UNIQUE INDEX IF NOT EXISTS uq_jobs_active_dedupe ON jobs (dedupe_key) WHERE status IN ('queued', 'running');
+CREATE INDEX IF NOT EXISTS idx_jobs_queued  ON jobs (job_type, id) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs (created_at DESC);
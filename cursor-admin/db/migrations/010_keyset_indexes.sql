@@ -0,0 +1,6 @@
+-- ============================================================
+-- 010_keyset_indexes.sql — 列表接口游标分页（按 (时间, id) 倒序）所需索引
+-- ============================================================
+
+CREATE INDEX IF NOT EXISTS idx_agent_sessions_ended_id  ON agent_sessions  (ended_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_ai_code_commits_ts_id    ON ai_code_commits (commit_ts DESC, id DESC);
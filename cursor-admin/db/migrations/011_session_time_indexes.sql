@@ -0,0 +1,12 @@
+-- ============================================================
+-- 011_session_time_indexes.sql — 会话按时间范围筛选/汇总的索引
+-- 接口使用半开区间 ended_at >= $1 AND ended_at < $2（不再 ended_at::date），可走索引
+-- ============================================================
+
+-- 纯时间范围：/api/sessions/summary、/api/sessions/summary-by-project 按 ended_at 扫描，
+-- INCLUDE 汇总所需列以支持 Index Only Scan（不回表）
+CREATE INDEX IF NOT EXISTS idx_agent_sessions_ended_cover ON agent_sessions (ended_at)
+    INCLUDE (user_email, primary_workspace, project_id, duration_seconds);
+
+-- 按成员 + 时间：/api/sessions?email=（001 已有 idx_agent_sessions_email (user_email, ended_at DESC)，此处补 id 以支持游标分页）
+CREATE INDEX IF NOT EXISTS idx_agent_sessions_email_ended_id ON agent_sessions (user_email, ended_at DESC, id DESC);
@@ -0,0 +1,21 @@
+-- ============================================================
+-- 012_search_indexes.sql — 会话工作目录子串检索（pg_trgm）与 AI 提交信息全文检索
+-- ============================================================
+
+-- /api/sessions?workspace= 使用 ILIKE '%...%'，前导通配符只能走 trigram GIN 索引。
+-- pg_trgm 属 contrib（官方镜像自带）；实例未提供时跳过，检索仍可用但退化为扫描。
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        CREATE INDEX IF NOT EXISTS idx_agent_sessions_ws_trgm
+            ON agent_sessions USING gin (primary_workspace gin_trgm_ops);
+    ELSE
+        RAISE NOTICE 'pg_trgm not available, skipping idx_agent_sessions_ws_trgm';
+    END IF;
+END
+$$;
+
+-- /api/ai-commits?q= 全文检索；表达式须与查询中的 to_tsvector('simple', COALESCE(commit_message, '')) 一致
+CREATE INDEX IF NOT EXISTS idx_ai_code_commits_msg_fts
+    ON ai_code_commits USING gin (to_tsvector('simple', COALESCE(commit_message, '')));
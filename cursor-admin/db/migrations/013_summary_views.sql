@@ -0,0 +1,46 @@
+-- ============================================================
+-- 013_summary_views.sql — 会话 / AI 提交按日预聚合（物化视图，同步后 CONCURRENTLY 刷新）
+-- 日期粒度按 Asia/Shanghai 自然日；与 settings.report_timezone 不一致时接口回退实时查询
+-- ============================================================
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_agent_session_daily AS
+SELECT
+    (ended_at AT TIME ZONE 'Asia/Shanghai')::date AS day,
+    user_email,
+    primary_workspace,
+    project_id,
+    COUNT(*)                                   AS session_count,
+    COALESCE(SUM(duration_seconds), 0)::bigint AS total_seconds,
+    MIN(ended_at)                              AS first_seen,
+    MAX(ended_at)                              AS last_seen
+FROM agent_sessions
+GROUP BY 1, 2, 3, 4;
+
+-- REFRESH ... CONCURRENTLY 需要唯一索引；primary_workspace / project_id 可为空
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_agent_session_daily
+    ON mv_agent_session_daily (day, user_email, primary_workspace, project_id) NULLS NOT DISTINCT;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_ai_commit_daily AS
+SELECT
+    (commit_ts AT TIME ZONE 'Asia/Shanghai')::date           AS day,
+    project_id,
+    user_email,
+    SUM(tab_lines_added + composer_lines_added)::bigint     AS ai_lines_added,
+    SUM(total_lines_added)::bigint                          AS total_lines_added,
+    COUNT(*)::bigint                                        AS commit_count  -- (commit_hash, user_email) 唯一
+FROM ai_code_commits
+GROUP BY 1, 2, 3;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_ai_commit_daily
+    ON mv_ai_commit_daily (day, project_id, user_email) NULLS NOT DISTINCT;
+
+-- 每个视图最近一次刷新的开始时间：早于该时间所在自然日的数据从视图读取，其余实时查询
+CREATE TABLE IF NOT EXISTS summary_view_refreshes (
+    view_name     TEXT        PRIMARY KEY,
+    refreshed_at  TIMESTAMPTZ NOT NULL,
+    duration_ms   INT
+);
+-- 刷新后写入的、日期早于刷新日的迟到数据（Hook 离线补报、AI 提交回补）：从 stale_from 起实时查询，
+-- 直到一次在 stale_marked_at 之后开始的刷新把它们并入视图
+ALTER TABLE summary_view_refreshes ADD COLUMN IF NOT EXISTS stale_from      DATE;
+ALTER TABLE summary_view_refreshes ADD COLUMN IF NOT EXISTS stale_marked_at TIMESTAMPTZ;
@@ -0,0 +1,95 @@
+-- ============================================================
+-- 014_partitioning.sql — agent_sessions / ai_code_commits 按月分区的前置结构与保留期归档
+-- 分区转换本身由 collector/partitions.py convert 离线执行（锁表 + 复制），本脚本对堆表与分区表均幂等
+-- ============================================================
+
+-- 分区表上的唯一约束必须包含分区键；写入方的 ON CONFLICT 统一使用以下索引，转换前后一致
+-- （commit_ts 对同一 commit_hash 固定；会话重复上报由写入方按 conversation_id 加事务级 advisory lock 后 NOT EXISTS 去重，
+-- 见 session_buffer.CONVERSATION_LOCK_SQL）
+CREATE UNIQUE INDEX IF NOT EXISTS uq_agent_sessions_conv_ended
+    ON agent_sessions (conversation_id, ended_at);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_ai_code_commits_hash_email_ts
+    ON ai_code_commits (commit_hash, user_email, commit_ts);
+
+-- 超出保留期的分区在分离/删除前按日汇总到归档表（粒度与 013 物化视图一致）
+CREATE TABLE IF NOT EXISTS agent_session_daily_archive (
+    day                 DATE        NOT NULL,
+    user_email          TEXT        NOT NULL,
+    primary_workspace   TEXT,
+    project_id          INT,
+    session_count       BIGINT      NOT NULL,
+    total_seconds       BIGINT      NOT NULL,
+    first_seen          TIMESTAMPTZ,
+    last_seen           TIMESTAMPTZ
+);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_agent_session_daily_archive
+    ON agent_session_daily_archive (day, user_email, primary_workspace, project_id) NULLS NOT DISTINCT;
+
+CREATE TABLE IF NOT EXISTS ai_commit_daily_archive (
+    day                 DATE        NOT NULL,
+    project_id          INT,
+    user_email          TEXT        NOT NULL,
+    ai_lines_added      BIGINT      NOT NULL,
+    total_lines_added   BIGINT      NOT NULL,
+    commit_count        BIGINT      NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_ai_commit_daily_archive
+    ON ai_commit_daily_archive (day, project_id, user_email) NULLS NOT DISTINCT;
+
+-- 物化视图并入归档行，汇总接口在分区删除后仍覆盖历史区间（仅在定义未包含归档表时重建一次）
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_matviews
+        WHERE schemaname = current_schema() AND matviewname = 'mv_agent_session_daily'
+          AND definition LIKE '%agent_session_daily_archive%'
+    ) THEN
+        DROP MATERIALIZED VIEW IF EXISTS mv_agent_session_daily;
+        CREATE MATERIALIZED VIEW mv_agent_session_daily AS
+        SELECT day, user_email, primary_workspace, project_id,
+               SUM(session_count)::bigint AS session_count,
+               SUM(total_seconds)::bigint AS total_seconds,
+               MIN(first_seen)            AS first_seen,
+               MAX(last_seen)             AS last_seen
+        FROM (
+            SELECT (ended_at AT TIME ZONE 'Asia/Shanghai')::date AS day, user_email, primary_workspace, project_id,
+                   COUNT(*) AS session_count, COALESCE(SUM(duration_seconds), 0) AS total_seconds,
+                   MIN(ended_at) AS first_seen, MAX(ended_at) AS last_seen
+            FROM agent_sessions
+            GROUP BY 1, 2, 3, 4
+            UNION ALL
+            SELECT day, user_email, primary_workspace, project_id, session_count, total_seconds, first_seen, last_seen
+            FROM agent_session_daily_archive
+        ) s
+        GROUP BY day, user_email, primary_workspace, project_id;
+        CREATE UNIQUE INDEX uq_mv_agent_session_daily
+            ON mv_agent_session_daily (day, user_email, primary_workspace, project_id) NULLS NOT DISTINCT;
+    END IF;
+
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_matviews
+        WHERE schemaname = current_schema() AND matviewname = 'mv_ai_commit_daily'
+          AND definition LIKE '%ai_commit_daily_archive%'
+    ) THEN
+        DROP MATERIALIZED VIEW IF EXISTS mv_ai_commit_daily;
+        CREATE MATERIALIZED VIEW mv_ai_commit_daily AS
+        SELECT day, project_id, user_email,
+               SUM(ai_lines_added)::bigint    AS ai_lines_added,
+               SUM(total_lines_added)::bigint AS total_lines_added,
+               SUM(commit_count)::bigint      AS commit_count
+        FROM (
+            SELECT (commit_ts AT TIME ZONE 'Asia/Shanghai')::date AS day, project_id, user_email,
+                   SUM(tab_lines_added + composer_lines_added) AS ai_lines_added,
+                   SUM(total_lines_added) AS total_lines_added,
+                   COUNT(*) AS commit_count
+            FROM ai_code_commits
+            GROUP BY 1, 2, 3
+            UNION ALL
+            SELECT day, project_id, user_email, ai_lines_added, total_lines_added, commit_count
+            FROM ai_commit_daily_archive
+        ) s
+        GROUP BY day, project_id, user_email;
+        CREATE UNIQUE INDEX uq_mv_ai_commit_daily
+            ON mv_ai_commit_daily (day, project_id, user_email) NULLS NOT DISTINCT;
+    END IF;
+END $$;
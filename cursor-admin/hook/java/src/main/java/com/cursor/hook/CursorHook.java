@@ -32,7 +32,6 @@ import java.util.List;
 public final class CursorHook {
 
     private static final ObjectMapper JSON = new ObjectMapper();
-    private static final boolean IS_WINDOWS = System.getProperty("os.name", "").toLowerCase(java.util.Locale.ROOT).startsWith("win");
 
     public static void main(String[] args) {
         try {
@@ -300,52 +299,73 @@ public final class CursorHook {
         return Paths.get(stateDir, "whitelist_cache.json");
     }
 
-    private static List<JsonNode> loadWhitelistCache(String stateDir, int ttlSeconds) {
+    private static JsonNode readWhitelistCache(String stateDir) {
         Path p = whitelistCachePath(stateDir);
         if (!Files.isRegularFile(p)) return null;
         try {
-            JsonNode cached = JSON.readTree(Files.readString(p, StandardCharsets.UTF_8));
-            long fetchedAt = cached.has("fetched_at") ? cached.get("fetched_at").asLong() : 0;
-            if (System.currentTimeMillis() / 1000 - fetchedAt >= ttlSeconds) return null;
-            JsonNode rules = cached.get("rules");
-            if (rules == null || !rules.isArray()) return null;
-            List<JsonNode> out = new ArrayList<>();
-            rules.forEach(out::add);
-            return out;
+            return JSON.readTree(Files.readString(p, StandardCharsets.UTF_8));
         } catch (Exception e) {
             return null;
         }
     }
 
-    private static List<JsonNode> fetchWhitelist(String collectorUrl, int timeoutSeconds) {
+    private static List<JsonNode> rulesOf(JsonNode body) {
+        JsonNode rules = body == null ? null : body.get("rules");
+        if (rules == null || !rules.isArray()) return null;
+        List<JsonNode> out = new ArrayList<>();
+        rules.forEach(out::add);
+        return out;
+    }
+
+    private static List<JsonNode> loadWhitelistCache(String stateDir, int ttlSeconds) {
+        JsonNode cached = readWhitelistCache(stateDir);
+        if (cached == null) return null;
+        long fetchedAt = cached.has("fetched_at") ? cached.get("fetched_at").asLong() : 0;
+        if (System.currentTimeMillis() / 1000 - fetchedAt >= ttlSeconds) return null;
+        return rulesOf(cached);
+    }
+
+    /** rules == null with notModified == true: 304, keep the cached copy. */
+    private static final class WhitelistFetch {
+        List<JsonNode> rules;
+        String etag;
+        boolean notModified;
+    }
+
+    private static WhitelistFetch fetchWhitelist(String collectorUrl, int timeoutSeconds, String etag) {
         String url = collectorUrl.replaceAll("/+$", "") + "/api/projects/whitelist";
         try {
             HttpClient client = HttpClient.newBuilder()
                 .connectTimeout(Duration.ofSeconds(timeoutSeconds))
                 .build();
-            HttpRequest req = HttpRequest.newBuilder()
+            HttpRequest.Builder builder = HttpRequest.newBuilder()
                 .uri(URI.create(url))
                 .header("Accept", "application/json")
                 .timeout(Duration.ofSeconds(timeoutSeconds))
-                .GET()
-                .build();
-            HttpResponse<String> resp = client.send(req, HttpResponse.BodyHandlers.ofString(StandardCharsets.UTF_8));
+                .GET();
+            if (etag != null && !etag.isEmpty()) builder.header("If-None-Match", etag);
+            HttpResponse<String> resp = client.send(builder.build(), HttpResponse.BodyHandlers.ofString(StandardCharsets.UTF_8));
+            WhitelistFetch out = new WhitelistFetch();
+            if (resp.statusCode() == 304) {
+                out.notModified = true;
+                out.etag = etag;
+                return out;
+            }
             if (resp.statusCode() != 200) return null;
-            JsonNode body = JSON.readTree(resp.body());
-            JsonNode rules = body.get("rules");
-            if (rules == null || !rules.isArray()) return null;
-            List<JsonNode> out = new ArrayList<>();
-            rules.forEach(out::add);
+            out.rules = rulesOf(JSON.readTree(resp.body()));
+            if (out.rules == null) return null;
+            out.etag = resp.headers().firstValue("ETag").orElse(null);
             return out;
         } catch (Exception e) {
             return null;
         }
     }
 
-    private static void saveWhitelistCache(String stateDir, List<JsonNode> rules) {
+    private static void saveWhitelistCache(String stateDir, List<JsonNode> rules, String etag) {
         try {
             Files.createDirectories(Paths.get(stateDir));
             ObjectNode root = JSON.createObjectNode().put("fetched_at", System.currentTimeMillis() / 1000);
+            if (etag != null) root.put("etag", etag);
             ArrayNode arr = root.putArray("rules");
             for (JsonNode r : rules) arr.add(r);
             Files.writeString(whitelistCachePath(stateDir), root.toString(), StandardCharsets.UTF_8);
@@ -353,38 +373,57 @@ public final class CursorHook {
         }
     }
 
+    /** 缓存未过期直接用；过期后带 If-None-Match 向采集服务确认，304 沿用缓存；失败返回 null（放行）。 */
     private static List<JsonNode> getWhitelist(Config config) {
         List<JsonNode> rules = loadWhitelistCache(config.stateDir, config.whitelistTtlSeconds);
         if (rules != null) return rules;
-        rules = fetchWhitelist(config.collectorUrl, config.timeoutSeconds);
-        if (rules != null) saveWhitelistCache(config.stateDir, rules);
+        JsonNode cached = readWhitelistCache(config.stateDir);
+        String etag = cached != null && cached.hasNonNull("etag") ? cached.get("etag").asText() : null;
+        WhitelistFetch fetched = fetchWhitelist(config.collectorUrl, config.timeoutSeconds, etag);
+        if (fetched == null) return null;
+        rules = fetched.notModified ? rulesOf(cached) : fetched.rules;
+        if (rules == null) rules = new ArrayList<>();
+        saveWhitelistCache(config.stateDir, rules, fetched.etag);
         return rules;
     }
 
+    /** 与采集服务一致：/ 与 \ 等价、不区分大小写，规则末尾误输入的标点忽略。 */
+    private static String normalisePath(String path) {
+        return path == null ? "" : path.replace('\\', '/').strip().toLowerCase(java.util.Locale.ROOT);
+    }
+
+    private static String normaliseRule(String rule) {
+        return normalisePath(rule).replaceAll("[。，,;\\s]+$", "");
+    }
+
+    /** 第一个有匹配的 workspace root 生效；对该 root 取最长的规则（与采集服务的归属一致）。 */
     private static JsonNode matchWhitelist(List<String> workspaceRoots, String userEmail, List<JsonNode> rules) {
         String userLower = userEmail == null ? "" : userEmail.toLowerCase(java.util.Locale.ROOT);
-        for (JsonNode rule : rules) {
-            List<String> rulePaths = stringList(rule, "workspace_rules");
-            List<String> memberEmails = stringList(rule, "member_emails");
-            for (String root : workspaceRoots) {
-                for (String rulePath : rulePaths) {
-                    boolean matched = IS_WINDOWS
-                        ? root.toLowerCase(java.util.Locale.ROOT).startsWith(rulePath.toLowerCase(java.util.Locale.ROOT))
-                        : root.startsWith(rulePath);
-                    if (!matched) continue;
-                    if (!memberEmails.isEmpty()) {
-                        boolean inList = false;
-                        for (String e : memberEmails) {
-                            if (e != null && e.toLowerCase(java.util.Locale.ROOT).equals(userLower)) {
-                                inList = true;
-                                break;
-                            }
+        for (String root : workspaceRoots) {
+            String rootN = normalisePath(root);
+            JsonNode best = null;
+            int bestLen = 0;
+            for (JsonNode rule : rules) {
+                List<String> memberEmails = stringList(rule, "member_emails");
+                if (!memberEmails.isEmpty()) {
+                    boolean inList = false;
+                    for (String e : memberEmails) {
+                        if (e != null && e.toLowerCase(java.util.Locale.ROOT).equals(userLower)) {
+                            inList = true;
+                            break;
                         }
-                        if (!inList) continue;
                     }
-                    return rule;
+                    if (!inList) continue;
+                }
+                for (String rulePath : stringList(rule, "workspace_rules")) {
+                    String rp = normaliseRule(rulePath);
+                    if (!rp.isEmpty() && rp.length() > bestLen && rootN.startsWith(rp)) {
+                        best = rule;
+                        bestLen = rp.length();
+                    }
                 }
             }
+            if (best != null) return best;
         }
         return null;
     }
@@ -26,15 +26,33 @@ export const api = {
     return request<DailyUsage[]>(`/usage/daily?${q}`)
   },
 
+  /** Server-side aggregated usage, e.g. groupBy 'day,team' (chart series) or 'member' (per-member totals). */
+  usageAggregate: (params: {
+    groupBy: string; email?: string; start?: string; end?: string; topN?: number; rankBy?: string
+  }) => {
+    const q = new URLSearchParams({ group_by: params.groupBy })
+    if (params.email)  q.set('email', params.email)
+    if (params.start)  q.set('start', params.start)
+    if (params.end)    q.set('end', params.end)
+    if (params.topN)   q.set('top_n', String(params.topN))
+    if (params.rankBy) q.set('rank_by', params.rankBy)
+    return request<UsageAggregate[]>(`/usage/daily?${q}`)
+  },
+
   spend: () => request<SpendRow[]>('/usage/spend'),
 
-  sessions: (params: { email?: string; workspace?: string; start?: string; end?: string; page?: number }) => {
+  sessions: (params: {
+    email?: string; workspace?: string; start?: string; end?: string; page?: number
+    cursor?: string; count?: 'auto' | 'exact' | 'estimate' | 'none'
+  }) => {
     const q = new URLSearchParams()
     if (params.email)     q.set('email', params.email)
     if (params.workspace) q.set('workspace', params.workspace)
     if (params.start)     q.set('start', params.start)
     if (params.end)       q.set('end', params.end)
     if (params.page)      q.set('page', String(params.page))
+    if (params.cursor)    q.set('cursor', params.cursor)
+    if (params.count)     q.set('count', params.count)
     return request<SessionsResponse>(`/sessions?${q}`)
   },
 
@@ -76,6 +94,9 @@ export const api = {
     request<{ ok: boolean; message?: string }>(`/projects/${id}/reinject-hook`, { method: 'POST' }),
   projectSummary: (id: number) =>
     request<ProjectSummary>(`/projects/${id}/summary`),
+  /** Summaries for many projects in one request (unknown ids come back in missing). */
+  projectSummaries: (ids: number[]) =>
+    request<{ items: ProjectSummary[]; missing: number[] }>(`/projects/summaries?ids=${ids.join(',')}`),
   myContributions: (params: { email: string; start?: string; end?: string; period_type?: string; period_key?: string }) => {
     const q = new URLSearchParams()
     q.set('email', params.email)
@@ -113,7 +134,12 @@ export const api = {
   deleteIncentiveRule: (id: number) =>
     request<void>(`/incentive-rules/${id}`, { method: 'DELETE' }),
   recalculateIncentiveRule: (id: number) =>
-    request<{ ok: boolean; message?: string }>(`/incentive-rules/${id}/recalculate`, { method: 'POST' }),
+    request<JobSubmitted>(`/incentive-rules/${id}/recalculate`, { method: 'POST' }),
+  recalculateRange: (body: { start: string; end: string; period_types?: string[]; rule_id?: number }) =>
+    request<JobSubmitted>('/contributions/recalculate-range', { method: 'POST', body: JSON.stringify(body) }),
+  triggerGitCollect: () =>
+    request<JobSubmitted>('/admin/trigger-git-collect', { method: 'POST' }),
+  job: (id: number) => request<Job>(`/jobs/${id}`),
 }
 
 // ─── Types ────────────────────────────────────────────────────────────────────
@@ -206,6 +232,22 @@ export interface DailyUsage {
   is_active: boolean
 }
 
+export interface UsageAggregate {
+  bucket?: string
+  email?: string
+  agent_requests: number
+  chat_requests: number
+  composer_requests: number
+  total_tabs_accepted: number
+  total_tabs_shown: number
+  total_lines_added: number
+  total_lines_deleted: number
+  accepted_lines_added: number
+  subscription_reqs: number
+  usage_based_reqs: number
+  active_days: number
+}
+
 export interface SpendRow {
   email: string
   name: string | null
@@ -235,9 +277,13 @@ export interface SessionSummaryByProjectRow {
 }
 
 export interface SessionsResponse {
-  total: number
+  /** null when count=none; planner estimate when total_is_estimate */
+  total: number | null
+  total_is_estimate: boolean
   page: number
   page_size: number
+  /** opaque keyset cursor for the next page; null on the last page */
+  next_cursor: string | null
   data: SessionRow[]
 }
 
@@ -347,3 +393,27 @@ export interface IncentiveRuleUpdate {
   caps?: Record<string, number>
   enabled?: boolean
 }
+
+// ─── Background jobs ──────────────────────────────────────────────────────────
+
+export interface JobSubmitted {
+  ok: boolean
+  job_id: number
+  /** true when an identical job was already queued/running and its id was returned */
+  coalesced: boolean
+  message?: string
+}
+
+export interface Job {
+  id: number
+  job_type: string
+  status: 'queued' | 'running' | 'succeeded' | 'failed'
+  params: Record<string, unknown>
+  progress: { done: number; total: number | null; message: string | null }
+  result: Record<string, unknown> | null
+  error: string | null
+  created_at: string | null
+  started_at: string | null
+  finished_at: string | null
+  duration_seconds: number | null
+}
@@ -3,13 +3,14 @@ import { format, subDays } from 'date-fns'
 import {
   BarChart, Bar, XAxis, YAxis, Tooltip, ResponsiveContainer, Legend,
 } from 'recharts'
-import { api, DailyUsage, Member } from '../api/client'
+import { api, Member, UsageAggregate } from '../api/client'
 
 function fmt(d: Date) { return format(d, 'yyyy-MM-dd') }
 
 export default function UsagePage() {
   const [members, setMembers] = useState<Member[]>([])
-  const [usage, setUsage] = useState<DailyUsage[]>([])
+  const [series, setSeries] = useState<UsageAggregate[]>([])
+  const [byUser, setByUser] = useState<UsageAggregate[]>([])
   const [email, setEmail] = useState('')
   const [start, setStart] = useState(fmt(subDays(new Date(), 14)))
   const [end, setEnd] = useState(fmt(new Date()))
@@ -17,35 +18,24 @@ export default function UsagePage() {
 
   useEffect(() => { api.members().then(setMembers) }, [])
 
+  // 聚合在服务端完成：按日汇总（多用户叠加）+ 按成员汇总（按 Agent 请求降序）
   useEffect(() => {
     setLoading(true)
-    api.dailyUsage({ email: email || undefined, start, end })
-      .then(setUsage)
+    const params = { email: email || undefined, start, end }
+    Promise.all([
+      api.usageAggregate({ ...params, groupBy: 'day,team' }),
+      api.usageAggregate({ ...params, groupBy: 'member', rankBy: 'agent_requests' }),
+    ])
+      .then(([s, u]) => { setSeries(s); setByUser(u) })
       .finally(() => setLoading(false))
   }, [email, start, end])
 
-  // 聚合：按 day 汇总（多用户时叠加）
-  const chartData = Object.values(
-    usage.reduce<Record<string, { day: string; agent: number; chat: number; tabs: number }>>((acc, r) => {
-      if (!acc[r.day]) acc[r.day] = { day: r.day, agent: 0, chat: 0, tabs: 0 }
-      acc[r.day].agent += r.agent_requests
-      acc[r.day].chat  += r.chat_requests
-      acc[r.day].tabs  += r.total_tabs_accepted
-      return acc
-    }, {})
-  ).sort((a, b) => a.day.localeCompare(b.day))
-
-  // 按用户汇总
-  const byUser = Object.values(
-    usage.reduce<Record<string, { email: string; agent: number; chat: number; lines: number; usageBased: number }>>((acc, r) => {
-      if (!acc[r.email]) acc[r.email] = { email: r.email, agent: 0, chat: 0, lines: 0, usageBased: 0 }
-      acc[r.email].agent     += r.agent_requests
-      acc[r.email].chat      += r.chat_requests
-      acc[r.email].lines     += r.total_lines_added
-      acc[r.email].usageBased += r.usage_based_reqs
-      return acc
-    }, {})
-  ).sort((a, b) => b.agent - a.agent)
+  const chartData = series.map(r => ({
+    day: r.bucket ?? '',
+    agent: r.agent_requests,
+    chat: r.chat_requests,
+    tabs: r.total_tabs_accepted,
+  }))
 
   return (
     <div className="p-6 space-y-6">
@@ -117,10 +107,10 @@ export default function UsagePage() {
             {byUser.map(u => (
               <tr key={u.email} className="hover:bg-gray-50">
                 <td className="px-5 py-2.5 font-medium">{u.email}</td>
-                <td className="px-4 py-2.5 text-right">{u.agent.toLocaleString()}</td>
-                <td className="px-4 py-2.5 text-right">{u.chat.toLocaleString()}</td>
-                <td className="px-4 py-2.5 text-right">{u.lines.toLocaleString()}</td>
-                <td className="px-4 py-2.5 text-right">{u.usageBased.toLocaleString()}</td>
+                <td className="px-4 py-2.5 text-right">{u.agent_requests.toLocaleString()}</td>
+                <td className="px-4 py-2.5 text-right">{u.chat_requests.toLocaleString()}</td>
+                <td className="px-4 py-2.5 text-right">{u.total_lines_added.toLocaleString()}</td>
+                <td className="px-4 py-2.5 text-right">{u.usage_based_reqs.toLocaleString()}</td>
               </tr>
             ))}
             {byUser.length === 0 && (
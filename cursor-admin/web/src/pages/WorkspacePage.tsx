@@ -21,6 +21,8 @@ export default function WorkspacePage() {
   const [start, setStart] = useState(fmt(subDays(new Date(), 14)))
   const [end, setEnd] = useState(fmt(new Date()))
   const [page, setPage] = useState(1)
+  // cursors[i] is the keyset cursor that loads page i + 1
+  const [cursors, setCursors] = useState<(string | undefined)[]>([undefined])
   const [tab, setTab] = useState<'summary' | 'detail'>('summary')
   const [loadingSummary, setLoadingSummary] = useState(false)
   const [loadingDetail, setLoadingDetail] = useState(false)
@@ -47,12 +49,24 @@ export default function WorkspacePage() {
     if (tab !== 'detail') return
     setLoadingDetail(true)
     setErrorDetail(null)
-    api.sessions({ email: email || undefined, workspace: undefined, start, end, page })
-      .then(setSessions)
+    api.sessions({ email: email || undefined, workspace: undefined, start, end, cursor: cursors[page - 1] })
+      .then((res) => {
+        setSessions(res)
+        setCursors((prev) => {
+          const next = prev.slice(0, page)
+          next[page] = res.next_cursor ?? undefined
+          return next
+        })
+      })
       .catch((e) => { setErrorDetail((e as Error).message); setSessions(null) })
       .finally(() => setLoadingDetail(false))
   }, [tab, email, start, end, page])
 
+  useEffect(() => {
+    setPage(1)
+    setCursors([undefined])
+  }, [email, start, end])
+
   const projectNameById = new Map(projects.map((p) => [p.id, p.name]))
   const filteredSummary = summaryByProject.filter(
     (s) =>
@@ -215,10 +229,12 @@ export default function WorkspacePage() {
         </div>
       )}
 
-      {tab === 'detail' && sessions && (sessions.data.length > 0 || sessions.total > 0) && (
+      {tab === 'detail' && sessions && (sessions.data.length > 0 || (sessions.total ?? 0) > 0) && (
         <div className="bg-white rounded-xl border border-gray-200 overflow-hidden">
           <div className="px-5 py-3 border-b border-gray-100 flex items-center justify-between">
-            <span className="text-sm font-medium text-gray-600">会话明细（共 {sessions.total} 条）</span>
+            <span className="text-sm font-medium text-gray-600">
+              会话明细（共 {sessions.total_is_estimate ? '约 ' : ''}{sessions.total ?? '-'} 条）
+            </span>
             <div className="flex gap-2">
               <button
                 disabled={page <= 1}
@@ -229,7 +245,7 @@ export default function WorkspacePage() {
               </button>
               <span className="px-2 py-1 text-xs text-gray-500">第 {page} 页</span>
               <button
-                disabled={sessions.data.length < sessions.page_size}
+                disabled={!sessions.next_cursor}
                 onClick={() => setPage((p) => p + 1)}
                 className="px-3 py-1 text-xs border border-gray-300 rounded disabled:opacity-40"
               >